@@ -1,51 +1,154 @@
+import logging
+from collections.abc import Mapping
+
+import click
 from flask import Flask
+from flask.cli import with_appcontext
 from flask_cors import CORS
 from flask_jwt_extended import JWTManager
-from flask_mail import Mail
-
-
+from sqlalchemy import inspect
+from sqlalchemy.schema import CreateIndex
+from werkzeug.middleware.proxy_fix import ProxyFix
 
 from config import Config
-from database import db
+from database import db, init_db, warm_pool
 from auth.routes import auth_bp
+import auth.commands  # registra os comandos "flask auth ..."
+import auth.admin  # registra as rotas /admin
+from auth.hashing import password_hasher
+from auth.breached import breached_passwords
+from auth.google_client import google_client
+from auth.outbox import outbox_sender
+from auth.email_filter import email_filter
+from auth.tokens import init_jwt
+from auth.profile_cache import init_profile_cache
+from auth.ratelimit import rate_limiter
+from auth.idempotency import idempotency
+from metrics import init_metrics
+from json_provider import MsgspecJSONProvider
+from logs import init_logging, log_queue
+from profiling import init_profiling
+
+
+@click.command("init-db")
+@with_appcontext
+def init_db_command():
+    """Cria as tabelas e os índices que ainda não existem no banco"""
+    existing = set(inspect(db.engine).get_table_names())
+    db.create_all()
+    # create_all não mexe em tabelas existentes: os índices novos delas são
+    # criados aqui. IF NOT EXISTS onde há (a reflexão do SQLite, usada pelo
+    # checkfirst, não enxerga índices de expressão como ix_users_nome_lower_id)
+    if_not_exists = db.engine.dialect.name in ("sqlite", "postgresql")
+    with db.engine.begin() as conn:
+        for table in db.metadata.sorted_tables:
+            if table.name not in existing:
+                continue
+            for index in table.indexes:
+                if if_not_exists:
+                    conn.execute(CreateIndex(index, if_not_exists=True))
+                else:
+                    index.create(conn, checkfirst=True)
+    click.echo("✅ Banco de dados inicializado!")
+
+
+def create_app(config=None):
+    """Cria o app Flask.
+
+    `config` pode ser um objeto de configuração ou um dicionário, aplicado
+    por cima de Config. O schema não é criado aqui: rode `flask init-db`
+    (ou as migrações) antes de subir os workers. Nenhuma thread de fundo
+    nem conexão é aberta aqui (comandos `flask` também criam o app): o
+    servidor chama start_worker() em cada processo que atende requisições.
+    """
+    app = Flask(__name__)
+    app.config.from_object(Config)
+    if isinstance(config, Mapping):
+        app.config.update(config)
+    elif config is not None:
+        app.config.from_object(config)
+
+    if app.config.get("PROXY_FIX_X_FOR") or app.config.get("PROXY_FIX_X_PROTO"):
+        # request.remote_addr passa a ser o cliente informado pelos proxies confiáveis
+        app.wsgi_app = ProxyFix(
+            app.wsgi_app, x_for=app.config.get("PROXY_FIX_X_FOR", 0), x_proto=app.config.get("PROXY_FIX_X_PROTO", 0)
+        )
+
+    app.json = MsgspecJSONProvider(app)
+    init_logging(app)
+    CORS(app, resources={
+        r"/*": {
+            "origins": [
+                "http://localhost:4200",
+                "http://127.0.0.1:4200"
+            ],
+            "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"],
+            "allow_headers": ["Content-Type", "Authorization", "X-Request-ID", "Idempotency-Key"],
+            "supports_credentials": True,
+            "expose_headers": ["Content-Type", "Authorization", "X-Request-ID"]
+        }
+    })
+
+    init_db(app)
+    password_hasher.init_app(app)
+    breached_passwords.init_app(app)
+    google_client.init_app(app)
+    rate_limiter.init_app(app)
+    idempotency.init_app(app)
+    init_profile_cache(app)
+    jwt = JWTManager(app)
+    init_jwt(jwt, app)
 
-app = Flask(__name__)
-app.config.from_object(Config)
+    init_metrics(app, auth_bp)
+    init_profiling(app, auth_bp)
+    app.register_blueprint(auth_bp)
+    app.cli.add_command(init_db_command)
 
+    outbox_sender.init_app(app)
+    email_filter.init_app(app)
+    return app
 
-CORS(app, resources={
-    r"/*": {
-        "origins": [
-            "http://localhost:4200",
-            "http://127.0.0.1:4200"
-        ],
-        "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-        "allow_headers": ["Content-Type", "Authorization"],
-        "supports_credentials": True,
-        "expose_headers": ["Content-Type", "Authorization"]
-    }
-})
 
+def start_worker(app):
+    """Prepara o processo para atender requisições com o app de create_app().
 
-db.init_app(app)
-jwt = JWTManager(app)
-mail = Mail(app)
+    Se o processo veio de um fork depois de create_app(), as conexões
+    herdadas ficam com o pai (dispose sem fechá-las). Inicia as threads de
+    fundo (outbox, filtro de emails, logs) e aquece o pool de conexões.
+    """
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
+    log_queue.start()
+    if outbox_sender.enabled:
+        outbox_sender.start()
+    if email_filter.enabled:
+        email_filter.start()
+    warm_pool(app)
 
 
-app.extensions['mail'] = mail
+def stop_background(app):
+    """Para o trabalho de fundo e fecha as conexões do processo.
 
-app.register_blueprint(auth_bp)
+    A outbox termina o lote em andamento, o pool de hash e o cliente do
+    Google são encerrados e a fila de logs é escrita por último. Usado no
+    encerramento de cada worker e no processo pai antes do fork.
+    """
+    outbox_sender.shutdown()
+    email_filter.shutdown()
+    password_hasher.shutdown()
+    google_client.shutdown()
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose()
+    log_queue.shutdown()
 
-with app.app_context():
-    try:
-        db.create_all()
-        print("✅ Banco de dados inicializado!")
-    except Exception as e:
-        print(f"❌ Erro ao criar banco: {e}")
-        exit(1)
 
 if __name__ == "__main__":
-    print("🚀 Servidor Flask iniciando...")
-    print("🔗 Rodando em: http://127.0.0.1:5000")
-    print("🔗 Frontend esperado em: http://localhost:4200")
-    app.run(debug=True, port=5000, host='0.0.0.0')
\ No newline at end of file
+    # Só para desenvolvimento (debug com FLASK_DEBUG=1); produção: gunicorn -c gunicorn.conf.py wsgi:app
+    app = create_app()
+    start_worker(app)
+    logging.getLogger(__name__).warning("Servidor de desenvolvimento iniciando", extra={
+        "url": "http://127.0.0.1:5000", "frontend": "http://localhost:4200"
+    })
+    app.run(port=5000, host='0.0.0.0')
@@ -0,0 +1,12 @@
+"""Entrada ASGI: login Google sem prender threads esperando o Google.
+
+    uvicorn asgi:app --workers 4
+
+As demais rotas continuam no Flask, atendidas em um pool de threads
+(ASGI_WSGI_THREADS) por processo.
+"""
+from app import create_app, start_worker, stop_background
+from auth.google_async import GoogleASGIApp
+
+# Trabalho de fundo e conexões iniciados no lifespan de cada processo do uvicorn
+app = GoogleASGIApp(create_app(), startup=start_worker, shutdown=stop_background)
@@ -0,0 +1,155 @@
+import base64
+import functools
+import json
+
+from flask import jsonify, request
+from flask_jwt_extended import get_jwt_identity, jwt_required
+from sqlalchemy import func, or_, select
+
+from database import db, read_bind
+from models import Admin, User
+from auth.routes import auth_bp
+from auth.schemas import Erro, PaginaUsuarios, Usuario
+
+# Colunas da listagem, na ordem dos campos de Usuario: sem montar objetos do ORM
+USER_COLUMNS = (User.id, User.nome, User.email, User.is_google_user, User.picture)
+MAX_PAGE_SIZE = 200
+
+
+def admin_required(view):
+    """Exige access token de um usuário da tabela admins.
+
+    O email não serve de credencial: qualquer um cadastra qualquer email
+    (sem verificação, e com outra caixa de letras se o original existe).
+    """
+    @functools.wraps(view)
+    @jwt_required()
+    def wrapper(*args, **kwargs):
+        if db.session.get(Admin, int(get_jwt_identity())) is None:
+            return jsonify(Erro(error="Acesso restrito a administradores")), 403
+        return view(*args, **kwargs)
+    return wrapper
+
+
+def set_admin(email, admin=True):
+    """Concede ou revoga o acesso a /admin do usuário com exatamente este email.
+
+    Retorna o usuário (None se o email não existe).
+    """
+    user = db.session.scalars(select(User).filter_by(email=email)).first()
+    if user is None:
+        return None
+    current = db.session.get(Admin, user.id)
+    if admin and current is None:
+        db.session.add(Admin(user_id=user.id))
+    elif not admin and current is not None:
+        db.session.delete(current)
+    db.session.commit()
+    return user
+
+
+def encode_cursor(values):
+    return base64.urlsafe_b64encode(json.dumps(values, separators=(",", ":")).encode()).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor):
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except ValueError:
+        raise ValueError("Cursor inválido")
+    if not isinstance(values, list) or not all(isinstance(value, (str, int)) for value in values):
+        raise ValueError("Cursor inválido")
+    return values
+
+
+def _prefix_end(prefix):
+    # Prefixo como faixa [prefix, fim): usa o índice B-tree em qualquer banco
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+# lower() do SQLite só converte ASCII: o prefixo é convertido da mesma forma,
+# senão "Ál" vira "ál" e não encontra lower("Álvaro") == "Álvaro"
+_ASCII_LOWER = str.maketrans("ABCDEFGHIJKLMNOPQRSTUVWXYZ", "abcdefghijklmnopqrstuvwxyz")
+
+
+def _db_lower(value):
+    if db.engine.dialect.name == "sqlite":
+        return value.translate(_ASCII_LOWER)
+    return value.lower()
+
+
+def page_statement(limit=50, cursor=None, q=None, field="nome"):
+    """SELECT de uma página (limit + 1 linhas, para saber se há a próxima).
+
+    Paginação por keyset: cada página começa depois da última linha da
+    anterior, então custa o mesmo em qualquer profundidade. Sem `q`, em
+    ordem de id; com `q`, prefixo de nome (ix_users_nome_lower_id, sem
+    diferenciar maiúsculas) ou de email (índice único), na ordem do campo.
+    """
+    if not q:
+        sort = (User.id,)
+    elif field == "nome":
+        q = _db_lower(q)
+        sort = (func.lower(User.nome), User.id)
+    elif field == "email":
+        sort = (User.email,)
+    else:
+        raise ValueError("Campo de busca deve ser nome ou email")
+
+    # A chave de ordenação vem junto: o cursor usa o lower() do próprio banco
+    stmt = select(*USER_COLUMNS, *(column.label(f"sort_{i}") for i, column in enumerate(sort)))
+    stmt = stmt.order_by(*sort).limit(limit + 1)
+    values = decode_cursor(cursor) if cursor is not None else None
+    # Cada valor com o tipo da sua coluna: `users.id > 'abc'` é erro no Postgres (500, não 400)
+    if values is not None and (
+        len(values) != len(sort)
+        or any(type(value) is not (int if column is User.id else str) for value, column in zip(values, sort))
+        or (q and values[0] < q)
+    ):
+        raise ValueError("Cursor inválido")
+
+    key = sort[0]
+    if q:
+        # A faixa limita a leitura do índice; o LIKE garante o prefixo, porque em
+        # collations que não são "C" a faixa também contém nomes sem o prefixo
+        # ("a b c" fica entre "ab" e "ac" em en_US.UTF-8, que ignora espaços)
+        stmt = stmt.where(key < _prefix_end(q), key.startswith(q, autoescape=True))
+        # Com cursor, o início da faixa é o próprio cursor (que já está dentro do prefixo)
+        if values is None:
+            stmt = stmt.where(key >= q)
+    if values is not None and len(sort) == 1:
+        stmt = stmt.where(key > values[0])
+    elif values is not None:
+        # (chave, id) > (v0, v1) escrito com `chave >= v0`: a leitura do índice começa
+        # em v0 (com a tupla, ou com dois limites inferiores, o SQLite começa no prefixo)
+        stmt = stmt.where(key >= values[0], or_(key > values[0], sort[1] > values[1]))
+    return stmt
+
+
+def list_users(limit=50, cursor=None, q=None, field="nome"):
+    """Uma página de usuários (Structs montados das tuplas) e o cursor da próxima (None na última)"""
+    stmt = page_statement(limit, cursor, q, field)
+    rows = db.session.execute(stmt, bind_arguments={"bind": read_bind()}).all()
+    page = rows[:limit]
+    next_cursor = encode_cursor(list(page[-1][len(USER_COLUMNS):])) if len(rows) > limit else None
+    return [Usuario(*row[:len(USER_COLUMNS)]) for row in page], next_cursor
+
+
+@auth_bp.route("/admin/users", methods=["GET"])
+@admin_required
+def admin_list_users():
+    """Lista/busca usuários para o suporte: ?q=prefixo&field=nome|email&limit=50&cursor=..."""
+    try:
+        limit = request.args.get("limit", "50")
+        if not limit.isdigit() or not 1 <= int(limit) <= MAX_PAGE_SIZE:
+            raise ValueError(f"limit deve ser um número entre 1 e {MAX_PAGE_SIZE}")
+        usuarios, next_cursor = list_users(
+            limit=int(limit),
+            cursor=request.args.get("cursor"),
+            q=request.args.get("q") or None,
+            field=request.args.get("field", "nome")
+        )
+    except ValueError as e:
+        return jsonify(Erro(error=str(e))), 400
+
+    return jsonify(PaginaUsuarios(usuarios=usuarios, next_cursor=next_cursor)), 200
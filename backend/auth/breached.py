@@ -0,0 +1,168 @@
+"""Senhas vazadas conhecidas, consultadas offline.
+
+O arquivo é uma lista ordenada de hashes SHA-1 (ou só os primeiros
+`width` bytes deles) aberta com mmap: cada worker mapeia o mesmo arquivo,
+as páginas ficam no cache do sistema e são compartilhadas, e a consulta é
+uma busca binária que lê ~log2(N) registros.
+
+Formato: cabeçalho de 8 bytes (MAGIC, versão, width, 2 bytes zerados)
+seguido dos registros de `width` bytes, ordenados e sem repetição. O
+comando `flask auth build-breached-passwords` gera o arquivo a partir do
+dump público em texto ("SHA1:contagem" por linha).
+"""
+import binascii
+import hashlib
+import heapq
+import mmap
+import os
+import tempfile
+
+from metrics import Counter
+
+MAGIC = b"BPWD"
+VERSION = 1
+HEADER_SIZE = 8
+# 8 bytes (64 bits): com 10^9 hashes, falso positivo ~5e-11 por senha, em 40% do tamanho do SHA-1 inteiro
+DEFAULT_WIDTH = 8
+
+BREACHED_PASSWORDS_REJECTED = Counter(
+    "auth_breached_passwords_rejected_total",
+    "Senhas recusadas por aparecerem em vazamentos conhecidos"
+)
+
+
+def _header(width):
+    return MAGIC + bytes((VERSION, width, 0, 0))
+
+
+def _parse_dump(lines, width, min_count):
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        digest, _, count = line.partition(b":")
+        if len(digest) != 40 or (min_count > 1 and not (count.isdigit() and int(count) >= min_count)):
+            continue
+        try:
+            yield binascii.unhexlify(digest)[:width]
+        except binascii.Error:
+            continue
+
+
+def _write_run(chunk, directory):
+    chunk.sort()
+    fd, path = tempfile.mkstemp(prefix="breached-", suffix=".run", dir=directory)
+    with os.fdopen(fd, "wb") as f:
+        f.write(b"".join(chunk))
+    return path
+
+
+def _read_run(path, width, block=1 << 16):
+    """Registros de um bloco ordenado gravado por _write_run, lidos `block` por vez"""
+    with open(path, "rb") as f:
+        while chunk := f.read(width * block):
+            for offset in range(0, len(chunk), width):
+                yield chunk[offset:offset + width]
+
+
+def build_breached_file(lines, output, width=DEFAULT_WIDTH, min_count=1, chunk_size=5_000_000):
+    """Gera o arquivo binário a partir das linhas do dump (bytes, ordenadas ou não).
+
+    Ordena em blocos de `chunk_size` hashes gravados em arquivos
+    temporários e intercala os blocos no fim, então a memória usada não
+    depende do tamanho do dump. O arquivo final é trocado atomicamente:
+    workers com o arquivo antigo aberto continuam lendo o antigo.
+    Retorna o número de hashes gravados.
+    """
+    if not 1 <= width <= 20:
+        raise ValueError("width deve ser de 1 a 20 bytes")
+    directory = os.path.dirname(os.path.abspath(output))
+    runs = []
+    try:
+        chunk = []
+        for record in _parse_dump(lines, width, min_count):
+            chunk.append(record)
+            if len(chunk) >= chunk_size:
+                runs.append(_write_run(chunk, directory))
+                chunk = []
+        chunk.sort()
+
+        written = 0
+        previous = None
+        tmp_output = f"{output}.tmp"
+        with open(tmp_output, "wb") as f:
+            f.write(_header(width))
+            for record in heapq.merge(chunk, *(_read_run(path, width) for path in runs)):
+                if record != previous:
+                    f.write(record)
+                    written += 1
+                    previous = record
+        os.replace(tmp_output, output)
+        return written
+    finally:
+        for path in runs:
+            os.unlink(path)
+
+
+class BreachedPasswords:
+    """Consulta "esta senha aparece em vazamentos?" no arquivo de BREACHED_PASSWORDS_FILE.
+
+    Sem arquivo configurado, nenhuma senha é recusada. Um arquivo
+    configurado mas ausente ou inválido impede o app de subir.
+    """
+
+    def __init__(self, app=None):
+        # (mmap, width, count) trocados juntos em load()
+        self._table = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        path = app.config.get("BREACHED_PASSWORDS_FILE")
+        if path:
+            self.load(path)
+        app.extensions["breached_passwords"] = self
+
+    @property
+    def enabled(self):
+        return self._table is not None
+
+    @property
+    def count(self):
+        return self._table[2] if self._table is not None else 0
+
+    def load(self, path):
+        with open(path, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        header = mm[:HEADER_SIZE]
+        width = header[5] if len(header) == HEADER_SIZE else 0
+        if header[:4] != MAGIC or header[4] != VERSION or not width or (len(mm) - HEADER_SIZE) % width:
+            mm.close()
+            raise ValueError(f"Arquivo de senhas vazadas inválido: {path}")
+        if hasattr(mm, "madvise"):
+            # Busca binária: leitura antecipada só traria páginas que não serão usadas
+            mm.madvise(mmap.MADV_RANDOM)
+        # O mapa anterior não é fechado: uma consulta em outra thread pode estar usando
+        self._table = (mm, width, (len(mm) - HEADER_SIZE) // width)
+
+    def __contains__(self, password):
+        table = self._table
+        if table is None:
+            return False
+        mm, width, count = table
+        key = hashlib.sha1(password.encode("utf-8"), usedforsecurity=False).digest()[:width]
+        lo, hi = 0, count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            offset = HEADER_SIZE + mid * width
+            record = mm[offset:offset + width]
+            if record < key:
+                lo = mid + 1
+            elif record > key:
+                hi = mid
+            else:
+                return True
+        return False
+
+
+breached_passwords = BreachedPasswords()
@@ -0,0 +1,158 @@
+import os
+
+import click
+from flask import current_app
+
+from auth.routes import auth_bp
+from auth.utils import purge_expired_reset_tokens, purge_expired_rows, purge_finished_emails
+from models import RefreshToken, RevokedToken
+from auth.email_filter import email_filter, request_rebuild
+from auth.importer import import_users, read_rows
+from auth.hashing import calibrate
+from auth.keys import generate_key
+from auth.breached import DEFAULT_WIDTH, build_breached_file
+from auth.admin import set_admin
+
+
+@auth_bp.cli.command("purge-reset-tokens")
+@click.option("--batch-size", default=1000, show_default=True, help="Linhas removidas por transação")
+def purge_reset_tokens_command(batch_size):
+    """Remove tokens de recuperação expirados"""
+    total = purge_expired_reset_tokens(batch_size=batch_size)
+    click.echo(f"✅ {total} tokens expirados removidos")
+
+
+@auth_bp.cli.command("purge-jwt-tokens")
+@click.option("--batch-size", default=1000, show_default=True, help="Linhas removidas por transação")
+def purge_jwt_tokens_command(batch_size):
+    """Remove refresh tokens e revogações de access tokens já expirados"""
+    refresh = purge_expired_rows(RefreshToken, batch_size)
+    revoked = purge_expired_rows(RevokedToken, batch_size)
+    click.echo(f"✅ {refresh} refresh tokens e {revoked} revogações removidos")
+
+
+@auth_bp.cli.command("purge-outbox")
+@click.option("--days", type=int, help="Dias mantidos depois do envio (padrão: OUTBOX_RETENTION_DAYS)")
+@click.option("--batch-size", default=1000, show_default=True, help="Linhas removidas por transação")
+def purge_outbox_command(days, batch_size):
+    """Remove da outbox os emails já enviados ou descartados"""
+    if days is None:
+        days = current_app.config.get("OUTBOX_RETENTION_DAYS", 7)
+    total = purge_finished_emails(days, batch_size)
+    click.echo(f"✅ {total} emails removidos da outbox")
+
+
+@auth_bp.cli.command("rebuild-email-filter")
+def rebuild_email_filter_command():
+    """Pede aos workers que reconstruam o filtro de emails e mostra o dimensionamento.
+
+    Cada worker reconstrói o próprio filtro na próxima sincronização
+    (EMAIL_FILTER_SYNC_INTERVAL). As consultas e falsos positivos de cada
+    worker estão em /metrics (email_filter_*).
+    """
+    generation = request_rebuild()
+    click.echo(f"✅ Reconstrução {generation} pedida aos workers")
+    email_filter.build()
+    stats = email_filter.stats()
+    for name in ("items", "capacity", "size_bytes", "hash_count", "estimated_fp_rate"):
+        click.echo(f"{name}: {stats[name]}")
+
+
+@auth_bp.cli.command("grant-admin")
+@click.argument("email")
+@click.option("--revoke", is_flag=True, help="Remove o acesso em vez de conceder")
+def grant_admin_command(email, revoke):
+    """Concede (ou revoga, com --revoke) o acesso a /admin ao usuário com este email.
+
+    O email é comparado exatamente como foi cadastrado, com maiúsculas.
+    """
+    user = set_admin(email, admin=not revoke)
+    if user is None:
+        raise click.ClickException(f"Nenhum usuário com o email {email}")
+    action = "revogado de" if revoke else "concedido a"
+    click.echo(f"✅ Acesso de administrador {action} {user.nome} (id {user.id}, {user.email})")
+
+
+@auth_bp.cli.command("import-users")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--format", "file_format", type=click.Choice(["csv", "jsonl"]),
+              help="Formato do arquivo (padrão: pela extensão)")
+@click.option("--batch-size", default=1000, show_default=True, help="Usuários inseridos por transação")
+@click.option("--workers", type=int, help="Processos para o hash das senhas (padrão: núcleos da CPU)")
+@click.option("--prehashed", is_flag=True,
+              help="Usa a coluna senha_hash (scrypt/pbkdf2 do werkzeug) em vez de senha")
+def import_users_command(path, file_format, batch_size, workers, prehashed):
+    """Importa usuários de um CSV ou JSONL com colunas nome, email e senha.
+
+    Emails já cadastrados ou repetidos no arquivo são ignorados.
+    """
+    def progress(stats):
+        click.echo(
+            f"... {stats.read} lidos, {stats.inserted} inseridos, "
+            f"{stats.duplicates} duplicados, {stats.invalid} inválidos "
+            f"({stats.rows_per_second:.0f} linhas/s)"
+        )
+
+    stats = import_users(
+        read_rows(path, file_format),
+        batch_size=batch_size,
+        workers=workers,
+        prehashed=prehashed,
+        progress=progress
+    )
+    click.echo(
+        f"✅ {stats.inserted} usuários importados, {stats.duplicates} duplicados e "
+        f"{stats.invalid} inválidos ignorados ({stats.rows_per_second:.0f} linhas/s)"
+    )
+
+
+@auth_bp.cli.command("calibrate-hash")
+@click.option("--algorithm", type=click.Choice(["scrypt", "pbkdf2"]), default="scrypt", show_default=True)
+@click.option("--target-ms", default=250, show_default=True, help="Tempo alvo por hash")
+def calibrate_hash_command(algorithm, target_ms):
+    """Mede esta máquina e sugere PASSWORD_HASH_METHOD para o tempo alvo.
+
+    Hashes antigos são refeitos com o novo método no próximo login.
+    """
+    method, elapsed = calibrate(algorithm, target_ms / 1000)
+    click.echo(f"{method}: {elapsed * 1000:.0f}ms por hash")
+    click.echo(f"PASSWORD_HASH_METHOD={method}")
+
+
+@auth_bp.cli.command("generate-jwt-key")
+@click.option("--algorithm", type=click.Choice(["RS256", "EdDSA"]), default="RS256", show_default=True)
+@click.option("--dir", "directory", help="Diretório das chaves (padrão: JWT_KEYS_DIR)")
+def generate_jwt_key_command(algorithm, directory):
+    """Gera uma chave de assinatura nova em JWT_KEYS_DIR.
+
+    Depois do restart dos workers a chave nova assina os tokens (ou a de
+    JWT_ACTIVE_KID, se definido) e as antigas continuam no JWKS até serem
+    removidas do diretório.
+    """
+    directory = directory or current_app.config.get("JWT_KEYS_DIR")
+    if not directory:
+        raise click.UsageError("Defina JWT_KEYS_DIR ou use --dir")
+    kid = generate_key(directory, algorithm)
+    click.echo(f"✅ Chave {algorithm} criada: {directory}/{kid}.pem")
+    click.echo(f"JWT_ACTIVE_KID={kid}")
+
+
+@auth_bp.cli.command("build-breached-passwords")
+@click.argument("dump", type=click.Path(exists=True, dir_okay=False))
+@click.option("--output", help="Arquivo gerado (padrão: BREACHED_PASSWORDS_FILE)")
+@click.option("--width", type=click.IntRange(1, 20), default=DEFAULT_WIDTH, show_default=True,
+              help="Bytes de cada SHA-1 guardados (20 = hash inteiro)")
+@click.option("--min-count", default=1, show_default=True,
+              help="Ignora hashes vistos menos vezes que isso nos vazamentos")
+def build_breached_passwords_command(dump, output, width, min_count):
+    """Converte o dump público de senhas vazadas ("SHA1:contagem" por linha) no arquivo binário.
+
+    O dump pode estar em qualquer ordem. Os workers carregam o arquivo
+    novo no próximo restart.
+    """
+    output = output or current_app.config.get("BREACHED_PASSWORDS_FILE")
+    if not output:
+        raise click.UsageError("Defina BREACHED_PASSWORDS_FILE ou use --output")
+    with open(dump, "rb") as lines:
+        written = build_breached_file(lines, output, width=width, min_count=min_count)
+    click.echo(f"✅ {written} hashes gravados em {output} ({os.path.getsize(output) / 2**20:.1f} MiB)")
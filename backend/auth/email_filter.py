@@ -0,0 +1,329 @@
+import hashlib
+import logging
+import math
+import os
+import threading
+import time
+from collections import deque
+
+from sqlalchemy import event, func, or_, select
+
+from database import DB_ROUTED_READS, db, mark_written, read_bind
+from metrics import Gauge
+from models import EmailFilterRebuild, User
+
+logger = logging.getLogger(__name__)
+
+# Últimos ids lidos na construção em que se procuram lacunas
+GAP_LOOKBACK = 1000
+# Acima disso as lacunas viram um intervalo só (a consulta não cresce sem limite)
+MAX_GAPS = 100
+
+
+def normalize_email(email):
+    """Forma canônica do email usada no filtro"""
+    return email.strip().lower()
+
+
+class BloomFilter:
+    """Filtro de Bloom com k índices derivados de um único hash BLAKE2b"""
+
+    def __init__(self, capacity, error_rate):
+        self.capacity = max(int(capacity), 1)
+        self.error_rate = error_rate
+        self.size = max(int(math.ceil(-self.capacity * math.log(error_rate) / math.log(2) ** 2)), 8)
+        self.hash_count = max(int(round(self.size / self.capacity * math.log(2))), 1)
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+        self._lock = threading.Lock()
+
+    def _indexes(self, item):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hash_count)]
+
+    def add(self, item):
+        indexes = self._indexes(item)
+        with self._lock:
+            for index in indexes:
+                self._bits[index >> 3] |= 1 << (index & 7)
+            self.count += 1
+
+    def __contains__(self, item):
+        bits = self._bits
+        return all(bits[index >> 3] & (1 << (index & 7)) for index in self._indexes(item))
+
+    def estimated_error_rate(self):
+        """Taxa de falso positivo esperada para o número de itens atual"""
+        return (1 - math.exp(-self.hash_count * self.count / self.size)) ** self.hash_count
+
+
+class EmailFilter:
+    """Filtro em memória de "o email pode existir" na tabela users.
+
+    Montado em segundo plano com uma leitura em streaming de users e
+    atualizado a cada inserção. Uma thread busca periodicamente os ids
+    novos, para enxergar cadastros feitos por outros processos.
+    Enquanto não estiver pronto, toda consulta vai ao banco.
+
+    Ids de sequence são reservados na inserção e aparecem no commit, então
+    um id menor pode surgir depois de um maior: as lacunas abaixo do maior
+    id lido são relidas por EMAIL_FILTER_GAP_SECONDS. O filtro é refeito a
+    cada EMAIL_FILTER_REBUILD_INTERVAL e quando um pedido novo aparece em
+    email_filter_rebuilds (`flask auth rebuild-email-filter`).
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.enabled = False
+        self._filter = None
+        self._max_id = 0
+        self._gaps = []
+        self._generation = 0
+        self._built_at = 0.0
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._reset_stats()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.shutdown()
+        self.app = app
+        self.enabled = app.config.get("EMAIL_FILTER_ENABLED", True)
+        self.capacity = app.config.get("EMAIL_FILTER_CAPACITY", 1_000_000)
+        self.error_rate = app.config.get("EMAIL_FILTER_ERROR_RATE", 0.001)
+        self.sync_interval = app.config.get("EMAIL_FILTER_SYNC_INTERVAL", 1.0)
+        self.gap_seconds = app.config.get("EMAIL_FILTER_GAP_SECONDS", 60.0)
+        self.rebuild_interval = app.config.get("EMAIL_FILTER_REBUILD_INTERVAL", 3600.0)
+        self._filter = None
+        self._max_id = 0
+        self._gaps = []
+        self._reset_stats()
+        app.extensions["email_filter"] = self
+
+    def _reset_stats(self):
+        self.lookups = 0
+        self.definite_misses = 0
+        self.false_positives = 0
+
+    # Construção
+
+    def build(self):
+        """Monta um filtro novo a partir da tabela users (requer app context)"""
+        generation = _rebuild_generation()
+        total = db.session.scalar(select(func.count(User.id))) or 0
+        capacity = max(self.capacity, total * 2)
+        bloom = BloomFilter(capacity, self.error_rate)
+
+        recent = deque(maxlen=GAP_LOOKBACK)
+        result = db.session.execute(
+            select(User.id, User.email).order_by(User.id).execution_options(yield_per=10_000)
+        )
+        for user_id, email in result:
+            bloom.add(normalize_email(email))
+            recent.append(user_id)
+        db.session.rollback()
+
+        # Cadastros em andamento durante a leitura têm ids próximos do maior
+        after = recent[0] - 1 if recent else 0
+        self._gaps = _find_gaps(recent, after, time.monotonic() + self.gap_seconds)
+        self._filter = bloom
+        self._max_id = max(self._max_id, recent[-1] if recent else 0)
+        self._generation = generation
+        self._built_at = time.monotonic()
+        return bloom
+
+    def sync(self):
+        """Adiciona usuários criados depois da última leitura (requer app context)"""
+        bloom = self._filter
+        if bloom is None or self._rebuild_due():
+            return self.build()
+
+        now = time.monotonic()
+        self._gaps = [gap for gap in self._gaps if gap[2] > now]
+        if len(self._gaps) > MAX_GAPS:
+            self._gaps = [(self._gaps[0][0], self._gaps[-1][1], max(gap[2] for gap in self._gaps))]
+        criteria = [User.id > self._max_id] + [User.id.between(first, last) for first, last, _ in self._gaps]
+        rows = db.session.execute(
+            select(User.id, User.email).where(or_(*criteria)).order_by(User.id)
+        ).all()
+        db.session.rollback()
+
+        new_ids = []
+        for user_id, email in rows:
+            email = normalize_email(email)
+            # Linhas das lacunas são relidas a cada ciclo: não conta duas vezes
+            if email not in bloom:
+                bloom.add(email)
+            if user_id > self._max_id:
+                new_ids.append(user_id)
+        if new_ids:
+            self._gaps += _find_gaps(new_ids, self._max_id, now + self.gap_seconds)
+            self._max_id = new_ids[-1]
+        if bloom.count > bloom.capacity:
+            return self.build()
+        return bloom
+
+    def _rebuild_due(self):
+        if self.rebuild_interval and time.monotonic() - self._built_at >= self.rebuild_interval:
+            return True
+        return _rebuild_generation() != self._generation
+
+    # Thread de sincronização
+
+    def start(self):
+        """Inicia a thread de construção/sincronização neste processo"""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+                return
+            self._stopping.clear()
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name="email-filter", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stopping.is_set():
+            try:
+                with self.app.app_context():
+                    self.sync()
+            except Exception:
+                logger.exception("Erro ao atualizar filtro de emails", extra={"event": "email_filter_error"})
+            self._stopping.wait(self.sync_interval)
+
+    def shutdown(self, timeout=5):
+        self._stopping.set()
+        if self._thread is not None and self._pid == os.getpid():
+            self._thread.join(timeout)
+        self._thread = None
+
+    # Consulta
+
+    def add(self, email):
+        bloom = self._filter
+        if bloom is not None:
+            bloom.add(normalize_email(email))
+
+    def might_exist(self, email):
+        """False somente quando o email com certeza não está cadastrado"""
+        if not self.enabled:
+            return True
+        if self._pid is not None and self._pid != os.getpid():
+            # Processo novo (fork): o filtro herdado vale, falta a thread
+            self.start()
+        bloom = self._filter
+        if bloom is None:
+            return True
+        self.lookups += 1
+        if normalize_email(email) in bloom:
+            return True
+        self.definite_misses += 1
+        return False
+
+    @property
+    def ready(self):
+        return self.enabled and self._filter is not None
+
+    def record_false_positive(self):
+        self.false_positives += 1
+
+    def stats(self):
+        """Tamanho do filtro e taxas de falso positivo (esperada e observada) neste processo"""
+        bloom = self._filter
+        negatives = self.false_positives + self.definite_misses
+        return {
+            "ready": bloom is not None,
+            "items": bloom.count if bloom else 0,
+            "capacity": bloom.capacity if bloom else 0,
+            "size_bytes": len(bloom._bits) if bloom else 0,
+            "hash_count": bloom.hash_count if bloom else 0,
+            "estimated_fp_rate": bloom.estimated_error_rate() if bloom else None,
+            "lookups": self.lookups,
+            "definite_misses": self.definite_misses,
+            "false_positives": self.false_positives,
+            "observed_fp_rate": self.false_positives / negatives if negatives else None
+        }
+
+
+def _find_gaps(ids, after, deadline):
+    """Intervalos de ids ausentes entre `after` e os `ids` (em ordem crescente)"""
+    gaps = []
+    previous = after
+    for user_id in ids:
+        if user_id > previous + 1:
+            gaps.append((previous + 1, user_id - 1, deadline))
+        previous = user_id
+    return gaps
+
+
+def _rebuild_generation():
+    return db.session.scalar(select(func.max(EmailFilterRebuild.id))) or 0
+
+
+def request_rebuild():
+    """Pede a todos os workers que reconstruam o filtro na próxima sincronização"""
+    request = EmailFilterRebuild()
+    db.session.add(request)
+    db.session.commit()
+    return request.id
+
+
+email_filter = EmailFilter()
+
+
+def _stat(name, default=0):
+    return lambda: email_filter.stats()[name] or default
+
+
+EMAIL_FILTER_ITEMS = Gauge("email_filter_items", "Emails no filtro deste worker", function=_stat("items"))
+EMAIL_FILTER_LOOKUPS = Gauge(
+    "email_filter_lookups", "Consultas ao filtro desde a inicialização do worker", function=_stat("lookups")
+)
+EMAIL_FILTER_DEFINITE_MISSES = Gauge(
+    "email_filter_definite_misses", "Consultas respondidas pelo filtro sem ir ao banco",
+    function=_stat("definite_misses")
+)
+EMAIL_FILTER_FALSE_POSITIVES = Gauge(
+    "email_filter_false_positives", "Consultas que o filtro mandou ao banco e o email não existia",
+    function=_stat("false_positives")
+)
+EMAIL_FILTER_ESTIMATED_FP_RATE = Gauge(
+    "email_filter_estimated_fp_rate", "Taxa de falso positivo esperada para os itens atuais",
+    function=_stat("estimated_fp_rate", 0.0)
+)
+
+
+@event.listens_for(User, "after_insert")
+def _add_inserted_email(mapper, connection, target):
+    email_filter.add(target.email)
+    mark_written(normalize_email(target.email))
+
+
+@event.listens_for(User, "after_update")
+def _mark_updated_email(mapper, connection, target):
+    mark_written(normalize_email(target.email))
+
+
+def find_user_by_email(email):
+    """Busca usuário pelo email, pulando o banco quando o filtro descarta.
+
+    Lê da réplica quando configurada; se ela não tem o email (cadastro
+    ainda não replicado), confirma no primário.
+    """
+    if not email_filter.might_exist(email):
+        return None
+    replica = read_bind(normalize_email(email))
+    if replica is not None:
+        user = db.session.scalars(
+            select(User).filter_by(email=email).limit(1), bind_arguments={"bind": replica}
+        ).first()
+        if user is not None:
+            return user
+        DB_ROUTED_READS.inc(target="fallback")
+    user = User.query.filter_by(email=email).first()
+    if user is None and email_filter.ready:
+        email_filter.record_false_positive()
+    return user
@@ -0,0 +1,247 @@
+"""Login Google assíncrono para servidores ASGI (ver asgi.py).
+
+As chamadas ao Google de /auth/google/callback e /google-login são feitas
+no event loop com um httpx.AsyncClient compartilhado; só a parte de banco
+e a resposta rodam no Flask, em um pool de threads. O resultado das
+chamadas vai para a view pelo environ, então o comportamento (respostas,
+erros, redirects) é o mesmo do servidor WSGI.
+"""
+import asyncio
+import io
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs
+
+import msgspec
+
+from auth.google_client import GOOGLE_HTTP_LATENCY, google_client
+from auth.schemas import GoogleLoginIn
+
+# Chave do environ com os resultados já obtidos: {"token": ..., "id_info": ...}
+PREFETCH_ENVIRON_KEY = "auth.google_prefetch"
+
+_google_login_decoder = msgspec.json.Decoder(GoogleLoginIn)
+
+
+class AsyncGoogleClient:
+    """Versão async do GoogleClient; divide com ele o cache de certificados"""
+
+    def __init__(self, client):
+        self.client = client
+        self.max_connections = 100
+        self._http = None
+        self._lock = None
+
+    def init_app(self, app):
+        self.max_connections = app.config.get("GOOGLE_ASYNC_MAX_CONNECTIONS", 100)
+        app.extensions["async_google_client"] = self
+
+    def _get_http(self):
+        if self._http is None:
+            import httpx
+
+            connect, read = self.client.timeout
+            self._http = httpx.AsyncClient(
+                timeout=httpx.Timeout(read, connect=connect),
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections
+                )
+            )
+            self._lock = asyncio.Lock()
+        return self._http
+
+    async def _fetch_certs(self):
+        started = time.perf_counter()
+        response = await self._get_http().get(self.client.certs_url)
+        GOOGLE_HTTP_LATENCY.observe(time.perf_counter() - started, endpoint="certs")
+        response.raise_for_status()
+        return self.client.store_certs(response.json(), response.headers.get("Cache-Control", ""))
+
+    async def get_certs(self, force=False):
+        certs = None if force else self.client.cached_certs()
+        if certs is not None:
+            return certs
+        self._get_http()
+        async with self._lock:
+            certs = None if force else self.client.cached_certs()
+            return certs if certs is not None else await self._fetch_certs()
+
+    async def verify_id_token(self, token):
+        """Verifica um ID token do Google; levanta ValueError se inválido"""
+        certs = await self.get_certs()
+        if self.client.needs_forced_refresh(token, certs):
+            certs = await self.get_certs(force=True)
+        return self.client.decode_id_token(token, certs)
+
+    async def exchange_code(self, code):
+        """Troca o código de autorização pelos tokens do Google"""
+        started = time.perf_counter()
+        response = await self._get_http().post(
+            self.client.token_url,
+            data=self.client.token_request_data(code)
+        )
+        GOOGLE_HTTP_LATENCY.observe(time.perf_counter() - started, endpoint="token")
+        return response.json()
+
+    async def aclose(self):
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
+
+async_google_client = AsyncGoogleClient(google_client)
+
+
+async def _capture(prefetch, name, call):
+    # Exceções também vão para a view, que trata como na chamada síncrona
+    try:
+        prefetch[name] = await call
+    except Exception as e:
+        prefetch[name] = e
+    return prefetch[name]
+
+
+async def prefetch_callback(query_string):
+    code = parse_qs(query_string).get("code", [None])[0]
+    if not code:
+        return None
+    prefetch = {}
+    token_json = await _capture(prefetch, "token", async_google_client.exchange_code(code))
+    if isinstance(token_json, dict) and "error" not in token_json and "id_token" in token_json:
+        await _capture(prefetch, "id_info", async_google_client.verify_id_token(token_json["id_token"]))
+    return prefetch
+
+
+async def prefetch_token_login(body):
+    # Mesmo schema da view: corpo inválido fica para ela responder 400
+    try:
+        token = _google_login_decoder.decode(body).token
+    except msgspec.DecodeError:
+        return None
+    prefetch = {}
+    await _capture(prefetch, "id_info", async_google_client.verify_id_token(token))
+    return prefetch
+
+
+PREFETCH_ROUTES = {
+    ("GET", "/auth/google/callback"): lambda scope, body: prefetch_callback(scope["query_string"].decode("latin1")),
+    ("POST", "/google-login"): lambda scope, body: prefetch_token_login(body)
+}
+
+
+class GoogleASGIApp:
+    """App ASGI que serve o Flask em threads e faz o I/O do Google no event loop.
+
+    As respostas do auth_bp são JSON pequenos ou redirects, então o corpo
+    da resposta é montado inteiro na thread e enviado de uma vez.
+    `startup`/`shutdown` recebem o app Flask no lifespan do servidor.
+    """
+
+    def __init__(self, flask_app, threads=None, startup=None, shutdown=None):
+        self.flask_app = flask_app
+        self.startup = startup
+        self.shutdown = shutdown
+        async_google_client.init_app(flask_app)
+        self.executor = ThreadPoolExecutor(
+            max_workers=threads or flask_app.config.get("ASGI_WSGI_THREADS", 16),
+            thread_name_prefix="asgi-wsgi"
+        )
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            return await self._lifespan(receive, send)
+        if scope["type"] != "http":
+            raise ValueError(f"Tipo de conexão não suportado: {scope['type']}")
+
+        body = await self._read_body(receive)
+        prefetch_route = PREFETCH_ROUTES.get((scope["method"], scope["path"]))
+        prefetch = await prefetch_route(scope, body) if prefetch_route else None
+
+        loop = asyncio.get_running_loop()
+        status, headers, content = await loop.run_in_executor(
+            self.executor, self._call_flask, scope, body, prefetch
+        )
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        await send({"type": "http.response.body", "body": content})
+
+    async def _read_body(self, receive):
+        chunks = []
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                break
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body"):
+                break
+        return b"".join(chunks)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                if self.startup is not None:
+                    await asyncio.get_running_loop().run_in_executor(self.executor, self.startup, self.flask_app)
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await async_google_client.aclose()
+                if self.shutdown is not None:
+                    await asyncio.get_running_loop().run_in_executor(self.executor, self.shutdown, self.flask_app)
+                self.executor.shutdown(wait=True)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    def _call_flask(self, scope, body, prefetch):
+        environ = build_environ(scope, body)
+        if prefetch is not None:
+            environ[PREFETCH_ENVIRON_KEY] = prefetch
+        response = {}
+
+        def start_response(status, headers, exc_info=None):
+            response["status"] = int(status.split(" ", 1)[0])
+            response["headers"] = [
+                (name.lower().encode("latin1"), value.encode("latin1")) for name, value in headers
+            ]
+
+        output = self.flask_app(environ, start_response)
+        try:
+            content = b"".join(output)
+        finally:
+            if hasattr(output, "close"):
+                output.close()
+        return response["status"], response["headers"], content
+
+
+def build_environ(scope, body):
+    """Environ WSGI a partir do scope ASGI"""
+    server_name, server_port = scope.get("server") or ("localhost", 80)
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", "").encode("utf8").decode("latin1"),
+        "PATH_INFO": scope["path"].encode("utf8").decode("latin1"),
+        "QUERY_STRING": scope["query_string"].decode("latin1"),
+        "SERVER_NAME": server_name,
+        "SERVER_PORT": str(server_port),
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": io.BytesIO(body),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": True,
+        "wsgi.run_once": False
+    }
+    if scope.get("client"):
+        environ["REMOTE_ADDR"] = scope["client"][0]
+    for name, value in scope.get("headers", []):
+        name = name.decode("latin1")
+        value = value.decode("latin1")
+        if name == "content-type":
+            key = "CONTENT_TYPE"
+        elif name == "content-length":
+            key = "CONTENT_LENGTH"
+        else:
+            key = "HTTP_" + name.upper().replace("-", "_")
+        environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
@@ -0,0 +1,199 @@
+import re
+import threading
+import time
+
+from metrics import Histogram, phase_timer
+
+
+GOOGLE_HTTP_LATENCY = Histogram(
+    "google_http_duration_seconds",
+    "Latência das chamadas HTTP ao Google",
+    labelnames=("endpoint",)
+)
+
+
+GOOGLE_ISSUERS = ("accounts.google.com", "https://accounts.google.com")
+
+_MAX_AGE_RE = re.compile(r"max-age=(\d+)")
+
+# Intervalo mínimo entre buscas forçadas por um "kid" desconhecido
+_FORCED_REFRESH_INTERVAL = 60
+
+
+class GoogleClient:
+    """Cliente Google compartilhado pelo processo.
+
+    Mantém os certificados de assinatura em cache até o prazo do
+    Cache-Control (renovando em segundo plano) e reutiliza uma única
+    sessão HTTP com pool de conexões e timeouts.
+
+    requests e google-auth só são importados no primeiro uso: workers
+    que nunca recebem um login Google não pagam por eles.
+    """
+
+    def __init__(self, app=None):
+        self.client_id = None
+        self.client_secret = None
+        self.redirect_uri = None
+        self.certs_url = None
+        self.token_url = None
+        self.timeout = None
+        self._session = None
+        self._certs = None
+        self._expires_at = 0.0
+        self._fetched_at = None
+        self._lock = threading.Lock()
+        self._session_lock = threading.Lock()
+        self._refresh_timer = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.shutdown()
+        self.client_id = app.config.get("GOOGLE_CLIENT_ID")
+        self.client_secret = app.config.get("GOOGLE_CLIENT_SECRET")
+        self.redirect_uri = app.config.get("GOOGLE_REDIRECT_URI")
+        self.certs_url = app.config.get("GOOGLE_CERTS_URL")
+        self.token_url = app.config.get("GOOGLE_TOKEN_URL")
+        self.timeout = (
+            app.config.get("GOOGLE_HTTP_CONNECT_TIMEOUT", 3.0),
+            app.config.get("GOOGLE_HTTP_READ_TIMEOUT", 5.0)
+        )
+        self.refresh_margin = app.config.get("GOOGLE_CERTS_REFRESH_MARGIN", 60)
+        self.pool_size = app.config.get("GOOGLE_HTTP_POOL_SIZE", 10)
+
+        self._certs = None
+        self._expires_at = 0.0
+        self._fetched_at = None
+        app.extensions["google_client"] = self
+
+    @property
+    def session(self):
+        """Sessão HTTP compartilhada, criada no primeiro uso"""
+        if self._session is None:
+            with self._session_lock:
+                if self._session is None:
+                    import requests
+                    from requests.adapters import HTTPAdapter
+
+                    adapter = HTTPAdapter(pool_connections=2, pool_maxsize=self.pool_size, max_retries=1)
+                    session = requests.Session()
+                    session.mount("https://", adapter)
+                    session.mount("http://", adapter)
+                    self._session = session
+        return self._session
+
+    # Certificados
+
+    def _fetch_certs(self):
+        with phase_timer("google_http") as timer:
+            response = self.session.get(self.certs_url, timeout=self.timeout)
+        GOOGLE_HTTP_LATENCY.observe(timer.elapsed, endpoint="certs")
+        response.raise_for_status()
+        return self.store_certs(response.json(), response.headers.get("Cache-Control", ""))
+
+    def store_certs(self, certs, cache_control):
+        """Guarda os certificados pelo prazo do Cache-Control e agenda a renovação"""
+        match = _MAX_AGE_RE.search(cache_control)
+        max_age = int(match.group(1)) if match else 0
+
+        self._certs = certs
+        self._fetched_at = time.monotonic()
+        self._expires_at = self._fetched_at + max_age
+        self._schedule_refresh(max_age - self.refresh_margin)
+        return certs
+
+    def _schedule_refresh(self, delay):
+        if self._refresh_timer is not None:
+            self._refresh_timer.cancel()
+            self._refresh_timer = None
+        if delay <= 0:
+            return
+        timer = threading.Timer(delay, self._background_refresh)
+        timer.daemon = True
+        timer.start()
+        self._refresh_timer = timer
+
+    def _background_refresh(self):
+        try:
+            with self._lock:
+                self._fetch_certs()
+        except Exception:
+            # Mantém os certificados atuais e tenta de novo em breve
+            self._schedule_refresh(min(30, self.refresh_margin))
+
+    def cached_certs(self):
+        """Certificados em cache ainda válidos, ou None"""
+        certs = self._certs
+        if certs is not None and time.monotonic() < self._expires_at:
+            return certs
+        return None
+
+    def get_certs(self, force=False):
+        """Retorna os certificados de assinatura, buscando se expiraram"""
+        certs = None if force else self.cached_certs()
+        if certs is not None:
+            return certs
+        with self._lock:
+            certs = None if force else self.cached_certs()
+            return certs if certs is not None else self._fetch_certs()
+
+    # Tokens
+
+    def needs_forced_refresh(self, token, certs):
+        """Chave nova (rotação do Google): busca os certificados uma vez só"""
+        from google.auth import jwt as google_jwt
+
+        key_id = google_jwt.decode_header(token).get("kid")
+        return bool(key_id and key_id not in certs
+                    and time.monotonic() - self._fetched_at > _FORCED_REFRESH_INTERVAL)
+
+    def decode_id_token(self, token, certs):
+        """Confere assinatura, audiência e emissor; levanta ValueError se inválido"""
+        from google.auth import jwt as google_jwt
+
+        id_info = google_jwt.decode(token, certs=certs, audience=self.client_id)
+
+        if id_info.get("iss") not in GOOGLE_ISSUERS:
+            raise ValueError(f"Issuer inválido: {id_info.get('iss')}")
+        return id_info
+
+    def verify_id_token(self, token):
+        """Verifica um ID token do Google; levanta ValueError se inválido"""
+        certs = self.get_certs()
+        if self.needs_forced_refresh(token, certs):
+            certs = self.get_certs(force=True)
+        return self.decode_id_token(token, certs)
+
+    def token_request_data(self, code):
+        """Corpo do POST ao endpoint de token do Google"""
+        return {
+            "code": code,
+            "client_id": self.client_id,
+            "client_secret": self.client_secret,
+            "redirect_uri": self.redirect_uri,
+            "grant_type": "authorization_code"
+        }
+
+    def exchange_code(self, code):
+        """Troca o código de autorização pelos tokens do Google"""
+        with phase_timer("google_http") as timer:
+            response = self.session.post(
+                self.token_url,
+                data=self.token_request_data(code),
+                timeout=self.timeout
+            )
+        GOOGLE_HTTP_LATENCY.observe(timer.elapsed, endpoint="token")
+        return response.json()
+
+    def shutdown(self):
+        """Cancela a renovação agendada e fecha a sessão HTTP"""
+        if self._refresh_timer is not None:
+            self._refresh_timer.cancel()
+            self._refresh_timer = None
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+
+
+google_client = GoogleClient()
@@ -0,0 +1,157 @@
+from sqlalchemy import bindparam, or_, select, text
+from sqlalchemy.exc import IntegrityError
+
+from database import db, mark_written
+from models import User
+from auth.email_filter import email_filter, find_user_by_email, normalize_email
+
+
+class PasswordAccountExistsError(Exception):
+    """O email já pertence a uma conta com senha"""
+
+
+class GoogleAccountConflictError(Exception):
+    """O google_id (sub) já pertence a outra conta"""
+
+
+def _profile(id_info):
+    email = id_info["email"]
+    return {
+        "email": email,
+        "google_id": id_info["sub"],
+        "nome": id_info.get("name", email.split("@")[0]),
+        "picture": id_info.get("picture", "")
+    }
+
+
+def _unchanged(user, profile):
+    return (user.google_id, user.nome, user.picture) == (
+        profile["google_id"], profile["nome"], profile["picture"]
+    )
+
+
+# Statements por dialeto, compilados uma vez: o Insert específico de dialeto
+# (com ON CONFLICT) não entra no cache de compilação do SQLAlchemy
+_upsert_statements = {}
+
+
+def _upsert_statement():
+    """(INSERT ... DO NOTHING, INSERT ... DO UPDATE) do dialeto, ou None sem ON CONFLICT"""
+    dialect = db.session.get_bind().dialect
+    if dialect.name in _upsert_statements:
+        return _upsert_statements[dialect.name]
+    if dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect.name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        _upsert_statements[dialect.name] = None
+        return None
+
+    users = User.__table__
+    values = insert(users).values(
+        {name: bindparam(name) for name in ("nome", "email", "is_google_user", "google_id", "picture")}
+    )
+    excluded = values.excluded
+    # Só o conflito de email é absorvido: o de google_id vira IntegrityError
+    create = values.on_conflict_do_nothing(index_elements=[users.c.email])
+    upsert = values.on_conflict_do_update(
+        index_elements=[users.c.email],
+        set_={"google_id": excluded.google_id, "nome": excluded.nome, "picture": excluded.picture},
+        where=users.c.is_google_user & or_(
+            users.c.google_id.is_distinct_from(excluded.google_id),
+            users.c.nome.is_distinct_from(excluded.nome),
+            users.c.picture.is_distinct_from(excluded.picture)
+        )
+    )
+    statements = _upsert_statements[dialect.name] = tuple(
+        select(User).from_statement(text(
+            str(stmt.returning(*users.c).compile(dialect=type(dialect)(paramstyle="named")))
+        ).columns(*users.c))
+        for stmt in (create, upsert)
+    )
+    return statements
+
+
+def _upsert(stmt, profile):
+    """Executa um dos statements de _upsert_statement.
+
+    Retorna o usuário gravado, ou None se nada foi escrito (email já
+    existe, conta com senha, ou outra requisição já gravou o mesmo perfil).
+    """
+    return db.session.scalars(
+        stmt, dict(profile, is_google_user=True), execution_options={"populate_existing": True}
+    ).one_or_none()
+
+
+def _write_orm(user, profile):
+    # Bancos sem ON CONFLICT, ou a segunda tentativa depois de um conflito: escrita pela sessão
+    if user is None:
+        user = User(is_google_user=True, **profile)
+        db.session.add(user)
+    else:
+        user.email = profile["email"]
+        user.google_id = profile["google_id"]
+        user.nome = profile["nome"]
+        user.picture = profile["picture"]
+    db.session.flush()
+    return user
+
+
+def _written(user, profile):
+    email_filter.add(profile["email"])
+    mark_written(normalize_email(profile["email"]))
+    return user
+
+
+def _find_on_primary(**criteria):
+    return User.query.filter_by(**criteria).execution_options(populate_existing=True).one_or_none()
+
+
+def upsert_google_user(id_info):
+    """Cria ou atualiza o usuário de um login Google; retorna (user, is_new_user).
+
+    Uma leitura (nenhuma, se o filtro de emails descarta) e no máximo uma
+    escrita, que só acontece se o perfil mudou. Não faz commit: a gravação
+    vai junto com o refresh token em issue_tokens. Levanta
+    PasswordAccountExistsError se o email tem cadastro com senha e
+    GoogleAccountConflictError se o google_id está em outra conta.
+    """
+    profile = _profile(id_info)
+    user = find_user_by_email(profile["email"])
+    if user is not None:
+        if not user.is_google_user:
+            raise PasswordAccountExistsError(profile["email"])
+        if _unchanged(user, profile):
+            return user, False
+
+    # Sem usuário lido, só INSERT: a linha volta apenas se foi criada agora, então
+    # is_new_user vem da escrita e não da leitura (que pode vir da réplica atrasada)
+    statements = _upsert_statement()
+    try:
+        with db.session.begin_nested():
+            if statements is None:
+                written = _write_orm(user, profile)
+            else:
+                written = _upsert(statements[user is not None], profile)
+    except IntegrityError:
+        written = None
+    if written is not None:
+        return _written(written, profile), user is None
+
+    # Nada gravado: o email foi criado por outra requisição no meio do caminho,
+    # ou o google_id já é de outra linha (o email da conta Google mudou)
+    existing = _find_on_primary(email=profile["email"]) or _find_on_primary(google_id=profile["google_id"])
+    if existing is None:
+        raise GoogleAccountConflictError(profile["google_id"])
+    if not existing.is_google_user:
+        raise PasswordAccountExistsError(profile["email"])
+    if existing.email == profile["email"] and _unchanged(existing, profile):
+        return existing, False
+    try:
+        with db.session.begin_nested():
+            _write_orm(existing, profile)
+    except IntegrityError:
+        # Email de uma conta Google e google_id de outra
+        raise GoogleAccountConflictError(profile["google_id"])
+    return _written(existing, profile), False
@@ -0,0 +1,205 @@
+import logging
+import multiprocessing
+import os
+import statistics
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS, generate_password_hash, check_password_hash
+
+from metrics import Counter, Histogram, record_phase
+
+logger = logging.getLogger(__name__)
+
+HASH_QUEUE_WAIT = Histogram(
+    "password_hash_queue_wait_seconds",
+    "Tempo que o pedido de hash esperou na fila do pool",
+    labelnames=("operation",)
+)
+HASH_DURATION = Histogram(
+    "password_hash_duration_seconds",
+    "Tempo gasto calculando o hash da senha",
+    labelnames=("operation",)
+)
+
+PASSWORD_REHASHED = Counter(
+    "password_rehash_total",
+    "Hashes refeitos no login por usarem parâmetros antigos"
+)
+HASH_POOL_RESTARTS = Counter(
+    "password_hash_pool_restarts_total",
+    "Pools de hash recriados depois da morte de um processo"
+)
+
+DEFAULT_HASH_METHOD = "scrypt:32768:8:1"
+
+
+def pool_start_method():
+    # forkserver não existe no Windows: spawn também não herda as threads do processo
+    return "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+
+class HashingBusyError(Exception):
+    """Fila do pool de hash está cheia"""
+
+
+def normalize_method(method):
+    """Forma completa do método, igual ao prefixo que o werkzeug grava no hash.
+
+    "scrypt" -> "scrypt:32768:8:1", "pbkdf2" -> "pbkdf2:sha256:1000000"
+    """
+    name, *args = method.split(":")
+    if name == "scrypt":
+        n, r, p = map(int, args) if args else (2 ** 15, 8, 1)
+        return f"scrypt:{n}:{r}:{p}"
+    if name == "pbkdf2":
+        hash_name = args[0] if args else "sha256"
+        iterations = int(args[1]) if len(args) > 1 else DEFAULT_PBKDF2_ITERATIONS
+        return f"pbkdf2:{hash_name}:{iterations}"
+    raise ValueError(f"Método de hash inválido: {method}")
+
+
+def _hash_time(method, rounds=3):
+    timings = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        generate_password_hash("calibracao", method=method)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+
+def calibrate(algorithm="scrypt", target=0.25):
+    """Escolhe parâmetros cujo hash leva até `target` segundos nesta máquina.
+
+    scrypt: maior N (potência de 2, r=8, p=1, até 2^17 = 128 MB por hash)
+    dentro do alvo.
+    pbkdf2: iterações proporcionais ao tempo medido, em múltiplos de 10 mil.
+    Retorna (método, segundos medidos com ele).
+    """
+    if algorithm == "scrypt":
+        n = 2 ** 14
+        best = (f"scrypt:{n}:8:1", _hash_time(f"scrypt:{n}:8:1"))
+        while n < 2 ** 17:
+            n *= 2
+            method = f"scrypt:{n}:8:1"
+            elapsed = _hash_time(method)
+            if elapsed > target:
+                break
+            best = (method, elapsed)
+        return best
+    if algorithm == "pbkdf2":
+        sample = 100_000
+        per_iteration = _hash_time(f"pbkdf2:sha256:{sample}") / sample
+        iterations = max(int(target / per_iteration) // 10_000 * 10_000, 10_000)
+        method = f"pbkdf2:sha256:{iterations}"
+        return method, _hash_time(method)
+    raise ValueError(f"Algoritmo de hash inválido: {algorithm}")
+
+
+def _timed(func, *args):
+    """Executa no processo do pool e devolve os instantes de início e fim"""
+    started = time.monotonic()
+    result = func(*args)
+    return result, started, time.monotonic()
+
+
+class PasswordHasher:
+    """Executa hash/verificação de senha em um pool de processos limitado.
+
+    Com HASH_POOL_SIZE = 0 o hash roda na própria thread da requisição.
+    Novos hashes usam PASSWORD_HASH_METHOD (ver `flask auth calibrate-hash`).
+    """
+
+    def __init__(self, app=None):
+        self.method = DEFAULT_HASH_METHOD
+        self.pool_size = 0
+        self.queue_depth = 0
+        self._executor = None
+        self._slots = None
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.shutdown()
+        self.method = normalize_method(app.config.get("PASSWORD_HASH_METHOD") or DEFAULT_HASH_METHOD)
+        self.pool_size = app.config.get("HASH_POOL_SIZE", os.cpu_count() or 1)
+        self.queue_depth = app.config.get("HASH_QUEUE_DEPTH", 32)
+        self._slots = threading.BoundedSemaphore(self.pool_size + self.queue_depth)
+        app.extensions["password_hasher"] = self
+
+    def _get_executor(self):
+        # Processos são criados só no primeiro uso, depois de qualquer fork do
+        # servidor. forkserver: os filhos não nascem de um fork deste processo,
+        # que já tem threads (gthread, outbox, filtro, logs) e seus locks
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.pool_size, mp_context=multiprocessing.get_context(pool_start_method())
+                    )
+        return self._executor
+
+    def _discard_executor(self, executor):
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False)
+
+    def _submit(self, func, *args):
+        executor = self._get_executor()
+        try:
+            return executor.submit(_timed, func, *args).result()
+        except BrokenProcessPool:
+            # Um processo do pool morreu (ex.: OOM no scrypt) e o executor não
+            # volta a funcionar: recria e tenta de novo uma vez
+            logger.warning("Pool de hash quebrado, recriando", extra={"event": "hash_pool_broken"})
+            HASH_POOL_RESTARTS.inc()
+            self._discard_executor(executor)
+            return self._get_executor().submit(_timed, func, *args).result()
+
+    def _run(self, operation, func, *args):
+        if not self.pool_size:
+            started = time.monotonic()
+            result = func(*args)
+            elapsed = time.monotonic() - started
+            HASH_QUEUE_WAIT.observe(0.0, operation=operation)
+            HASH_DURATION.observe(elapsed, operation=operation)
+            record_phase("hash", elapsed)
+            return result
+
+        if not self._slots.acquire(blocking=False):
+            raise HashingBusyError("Fila de hash de senha cheia")
+        try:
+            submitted = time.monotonic()
+            result, started, finished = self._submit(func, *args)
+        finally:
+            self._slots.release()
+
+        HASH_QUEUE_WAIT.observe(max(started - submitted, 0.0), operation=operation)
+        HASH_DURATION.observe(finished - started, operation=operation)
+        record_phase("hash", time.monotonic() - submitted)
+        return result
+
+    def hash(self, senha):
+        """Gera o hash da senha"""
+        return self._run("hash", generate_password_hash, senha, self.method)
+
+    def verify(self, senha_hash, senha):
+        """Confere a senha contra o hash armazenado"""
+        return self._run("verify", check_password_hash, senha_hash, senha)
+
+    def needs_rehash(self, senha_hash):
+        """True se o hash foi gerado com outro método ou parâmetros"""
+        return senha_hash.split("$", 1)[0] != self.method
+
+    def shutdown(self, wait=True):
+        """Encerra o pool de processos"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+
+
+password_hasher = PasswordHasher()
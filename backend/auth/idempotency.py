@@ -0,0 +1,234 @@
+import functools
+import hashlib
+import json
+import re
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+from flask import current_app, jsonify, request
+
+from auth.schemas import Erro
+from metrics import Counter
+
+
+IDEMPOTENT_REQUESTS = Counter(
+    "auth_idempotent_requests_total",
+    "Requisições com Idempotency-Key, por resultado",
+    labelnames=("result",)
+)
+
+_VALID_KEY = re.compile(r"^[A-Za-z0-9._:-]{8,128}$")
+
+# Resultados de begin()
+OWNER, PENDING, DONE = "owner", "pending", "done"
+
+
+def _pack(fingerprint, status, body, content_type):
+    return zlib.compress(json.dumps(
+        [fingerprint, status, content_type, body.decode("utf-8")], separators=(",", ":")
+    ).encode())
+
+
+def _unpack(packed):
+    fingerprint, status, content_type, body = json.loads(zlib.decompress(packed))
+    return fingerprint, status, body.encode("utf-8"), content_type
+
+
+class MemoryStorage:
+    """Respostas por chave em memória, LRU limitado a `maxsize` chaves.
+
+    Cada worker tem a sua: duplicatas que caem em outro worker só são
+    vistas com o Redis.
+    """
+
+    def __init__(self, maxsize=100_000):
+        self.maxsize = maxsize
+        # chave -> [packed ou None (em andamento), expira em, Event]
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def begin(self, key, lock_ttl):
+        """Reserva a chave; retorna (OWNER, None), (PENDING, None) ou (DONE, packed)"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[1] > now:
+                return (PENDING, None) if entry[0] is None else (DONE, entry[0])
+            if entry is not None:
+                entry[2].set()
+            self._data[key] = [None, now + lock_ttl, threading.Event()]
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                _, evicted = self._data.popitem(last=False)
+                evicted[2].set()
+        return OWNER, None
+
+    def wait(self, key, timeout):
+        """Espera a requisição em andamento; retorna packed ou None"""
+        with self._lock:
+            entry = self._data.get(key)
+        if entry is None:
+            return None
+        entry[2].wait(timeout)
+        return entry[0]
+
+    def complete(self, key, packed, ttl):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                entry = self._data[key] = [None, 0, threading.Event()]
+            entry[0] = packed
+            entry[1] = time.monotonic() + ttl
+        entry[2].set()
+
+    def release(self, key):
+        with self._lock:
+            entry = self._data.pop(key, None)
+        if entry is not None:
+            entry[2].set()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class RedisStorage:
+    """Respostas compartilhadas entre workers em um Redis (limite via maxmemory)"""
+
+    _PENDING = b"pending"
+
+    def __init__(self, client, prefix="idempotency:", poll_interval=0.05):
+        self.client = client
+        self.prefix = prefix
+        self.poll_interval = poll_interval
+
+    @classmethod
+    def from_url(cls, url):
+        import redis
+
+        return cls(redis.Redis.from_url(url))
+
+    def begin(self, key, lock_ttl):
+        key = self.prefix + key
+        if self.client.set(key, self._PENDING, nx=True, px=int(lock_ttl * 1000)):
+            return OWNER, None
+        value = self.client.get(key)
+        if value is None:
+            return self.begin(key[len(self.prefix):], lock_ttl)
+        return (PENDING, None) if value == self._PENDING else (DONE, value)
+
+    def wait(self, key, timeout):
+        key = self.prefix + key
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            value = self.client.get(key)
+            if value is None:
+                return None
+            if value != self._PENDING:
+                return value
+            time.sleep(self.poll_interval)
+        return None
+
+    def complete(self, key, packed, ttl):
+        self.client.set(self.prefix + key, packed, px=int(ttl * 1000))
+
+    def release(self, key):
+        self.client.delete(self.prefix + key)
+
+
+class Idempotency:
+    """Repete a resposta guardada para requisições com a mesma Idempotency-Key.
+
+    A chave vale por endpoint durante IDEMPOTENCY_TTL segundos. Mesma chave
+    com outro corpo é recusada (422). Uma duplicata que chega enquanto a
+    primeira ainda roda espera por ela (até IDEMPOTENCY_WAIT_TIMEOUT) em vez
+    de repetir o trabalho. Erros 5xx e 429/503 não são guardados: o cliente
+    pode tentar de novo com a mesma chave.
+    """
+
+    def __init__(self, app=None):
+        self.enabled = False
+        self.storage = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        config = app.config
+        self.enabled = config.get("IDEMPOTENCY_ENABLED", True)
+        self.ttl = config.get("IDEMPOTENCY_TTL", 86400)
+        self.lock_ttl = config.get("IDEMPOTENCY_LOCK_TTL", 30)
+        self.wait_timeout = config.get("IDEMPOTENCY_WAIT_TIMEOUT", 10)
+        url = config.get("IDEMPOTENCY_STORAGE_URL", "memory://")
+        if url.startswith("memory://"):
+            self.storage = MemoryStorage(config.get("IDEMPOTENCY_MAX_KEYS", 100_000))
+        else:
+            self.storage = RedisStorage.from_url(url)
+        app.extensions["idempotency"] = self
+
+    @staticmethod
+    def _fingerprint():
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(f"{request.method} {request.path}\n".encode())
+        digest.update(request.get_data())
+        return digest.hexdigest()
+
+    def _replay(self, packed, fingerprint, result):
+        stored_fingerprint, status, body, content_type = _unpack(packed)
+        if stored_fingerprint != fingerprint:
+            IDEMPOTENT_REQUESTS.inc(result="mismatch")
+            return jsonify(Erro(error="Idempotency-Key já usada com outra requisição")), 422
+        IDEMPOTENT_REQUESTS.inc(result=result)
+        response = current_app.response_class(body, status=status, content_type=content_type)
+        response.headers["Idempotent-Replayed"] = "true"
+        return response
+
+    def handle(self, key, view):
+        key = f"{request.endpoint}:{key}"
+        fingerprint = self._fingerprint()
+        deadline = time.monotonic() + self.wait_timeout
+        while True:
+            state, packed = self.storage.begin(key, self.lock_ttl)
+            if state == OWNER:
+                break
+            if state == DONE:
+                return self._replay(packed, fingerprint, "replayed")
+            remaining = deadline - time.monotonic()
+            packed = self.storage.wait(key, remaining) if remaining > 0 else None
+            if packed is not None:
+                return self._replay(packed, fingerprint, "waited")
+            if time.monotonic() >= deadline:
+                IDEMPOTENT_REQUESTS.inc(result="in_progress")
+                return jsonify(Erro(error="Requisição com esta Idempotency-Key ainda em andamento")), 409, {"Retry-After": "1"}
+            # A primeira falhou sem guardar resposta: esta assume
+
+        try:
+            response = current_app.make_response(view())
+        except BaseException:
+            self.storage.release(key)
+            raise
+        status = response.status_code
+        if status < 500 and status != 429 and not response.is_streamed:
+            self.storage.complete(
+                key, _pack(fingerprint, status, response.get_data(), response.content_type), self.ttl
+            )
+            IDEMPOTENT_REQUESTS.inc(result="stored")
+        else:
+            self.storage.release(key)
+        return response
+
+
+idempotency = Idempotency()
+
+
+def idempotent(view):
+    """Aplica a Idempotency-Key (opcional) da requisição à view"""
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        key = request.headers.get("Idempotency-Key")
+        if not key or not idempotency.enabled:
+            return view(*args, **kwargs)
+        if not _VALID_KEY.match(key):
+            return jsonify(Erro(error="Idempotency-Key inválida (8 a 128 caracteres: letras, números, . _ : -)")), 400
+        return idempotency.handle(key, lambda: view(*args, **kwargs))
+    return wrapper
@@ -0,0 +1,115 @@
+import csv
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice, repeat
+
+from sqlalchemy import insert, select
+from werkzeug.security import generate_password_hash
+
+from database import db
+from models import User
+from auth.email_filter import email_filter
+from auth.hashing import password_hasher
+
+# Prefixos de hash que o werkzeug (check_password_hash) sabe conferir
+SUPPORTED_HASH_PREFIXES = ("scrypt:", "pbkdf2:")
+
+
+def read_rows(path, file_format=None):
+    """Lê CSV ou JSONL linha a linha, sem carregar o arquivo inteiro"""
+    file_format = file_format or ("jsonl" if path.endswith((".jsonl", ".ndjson")) else "csv")
+    with open(path, newline="", encoding="utf-8") as f:
+        if file_format == "csv":
+            yield from csv.DictReader(f)
+        else:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def _batches(rows, size):
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, size))
+        if not batch:
+            return
+        yield batch
+
+
+class ImportStats:
+    """Contadores da importação, atualizados a cada lote"""
+
+    def __init__(self):
+        self.read = 0
+        self.inserted = 0
+        self.duplicates = 0
+        self.invalid = 0
+        self.started = time.perf_counter()
+
+    @property
+    def rows_per_second(self):
+        elapsed = time.perf_counter() - self.started
+        return self.read / elapsed if elapsed else 0.0
+
+
+def import_users(rows, batch_size=1000, workers=None, prehashed=False, progress=None):
+    """Importa usuários em lotes (requer app context).
+
+    Cada lote é deduplicado em memória e contra o banco com uma única
+    consulta IN; as senhas restantes são hasheadas em paralelo e o lote
+    é gravado com um INSERT em massa.
+    """
+    stats = ImportStats()
+    executor = None if prehashed else ProcessPoolExecutor(max_workers=workers or os.cpu_count())
+    try:
+        for batch in _batches(rows, batch_size):
+            stats.read += len(batch)
+
+            candidates = {}
+            for row in batch:
+                email = (row.get("email") or "").strip()
+                nome = (row.get("nome") or "").strip()
+                secret = row.get("senha_hash") if prehashed else row.get("senha")
+                if not email or not nome or not secret:
+                    stats.invalid += 1
+                elif prehashed and not secret.startswith(SUPPORTED_HASH_PREFIXES):
+                    stats.invalid += 1
+                elif email in candidates:
+                    stats.duplicates += 1
+                else:
+                    candidates[email] = (nome, secret)
+
+            existing = set(db.session.scalars(
+                select(User.email).where(User.email.in_(list(candidates)))
+            )) if candidates else set()
+            stats.duplicates += len(existing)
+            new_users = [(email, nome, secret) for email, (nome, secret) in candidates.items()
+                         if email not in existing]
+
+            if new_users:
+                secrets = [secret for _, _, secret in new_users]
+                if not prehashed:
+                    chunksize = max(len(secrets) // ((workers or os.cpu_count() or 1) * 4), 1)
+                    secrets = list(executor.map(
+                        generate_password_hash, secrets, repeat(password_hasher.method), chunksize=chunksize
+                    ))
+
+                db.session.execute(insert(User), [
+                    {"nome": nome, "email": email, "senha_hash": senha_hash, "is_google_user": False}
+                    for (email, nome, _), senha_hash in zip(new_users, secrets)
+                ])
+                db.session.commit()
+                stats.inserted += len(new_users)
+                for email, _, _ in new_users:
+                    email_filter.add(email)
+            else:
+                db.session.rollback()
+
+            if progress:
+                progress(stats)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    return stats
@@ -0,0 +1,154 @@
+import hashlib
+import json
+import os
+import secrets
+from datetime import datetime, timezone
+
+from flask import current_app
+from jwt import InvalidTokenError
+from jwt.algorithms import OKPAlgorithm, RSAAlgorithm
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ed25519, rsa
+
+# Algoritmo JWT de cada tipo de chave aceita em JWT_KEYS_DIR
+KEY_ALGORITHMS = {rsa.RSAPrivateKey: "RS256", ed25519.Ed25519PrivateKey: "EdDSA"}
+_JWK_ENCODERS = {"RS256": RSAAlgorithm, "EdDSA": OKPAlgorithm}
+
+
+def _algorithm(private_key):
+    for key_type, algorithm in KEY_ALGORITHMS.items():
+        if isinstance(private_key, key_type):
+            return algorithm
+    raise ValueError(f"Tipo de chave não suportado: {type(private_key).__name__}")
+
+
+def generate_key(directory, algorithm="RS256"):
+    """Gera uma chave privada em `directory`/<kid>.pem e retorna o kid.
+
+    O kid começa pela data, então a chave mais nova é a última em ordem
+    alfabética.
+    """
+    if algorithm == "RS256":
+        private_key = rsa.generate_private_key(public_exponent=65537, key_size=3072)
+    elif algorithm == "EdDSA":
+        private_key = ed25519.Ed25519PrivateKey.generate()
+    else:
+        raise ValueError(f"Algoritmo não suportado: {algorithm}")
+
+    kid = f"{datetime.now(timezone.utc):%Y%m%d%H%M%S%f}-{secrets.token_hex(4)}"
+    pem = private_key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption()
+    )
+    os.makedirs(directory, exist_ok=True)
+    fd = os.open(os.path.join(directory, f"{kid}.pem"), os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, "wb") as f:
+        f.write(pem)
+    return kid
+
+
+def load_keys(directory):
+    """Lê as chaves privadas (<kid>.pem) do diretório: {kid: chave}"""
+    keys = {}
+    for name in sorted(os.listdir(directory)):
+        if not name.endswith(".pem"):
+            continue
+        with open(os.path.join(directory, name), "rb") as f:
+            keys[name[:-len(".pem")]] = serialization.load_pem_private_key(f.read(), password=None)
+    return keys
+
+
+class SigningKeys:
+    """Chaves de assinatura dos JWT de um app.
+
+    Sem chaves, tokens são HS256 com JWT_SECRET_KEY, como antes. Com
+    chaves, a ativa assina (com o kid no header) e todas continuam
+    verificando: para rotacionar, gere uma chave nova e remova a antiga
+    depois que os tokens assinados por ela expirarem.
+    """
+
+    def __init__(self, private_keys=None, active_kid=None, secret=None, accept_hs256=False):
+        private_keys = private_keys or {}
+        if private_keys and active_kid is None:
+            active_kid = max(private_keys)
+        if private_keys and active_kid not in private_keys:
+            raise RuntimeError(f"JWT_ACTIVE_KID '{active_kid}' não está em JWT_KEYS_DIR")
+
+        self.active_kid = active_kid if private_keys else None
+        self.secret = secret
+        self.accept_hs256 = accept_hs256 or not private_keys
+        self._private = private_keys
+        self._public = {kid: key.public_key() for kid, key in private_keys.items()}
+        self._algorithms = {kid: _algorithm(key) for kid, key in private_keys.items()}
+        self.jwks = self._build_jwks()
+
+    @classmethod
+    def from_config(cls, config):
+        directory = config.get("JWT_KEYS_DIR")
+        private_keys = load_keys(directory) if directory else {}
+        if directory and not private_keys:
+            raise RuntimeError(f"Nenhuma chave .pem em JWT_KEYS_DIR ({directory}); rode `flask auth generate-jwt-key`")
+        return cls(
+            private_keys,
+            active_kid=config.get("JWT_ACTIVE_KID"),
+            secret=config.get("JWT_SECRET_KEY"),
+            accept_hs256=config.get("JWT_ACCEPT_HS256", False) and bool(config.get("JWT_SECRET_KEY"))
+        )
+
+    @property
+    def algorithm(self):
+        return self._algorithms[self.active_kid] if self.active_kid else "HS256"
+
+    @property
+    def decode_algorithms(self):
+        algorithms = sorted(set(self._algorithms.values()))
+        if self.accept_hs256:
+            algorithms.append("HS256")
+        return algorithms
+
+    def encode_key(self):
+        return self._private[self.active_kid] if self.active_kid else self.secret
+
+    def headers(self):
+        return {"kid": self.active_kid} if self.active_kid else {}
+
+    def decode_key(self, jwt_header):
+        """Chave de verificação pelo kid/alg do header (ainda não verificado)"""
+        kid = jwt_header.get("kid")
+        if kid is None and jwt_header.get("alg") == "HS256" and self.accept_hs256:
+            return self.secret
+        if kid not in self._public or jwt_header.get("alg") != self._algorithms[kid]:
+            raise InvalidTokenError("Chave de assinatura desconhecida")
+        return self._public[kid]
+
+    def _build_jwks(self):
+        # Serializado uma vez: as chaves só mudam com o restart dos workers
+        keys = []
+        for kid, public_key in self._public.items():
+            algorithm = self._algorithms[kid]
+            jwk = _JWK_ENCODERS[algorithm].to_jwk(public_key, as_dict=True)
+            jwk.update(kid=kid, alg=algorithm, use="sig")
+            keys.append(jwk)
+        body = json.dumps({"keys": keys}, separators=(",", ":")).encode()
+        return body, hashlib.blake2b(body, digest_size=12).hexdigest()
+
+
+def load_signing_keys(app):
+    """Carrega as chaves do config e ajusta os algoritmos do Flask-JWT-Extended"""
+    keys = SigningKeys.from_config(app.config)
+    app.extensions["jwt_keys"] = keys
+    app.config["JWT_ALGORITHM"] = keys.algorithm
+    app.config["JWT_DECODE_ALGORITHMS"] = keys.decode_algorithms
+    return keys
+
+
+def current_keys():
+    return current_app.extensions["jwt_keys"]
+
+
+def init_jwt_keys(jwt, app):
+    load_signing_keys(app)
+    jwt.encode_key_loader(lambda identity: current_keys().encode_key())
+    jwt.additional_headers_loader(lambda identity: current_keys().headers())
+    jwt.decode_key_loader(lambda jwt_header, jwt_payload: current_keys().decode_key(jwt_header))
@@ -0,0 +1,237 @@
+import logging
+import os
+import secrets
+import threading
+import time
+from datetime import datetime, timedelta
+
+from database import db
+from metrics import Counter, Histogram, phase_timer
+from models import EmailOutbox
+
+logger = logging.getLogger(__name__)
+
+
+SMTP_SEND_LATENCY = Histogram(
+    "smtp_send_duration_seconds",
+    "Tempo de envio de cada email (inclui conexão quando aberta)"
+)
+OUTBOX_SENT = Counter(
+    "outbox_emails_total",
+    "Emails processados pela outbox",
+    labelnames=("result",)
+)
+
+
+def enqueue_email(recipient, subject, html_body):
+    """Adiciona o email à sessão atual; é gravado no próximo commit"""
+    message = EmailOutbox(recipient=recipient, subject=subject, html_body=html_body)
+    db.session.add(message)
+    return message
+
+
+class OutboxSender:
+    """Envia em segundo plano os emails pendentes da tabela email_outbox.
+
+    Usa uma conexão SMTP persistente, envia em lotes e reagenda falhas
+    com backoff exponencial até OUTBOX_MAX_ATTEMPTS.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self._smtp = None
+        self._smtp_used_at = 0.0
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.shutdown()
+        self.app = app
+        config = app.config
+        self.enabled = config.get("OUTBOX_SENDER_ENABLED", True)
+        self.batch_size = config.get("OUTBOX_BATCH_SIZE", 50)
+        self.poll_interval = config.get("OUTBOX_POLL_INTERVAL", 5.0)
+        self.max_attempts = config.get("OUTBOX_MAX_ATTEMPTS", 8)
+        self.backoff_base = config.get("OUTBOX_BACKOFF_BASE", 10.0)
+        self.backoff_max = config.get("OUTBOX_BACKOFF_MAX", 3600.0)
+        self.lease_seconds = config.get("OUTBOX_LEASE_SECONDS", 120)
+        self.smtp_idle_timeout = config.get("OUTBOX_SMTP_IDLE_TIMEOUT", 60.0)
+        app.extensions["outbox_sender"] = self
+
+    # Thread de envio
+
+    def start(self):
+        """Inicia a thread de envio (de novo, se o processo foi clonado por fork)"""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+                return
+            self._stopping.clear()
+            self._smtp = None
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name="outbox-sender", daemon=True)
+            self._thread.start()
+
+    def notify(self):
+        """Acorda a thread de envio logo após um commit com emails novos"""
+        if not self.enabled:
+            return
+        self.start()
+        self._wakeup.set()
+
+    def _run(self):
+        while not self._stopping.is_set():
+            sent = 0
+            try:
+                with self.app.app_context():
+                    sent = self.send_pending()
+            except Exception:
+                # A sessão já foi descartada ao sair do app context
+                logger.exception("Erro no envio da outbox", extra={"event": "outbox_error"})
+
+            if sent:
+                continue
+            if time.monotonic() - self._smtp_used_at > self.smtp_idle_timeout:
+                self._close_smtp()
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
+        self._close_smtp()
+
+    def shutdown(self, timeout=10):
+        """Para a thread depois de terminar o lote atual"""
+        self._stopping.set()
+        self._wakeup.set()
+        if self._thread is not None and self._pid == os.getpid():
+            self._thread.join(timeout)
+        self._thread = None
+        self._close_smtp()
+
+    # Lotes
+
+    def _claim_batch(self):
+        now = datetime.utcnow()
+        ids = [
+            row.id for row in db.session.query(EmailOutbox.id)
+            .filter(
+                EmailOutbox.status == "pending",
+                EmailOutbox.next_attempt_at <= now,
+                db.or_(EmailOutbox.locked_until.is_(None), EmailOutbox.locked_until < now)
+            )
+            .order_by(EmailOutbox.next_attempt_at)
+            .limit(self.batch_size)
+        ]
+        if not ids:
+            db.session.rollback()
+            return []
+
+        # Reserva condicional: outro processo pode ter pego as mesmas linhas
+        claim_token = secrets.token_hex(16)
+        db.session.query(EmailOutbox).filter(
+            EmailOutbox.id.in_(ids),
+            EmailOutbox.status == "pending",
+            db.or_(EmailOutbox.locked_until.is_(None), EmailOutbox.locked_until < now)
+        ).update({
+            "claim_token": claim_token,
+            "locked_until": now + timedelta(seconds=self.lease_seconds)
+        }, synchronize_session=False)
+        db.session.commit()
+
+        return EmailOutbox.query.filter_by(claim_token=claim_token).all()
+
+    def send_pending(self):
+        """Envia um lote de emails pendentes; retorna quantos foram processados"""
+        batch = self._claim_batch()
+        for message in batch:
+            try:
+                self._send(message)
+                message.status = "sent"
+                message.sent_at = datetime.utcnow()
+                # O corpo leva o link com o token de recuperação em claro:
+                # não fica no banco depois de enviado (nem se for descartado)
+                message.html_body = ""
+                message.last_error = None
+                OUTBOX_SENT.inc(result="sent")
+            except Exception as e:
+                self._close_smtp()
+                message.attempts += 1
+                message.last_error = str(e)
+                OUTBOX_SENT.inc(result="error")
+                if message.attempts >= self.max_attempts:
+                    message.status = "failed"
+                    message.html_body = ""
+                    logger.error("Email descartado após %s tentativas: %s", message.attempts, e, extra={
+                        "event": "outbox_email_failed", "email_id": message.id
+                    })
+                else:
+                    delay = min(self.backoff_base * 2 ** (message.attempts - 1), self.backoff_max)
+                    message.next_attempt_at = datetime.utcnow() + timedelta(seconds=delay)
+            message.claim_token = None
+            message.locked_until = None
+        if batch:
+            db.session.commit()
+        return len(batch)
+
+    def drain(self):
+        """Envia tudo que estiver pronto agora (útil em testes e na CLI)"""
+        total = 0
+        while True:
+            sent = self.send_pending()
+            if not sent:
+                return total
+            total += sent
+
+    # SMTP
+
+    def _connection(self):
+        if self._smtp is not None:
+            return self._smtp
+        import smtplib
+
+        config = self.app.config
+        smtp = smtplib.SMTP(
+            config["MAIL_SERVER"],
+            config["MAIL_PORT"],
+            timeout=config.get("OUTBOX_SMTP_TIMEOUT", 10)
+        )
+        if config.get("MAIL_USE_TLS"):
+            smtp.starttls()
+        if config.get("MAIL_USERNAME"):
+            smtp.login(config["MAIL_USERNAME"], config["MAIL_PASSWORD"])
+        self._smtp = smtp
+        return smtp
+
+    def _close_smtp(self):
+        if self._smtp is None:
+            return
+        try:
+            self._smtp.quit()
+        except Exception:
+            pass
+        self._smtp = None
+
+    def _send(self, message):
+        import smtplib
+        from email.message import EmailMessage
+
+        email = EmailMessage()
+        email["From"] = self.app.config["MAIL_DEFAULT_SENDER"]
+        email["To"] = message.recipient
+        email["Subject"] = message.subject
+        email.set_content(message.html_body, subtype="html")
+
+        with phase_timer("smtp") as timer:
+            try:
+                self._connection().send_message(email)
+            except smtplib.SMTPServerDisconnected:
+                # Servidor fechou a conexão ociosa: reconecta uma vez
+                self._smtp = None
+                self._connection().send_message(email)
+        SMTP_SEND_LATENCY.observe(timer.elapsed)
+        self._smtp_used_at = time.monotonic()
+
+
+outbox_sender = OutboxSender()
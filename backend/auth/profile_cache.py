@@ -0,0 +1,40 @@
+import hashlib
+import json
+
+from cache import LRUCache
+from database import db
+from models import User
+
+# user_id -> (to_dict(), etag); cada worker tem o seu, o TTL limita o atraso entre eles
+profile_cache = LRUCache()
+
+
+def init_profile_cache(app):
+    profile_cache.maxsize = app.config.get("PROFILE_CACHE_SIZE", 10_000)
+    profile_cache.ttl = app.config.get("PROFILE_CACHE_TTL", 30)
+    profile_cache.clear()
+
+
+def profile_etag(profile):
+    """ETag pelo conteúdo: o mesmo em todos os workers e depois de expirar o cache"""
+    payload = json.dumps(profile, sort_keys=True, separators=(",", ":")).encode()
+    return hashlib.blake2b(payload, digest_size=12).hexdigest()
+
+
+def get_profile(user_id):
+    """Retorna (to_dict(), etag) do usuário, do cache ou do banco; None se não existe"""
+    cached = profile_cache.get(user_id)
+    if cached is not None:
+        return cached
+    user = db.session.get(User, user_id)
+    if user is None:
+        return None
+    profile = user.to_dict()
+    cached = (profile, profile_etag(profile))
+    profile_cache.set(user_id, cached)
+    return cached
+
+
+def invalidate_profile(user_id):
+    """Descarta o perfil em cache; chamar depois do commit que alterou o usuário"""
+    profile_cache.pop(user_id)
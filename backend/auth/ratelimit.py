@@ -0,0 +1,152 @@
+import math
+import threading
+import time
+
+from flask import jsonify, request
+
+from auth.email_filter import normalize_email
+from auth.schemas import MUITAS_TENTATIVAS
+from metrics import Counter
+
+
+RATE_LIMITED = Counter(
+    "auth_rate_limited_total",
+    "Requisições recusadas pelo limitador",
+    labelnames=("scope",)
+)
+
+
+def parse_limit(spec):
+    """"5/60" -> (5, 60.0): no máximo 5 requisições a cada 60 segundos"""
+    limit, window = spec.split("/")
+    return int(limit), float(window)
+
+
+def _weighted_count(current, previous, window, now):
+    # Janela deslizante aproximada: a janela anterior pesa o quanto ainda se sobrepõe
+    elapsed = now % window
+    return current + previous * (window - elapsed) / window
+
+
+class MemoryStorage:
+    """Contadores por chave em memória: [índice da janela, atual, anterior, janela]"""
+
+    def __init__(self, eviction_interval=60.0):
+        self._data = {}
+        self._lock = threading.Lock()
+        self._eviction_interval = eviction_interval
+        self._next_eviction = time.monotonic() + eviction_interval
+
+    def hit(self, key, window, now):
+        """Conta a requisição; retorna o total ponderado já incluindo esta"""
+        index = int(now // window)
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] < index - 1:
+                entry = [index, 0, 0, window]
+            elif entry[0] == index - 1:
+                entry = [index, 0, entry[1], window]
+            entry[1] += 1
+            self._data[key] = entry
+            if time.monotonic() >= self._next_eviction:
+                self._evict(now)
+        return _weighted_count(entry[1], entry[2], window, now)
+
+    def _evict(self, now):
+        # Chaves cuja janela atual já passou há mais de uma janela não contam mais
+        self._next_eviction = time.monotonic() + self._eviction_interval
+        stale = [
+            key for key, (index, _, _, window) in self._data.items()
+            if index < int(now // window) - 1
+        ]
+        for key in stale:
+            del self._data[key]
+
+    def __len__(self):
+        return len(self._data)
+
+
+class RedisStorage:
+    """Contadores compartilhados entre workers em um Redis"""
+
+    def __init__(self, client, prefix="ratelimit:"):
+        self.client = client
+        self.prefix = prefix
+
+    @classmethod
+    def from_url(cls, url):
+        import redis
+
+        return cls(redis.Redis.from_url(url))
+
+    def hit(self, key, window, now):
+        index = int(now // window)
+        current_key = f"{self.prefix}{key}:{index}"
+        pipe = self.client.pipeline()
+        pipe.incr(current_key)
+        pipe.expire(current_key, int(math.ceil(window * 2)))
+        pipe.get(f"{self.prefix}{key}:{index - 1}")
+        current, _, previous = pipe.execute()
+        return _weighted_count(int(current), int(previous or 0), window, now)
+
+
+class RateLimiter:
+    """Limita requisições por IP e por email normalizado.
+
+    As regras vêm da configuração (RATELIMIT_<REGRA>_IP / _EMAIL, no
+    formato "limite/segundos"). O armazenamento é em memória por padrão
+    ou compartilhado via RATELIMIT_STORAGE_URL="redis://...".
+    """
+
+    def __init__(self, app=None):
+        self.enabled = False
+        self.storage = None
+        self.rules = {}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        config = app.config
+        self.enabled = config.get("RATELIMIT_ENABLED", True)
+        url = config.get("RATELIMIT_STORAGE_URL", "memory://")
+        if url.startswith("memory://"):
+            self.storage = MemoryStorage()
+        else:
+            self.storage = RedisStorage.from_url(url)
+        self.rules = {}
+        for name in ("login", "reset"):
+            for scope in ("ip", "email"):
+                spec = config.get(f"RATELIMIT_{name.upper()}_{scope.upper()}")
+                if spec:
+                    self.rules[(name, scope)] = parse_limit(spec)
+        app.extensions["rate_limiter"] = self
+
+    def check(self, rule, email=None):
+        """Conta a requisição; retorna segundos para tentar de novo se passou do limite"""
+        if not self.enabled:
+            return None
+        now = time.time()
+        retry_after = None
+        identities = {"ip": request.remote_addr or "-"}
+        if email:
+            identities["email"] = normalize_email(email)
+
+        for scope, identity in identities.items():
+            limit_window = self.rules.get((rule, scope))
+            if limit_window is None:
+                continue
+            limit, window = limit_window
+            count = self.storage.hit(f"{rule}:{scope}:{identity}:{window:g}", window, now)
+            if count > limit:
+                RATE_LIMITED.inc(scope=f"{rule}:{scope}")
+                wait = window - now % window
+                retry_after = max(retry_after or 0, wait)
+        return retry_after
+
+
+def too_many_requests(retry_after):
+    """Resposta 429 padrão do auth_bp"""
+    return jsonify(MUITAS_TENTATIVAS), 429, {"Retry-After": str(int(math.ceil(retry_after)))}
+
+
+rate_limiter = RateLimiter()
@@ -1,114 +1,200 @@
+import logging
+
 from flask import Blueprint, request, jsonify, redirect, url_for, current_app
-from flask_jwt_extended import create_access_token
-from datetime import datetime, timedelta
-from google.oauth2 import id_token
-from google.auth.transport import requests as google_requests
-import requests as http_requests
+from flask_jwt_extended import jwt_required, get_jwt, get_jwt_identity
+from datetime import datetime
+from urllib.parse import urlencode
+from sqlalchemy.exc import IntegrityError
 
-from models import User
+from models import User, ResetToken
 from database import db
-from auth.utils import generate_reset_token, send_reset_email
+from auth.utils import generate_reset_token, hash_reset_token, queue_reset_email
+from auth.hashing import HashingBusyError, PASSWORD_REHASHED
+from auth.breached import BREACHED_PASSWORDS_REJECTED, breached_passwords
+from auth.google_client import google_client
+from auth.google_async import PREFETCH_ENVIRON_KEY
+from auth.google_users import GoogleAccountConflictError, PasswordAccountExistsError, upsert_google_user
+from auth.outbox import outbox_sender
+from auth.email_filter import find_user_by_email
+from auth.ratelimit import rate_limiter, too_many_requests
+from auth.profile_cache import get_profile, invalidate_profile
+from auth.keys import current_keys
+from auth.idempotency import idempotent
+from auth.schemas import (
+    SENHA_VAZADA, SERVIDOR_OCUPADO, CadastroIn, EsqueceuSenhaIn, GoogleLoginIn, LoginIn, RecuperarSenhaIn,
+    Cadastro, Erro, GoogleLogin, Login, Mensagem, Perfil, Tokens, Usuario, json_body
+)
+from auth.tokens import issue_tokens, rotate_refresh_token, revoke_access_token, revoke_family
 from config import Config
 
 auth_bp = Blueprint("auth", __name__)
+logger = logging.getLogger(__name__)
+
+# Mesma resposta exista ou não o email (não revela contas)
+_RESPOSTA_GENERICA = Mensagem(message="Se o email existir, você receberá o link de recuperação")
 
 @auth_bp.route("/cadastrar", methods=["POST"])
-def cadastro():
+@idempotent
+@json_body(CadastroIn)
+def cadastro(data):
     try:
-        data = request.get_json()
-        
-        # Validação 1: Campos obrigatórios
-        if not data or not data.get("nome") or not data.get("email") or not data.get("senha"):
-            return jsonify({
-                "success": False,
-                "error": "Nome, email e senha são obrigatórios"
-            }), 400
-        
+        # Validação 1 (campos obrigatórios): feita pelo schema em json_body
         # Validação 2: Senhas conferem
-        if data.get("senha") != data.get("confirmar_senha"):
-            return jsonify({
-                "success": False,
-                "error": "As senhas não conferem"
-            }), 400
+        if data.senha != data.confirmar_senha:
+            return jsonify(Erro(error="As senhas não conferem")), 400
+        
+        # Validação 3: Senha não aparece em vazamentos conhecidos
+        if data.senha in breached_passwords:
+            BREACHED_PASSWORDS_REJECTED.inc()
+            return jsonify(SENHA_VAZADA), 400
         
-        # Validação 3: Email já existe
-        if User.query.filter_by(email=data["email"]).first():
-            return jsonify({
-                "success": False,
-                "error": "Email já cadastrado"
-            }), 409
+        # Validação 4: Email já existe
+        if find_user_by_email(data.email):
+            return jsonify(Erro(error="Email já cadastrado")), 409
         
         
         novo_usuario = User(
-            nome=data["nome"],
-            email=data["email"],
+            nome=data.nome,
+            email=data.email,
             is_google_user = False
         )
-        novo_usuario.set_senha(data["senha"])
+        novo_usuario.set_senha(data.senha)
         
         db.session.add(novo_usuario)
         db.session.commit()
+        invalidate_profile(novo_usuario.id)
         
-        return jsonify({
-            "success": True,
-            "message": "Usuário criado com sucesso",
-            "usuario": novo_usuario.to_dict()
-        }), 201
+        return jsonify(Cadastro(
+            message="Usuário criado com sucesso",
+            usuario=Usuario.from_user(novo_usuario)
+        )), 201
+        
+    except IntegrityError:
+        # O filtro deste worker ainda não viu um cadastro feito em outro
+        # processo: o índice único de email decide
+        db.session.rollback()
+        return jsonify(Erro(error="Email já cadastrado")), 409
+        
+    except HashingBusyError:
+        db.session.rollback()
+        return jsonify(SERVIDOR_OCUPADO), 503, {"Retry-After": "1"}
         
     except Exception as e:
         db.session.rollback()
-        return jsonify({
-            "success": False,
-            "error": f"Erro ao cadastrar: {str(e)}"
-        }), 500
+        return jsonify(Erro(error=f"Erro ao cadastrar: {str(e)}")), 500
 
 @auth_bp.route("/login", methods=["POST"])
-def login():
+@json_body(LoginIn)
+def login(data):
     try:
-        data = request.get_json()
-        
-        # Validação: Campos obrigatórios
-        if not data or not data.get("email") or not data.get("senha"):
-            return jsonify({
-                "success": False,
-                "error": "Email e senha são obrigatórios"
-            }), 400
+        # Limite de tentativas antes de qualquer consulta ou hash
+        retry_after = rate_limiter.check("login", email=data.email)
+        if retry_after:
+            return too_many_requests(retry_after)
         
         # Busca usuário
-        user = User.query.filter_by(email=data["email"]).first()
+        user = find_user_by_email(data.email)
         
         # Verifica credenciais
-        if not user or not user.check_senha(data["senha"]):
-            return jsonify({
-                "success": False,
-                "error": "Email ou senha inválidos"
-            }), 401
+        if not user or not user.check_senha(data.senha):
+            return jsonify(Erro(error="Email ou senha inválidos")), 401
         
         # Verifica se é usuário Google
         if user.is_google_user:
-            return jsonify({
-                "success": False,
-                "error": "Esta conta usa Google. Use 'Entrar com Google'"
-            }), 401
+            return jsonify(Erro(error="Esta conta usa Google. Use 'Entrar com Google'")), 401
+        
+        # Hash com parâmetros antigos: atualiza com a política atual (grava junto com o refresh token)
+        try:
+            if user.rehash_senha(data.senha):
+                PASSWORD_REHASHED.inc()
+        except HashingBusyError:
+            pass  # fica para o próximo login
+        
+        # Lido antes do commit: evita recarregar o usuário (do primário) depois
+        usuario = Usuario.from_user(user)
         
         # Cria token JWT
-        access_token = create_access_token(
-            identity=user.id,
-            expires_delta=timedelta(hours=24)
-        )
+        access_token, refresh_token = issue_tokens(user)
+        
+        return jsonify(Login(
+            message="Login realizado com sucesso",
+            access_token=access_token,
+            refresh_token=refresh_token,
+            usuario=usuario
+        )), 200
+        
+    except HashingBusyError:
+        return jsonify(SERVIDOR_OCUPADO), 503, {"Retry-After": "1"}
+        
+    except Exception as e:
+        return jsonify(Erro(error=f"Erro ao fazer login: {str(e)}")), 500
+
+@auth_bp.route("/refresh", methods=["POST"])
+@jwt_required(refresh=True)
+def refresh():
+    """Troca o refresh token por um novo par de tokens (rotação)"""
+    try:
+        user = db.session.get(User, int(get_jwt_identity()))
+        tokens = rotate_refresh_token(get_jwt(), user) if user else None
+        
+        if not tokens:
+            return jsonify(Erro(error="Refresh token inválido ou já utilizado. Faça login novamente")), 401
         
-        return jsonify({
-            "success": True,
-            "message": "Login realizado com sucesso",
-            "access_token": access_token,
-            "usuario": user.to_dict()
-        }), 200
+        access_token, refresh_token = tokens
+        return jsonify(Tokens(access_token=access_token, refresh_token=refresh_token)), 200
         
     except Exception as e:
-        return jsonify({
-            "success": False,
-            "error": f"Erro ao fazer login: {str(e)}"
-        }), 500
+        db.session.rollback()
+        return jsonify(Erro(error=f"Erro ao renovar token: {str(e)}")), 500
+
+@auth_bp.route("/logout", methods=["POST"])
+@jwt_required()
+def logout():
+    """Revoga o access token atual e os refresh tokens da mesma sessão"""
+    try:
+        jwt_payload = get_jwt()
+        revoke_access_token(jwt_payload)
+        if jwt_payload.get("fam"):
+            revoke_family(jwt_payload["fam"])
+        db.session.commit()
+        
+        return jsonify(Mensagem(message="Logout realizado com sucesso")), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify(Erro(error=f"Erro ao fazer logout: {str(e)}")), 500
+
+def _google_call(name, func, *args):
+    """Resultado já obtido pelo servidor ASGI (auth/google_async.py) ou chamada síncrona"""
+    prefetch = request.environ.get(PREFETCH_ENVIRON_KEY)
+    if prefetch is not None and name in prefetch:
+        result = prefetch[name]
+        if isinstance(result, Exception):
+            raise result
+        return result
+    return func(*args)
+
+@auth_bp.route("/me", methods=["GET"])
+@jwt_required()
+def me():
+    """Dados do usuário autenticado; 304 se o If-None-Match bate com o ETag atual"""
+    try:
+        cached = get_profile(int(get_jwt_identity()))
+        if cached is None:
+            return jsonify(Erro(error="Usuário não encontrado")), 404
+        
+        profile, etag = cached
+        # Perfil em cache: o 304 sai sem consultar o banco
+        if request.if_none_match.contains(etag):
+            response = current_app.response_class(status=304)
+        else:
+            response = jsonify(Perfil(usuario=profile))
+        response.set_etag(etag)
+        response.headers["Cache-Control"] = "private, no-cache"
+        return response
+        
+    except Exception as e:
+        return jsonify(Erro(error=f"Erro ao buscar usuário: {str(e)}")), 500
 
 @auth_bp.route("/auth/google", methods=["GET"])
 def google_login():
@@ -131,292 +217,184 @@ def google_callback():
         code = request.args.get("code")
         
         if not code:
-            return jsonify({
-                "success": False,
-                "error": "Código de autorização não fornecido"
-            }), 400
+            return jsonify(Erro(error="Código de autorização não fornecido")), 400
         
         
-        token_url = "https://oauth2.googleapis.com/token"
-        token_data = {
-            "code": code,
-            "client_id": Config.GOOGLE_CLIENT_ID,
-            "client_secret": Config.GOOGLE_CLIENT_SECRET,
-            "redirect_uri": Config.GOOGLE_REDIRECT_URI,
-            "grant_type": "authorization_code"
-        }
-        
-        token_response = http_requests.post(token_url, data=token_data)
-        token_json = token_response.json()
+        token_json = _google_call("token", google_client.exchange_code, code)
         
         if "error" in token_json:
-            return jsonify({
-                "success": False,
-                "error": f"Erro ao obter token: {token_json['error']}"
-            }), 400
-        
+            return jsonify(Erro(error=f"Erro ao obter token: {token_json['error']}")), 400
         
-        id_info = id_token.verify_oauth2_token(
-            token_json["id_token"],
-            google_requests.Request(),
-            Config.GOOGLE_CLIENT_ID
-        )
-        
-        
-        google_id = id_info["sub"]
-        email = id_info["email"]
-        nome = id_info.get("name", email.split("@")[0])
-        picture = id_info.get("picture", "")
         
+        id_info = _google_call("id_info", google_client.verify_id_token, token_json["id_token"])
         
-        user = User.query.filter_by(email=email).first()
         
-        is_new_user = False 
-        
-        if user:
-            if not user.is_google_user:
-                return redirect(
-                    f"http://localhost:4200/login?error=email_cadastrado_normal"
-                )
-            
-            user.google_id = google_id
-            user.nome = nome
-            user.picture = picture
-            db.session.commit()
-        else:
-            is_new_user = True
-            user = User(
-                nome=nome,
-                email=email,
-                is_google_user=True,
-                google_id=google_id,
-                picture=picture
-            )
-            db.session.add(user)
-            db.session.commit()
-        
-        
-        access_token = create_access_token(
-            identity=user.id,
-            expires_delta=timedelta(hours=24)
-        )
-        
-        if is_new_user:
+        try:
+            user, is_new_user = upsert_google_user(id_info)
+        except PasswordAccountExistsError:
             return redirect(
-                f"http://localhost:4200/dashboard?token={access_token}&user={user.id}&new_user=true"
+                f"http://localhost:4200/login?error=email_cadastrado_normal"
             )
-        else:
+        except GoogleAccountConflictError:
             return redirect(
-                f"http://localhost:4200/dashboard?token={access_token}&user={user.id}"
+                f"http://localhost:4200/login?error=conta_google_em_conflito"
             )
         
+        user_id = user.id
+        access_token, refresh_token = issue_tokens(user)
+        invalidate_profile(user_id)
+        logger.info("Login Google (callback)", extra={
+            "event": "google_login", "user_id": user_id, "new_user": is_new_user, "sample": True
+        })
+        
+        # Tokens no fragmento (#): o navegador não o envia ao servidor nem no
+        # Referer, então não aparecem em logs de acesso; o frontend o apaga do histórico
+        fragment = {"token": access_token, "refresh_token": refresh_token, "user": user_id}
+        if is_new_user:
+            fragment["new_user"] = "true"
+        return redirect(f"http://localhost:4200/dashboard#{urlencode(fragment)}")
+        
     except Exception as e:
-        print(f"Erro no callback Google: {str(e)}")
+        logger.exception("Erro no callback Google", extra={"event": "google_callback_error"})
         return redirect(
             f"http://localhost:4200/login?error=google_auth_failed"
         )
 
 @auth_bp.route("/google-login", methods=["POST"])
-def google_login_token():
+@json_body(GoogleLoginIn)
+def google_login_token(data):
     """Login com token do Google (para uso com biblioteca JavaScript)"""
     try:
-        data = request.get_json()
-        token = data.get("token")
-        
-        if not token:
-            return jsonify({
-                "success": False,
-                "error": "Token do Google é obrigatório"
-            }), 400
-        
         # Verifica token do Google
         try:
-            idinfo = id_token.verify_oauth2_token(
-                token,
-                google_requests.Request(),
-                Config.GOOGLE_CLIENT_ID
-            )
-            
-            google_id = idinfo["sub"]
-            email = idinfo["email"]
-            nome = idinfo.get("name", email.split("@")[0])
-            picture = idinfo.get("picture", "")
+            idinfo = _google_call("id_info", google_client.verify_id_token, data.token)
             
         except ValueError as e:
-            return jsonify({
-                "success": False,
-                "error": "Token do Google inválido"
-            }), 401
+            return jsonify(Erro(error="Token do Google inválido")), 401
         
-        user = User.query.filter_by(email=email).first()
-        
-        is_new_user = False 
-        
-        if user:
-            if not user.is_google_user:
-                return jsonify({
-                    "success": False,
-                    "error": "Este email já possui cadastro normal. Use login tradicional"
-                }), 409
-            
-            user.google_id = google_id
-            user.nome = nome
-            user.picture = picture
-            db.session.commit()
-        else:
-            is_new_user = True
-            user = User(
-                nome=nome,
-                email=email,
-                is_google_user=True,
-                google_id=google_id,
-                picture=picture
-            )
-            db.session.add(user)
-            db.session.commit()
-        
-        access_token = create_access_token(
-            identity=user.id,
-            expires_delta=timedelta(hours=24)
-        )
-        
-        if is_new_user:
-            return jsonify({
-                "success": True,
-                "message": "Conta criada com sucesso! Bem-vindo",
-                "access_token": access_token,
-                "usuario": user.to_dict(),
-                "is_new_user": True
-            }), 200
-        else:
-            return jsonify({
-                "success": True,
-                "message": "Login com Google realizado com sucesso",
-                "access_token": access_token,
-                "usuario": user.to_dict(),
-                "is_new_user": False
-            }), 200
+        try:
+            user, is_new_user = upsert_google_user(idinfo)
+        except PasswordAccountExistsError:
+            return jsonify(Erro(error="Este email já possui cadastro normal. Use login tradicional")), 409
+        except GoogleAccountConflictError:
+            return jsonify(Erro(error="Esta conta Google já está vinculada a outro usuário")), 409
+        
+        # Lido antes do commit: evita recarregar o usuário depois
+        usuario = Usuario.from_user(user)
+        access_token, refresh_token = issue_tokens(user)
+        invalidate_profile(usuario.id)
+        logger.info("Login Google (token)", extra={
+            "event": "google_login", "user_id": usuario.id, "new_user": is_new_user, "sample": True
+        })
+        
+        return jsonify(GoogleLogin(
+            message="Conta criada com sucesso! Bem-vindo" if is_new_user else "Login com Google realizado com sucesso",
+            access_token=access_token,
+            refresh_token=refresh_token,
+            usuario=usuario,
+            is_new_user=is_new_user
+        )), 200
         
     except Exception as e:
         db.session.rollback()
-        return jsonify({
-            "success": False,
-            "error": f"Erro no login com Google: {str(e)}"
-        }), 500
+        return jsonify(Erro(error=f"Erro no login com Google: {str(e)}")), 500
 
 @auth_bp.route("/esqueceuSenha", methods=["POST"])
-def esqueceu_senha():
+@idempotent
+@json_body(EsqueceuSenhaIn)
+def esqueceu_senha(data):
     """Envia email de recuperação de senha"""
     try:
-        mail = current_app.extensions['mail']  
-        
-        data = request.get_json()
-        email = data.get("email")
+        email = data.email
         
-        if not email:
-            return jsonify({
-                "success": False,
-                "error": "Email é obrigatório"
-            }), 400
+        # Limite de pedidos antes de gravar token ou enfileirar email
+        retry_after = rate_limiter.check("reset", email=email)
+        if retry_after:
+            return too_many_requests(retry_after)
         
-        user = User.query.filter_by(email=email).first()
+        user = find_user_by_email(email)
         
-        if not user:
-            return jsonify({
-                "success": True,
-                "message": "Se o email existir, você receberá o link de recuperação"
-            }), 200
-        
-        if user.is_google_user:
-            return jsonify({
-                "success": True,
-                "message": "Se o email existir, você receberá o link de recuperação"
-            }), 200
+        if not user or user.is_google_user:
+            return jsonify(_RESPOSTA_GENERICA), 200
         
         token, expiry = generate_reset_token()
         
-        user.reset_token = token
-        user.reset_token_expiry = expiry
-        db.session.commit()
-        
-        email_sent = send_reset_email(mail, user.email, token)
+        db.session.add(ResetToken(
+            user_id=user.id,
+            token_hash=hash_reset_token(token),
+            expires_at=expiry
+        ))
         
-        if not email_sent:
-            return jsonify({
-                "success": False,
-                "error": "Erro ao enviar email. Tente novamente"
-            }), 500
+        # Token e email gravados na mesma transação; o envio é em segundo plano
+        queue_reset_email(user.email, token)
+        db.session.commit()
+        outbox_sender.notify()
+        logger.info("Email de recuperação enfileirado", extra={"event": "reset_email_queued", "user_id": user.id})
         
-        return jsonify({
-            "success": True,
-            "message": "Link de recuperação enviado para o email"
-        }), 200
+        return jsonify(Mensagem(message="Link de recuperação enviado para o email")), 200
         
     except Exception as e:
         db.session.rollback()
-        return jsonify({
-            "success": False,
-            "error": f"Erro ao processar solicitação: {str(e)}"
-        }), 500
+        return jsonify(Erro(error=f"Erro ao processar solicitação: {str(e)}")), 500
 
 @auth_bp.route("/recuperarSenha", methods=["POST"])
-def recuperar_senha():
+@idempotent
+@json_body(RecuperarSenhaIn)
+def recuperar_senha(data):
     """Redefine senha usando token recebido por email"""
     try:
-        data = request.get_json()
+        # Validação 1 (campos obrigatórios): feita pelo schema em json_body
+        # Validação 2: Senhas conferem
+        if data.nova_senha != data.confirmar_senha:
+            return jsonify(Erro(error="As senhas não conferem")), 400
         
-        token = data.get("token")
-        nova_senha = data.get("nova_senha")
-        confirmar_senha = data.get("confirmar_senha")
+        # Validação 3: Senha não aparece em vazamentos conhecidos
+        if data.nova_senha in breached_passwords:
+            BREACHED_PASSWORDS_REJECTED.inc()
+            return jsonify(SENHA_VAZADA), 400
         
-        # Validação 1: Campos obrigatórios
-        if not token or not nova_senha or not confirmar_senha:
-            return jsonify({
-                "success": False,
-                "error": "Token e senhas são obrigatórios"
-            }), 400
+        # Busca token pelo hash (consulta pontual no índice único)
+        reset_token = ResetToken.query.filter_by(token_hash=hash_reset_token(data.token)).first()
         
-        # Validação 2: Senhas conferem
-        if nova_senha != confirmar_senha:
-            return jsonify({
-                "success": False,
-                "error": "As senhas não conferem"
-            }), 400
-        
-        # Busca usuário pelo token
-        user = User.query.filter_by(reset_token=token).first()
-        
-        # Validação 3: Token existe
-        if not user:
-            return jsonify({
-                "success": False,
-                "error": "Token inválido"
-            }), 400
-        
-        # Validação 4: Token expirou
-        if user.reset_token_expiry < datetime.utcnow():
-            return jsonify({
-                "success": False,
-                "error": "Token expirado. Solicite um novo link"
-            }), 400
+        # Validação 4: Token existe
+        if not reset_token:
+            return jsonify(Erro(error="Token inválido")), 400
+        
+        # Validação 5: Token expirou
+        if reset_token.expires_at < datetime.utcnow():
+            return jsonify(Erro(error="Token expirado. Solicite um novo link")), 400
         
         # Atualiza senha
-        user.set_senha(nova_senha)
+        user_id = reset_token.user_id
+        user = db.session.get(User, user_id)
+        user.set_senha(data.nova_senha)
         
-        # Limpa token (uso único)
-        user.reset_token = None
-        user.reset_token_expiry = None
+        # Invalida todos os tokens do usuário (uso único)
+        ResetToken.query.filter_by(user_id=user_id).delete(synchronize_session=False)
         
         db.session.commit()
+        invalidate_profile(user_id)
         
-        return jsonify({
-            "success": True,
-            "message": "Senha atualizada com sucesso! Faça login com a nova senha"
-        }), 200
+        return jsonify(Mensagem(message="Senha atualizada com sucesso! Faça login com a nova senha")), 200
+        
+    except HashingBusyError:
+        db.session.rollback()
+        return jsonify(SERVIDOR_OCUPADO), 503, {"Retry-After": "1"}
         
     except Exception as e:
         db.session.rollback()
-        return jsonify({
-            "success": False,
-            "error": f"Erro ao recuperar senha: {str(e)}"
-        }), 500
\ No newline at end of file
+        return jsonify(Erro(error=f"Erro ao recuperar senha: {str(e)}")), 500
+
+
+@auth_bp.route("/.well-known/jwks.json", methods=["GET"])
+def jwks():
+    """Chaves públicas de verificação dos tokens, para outros serviços validarem sem chamar a API"""
+    body, etag = current_keys().jwks
+    if request.if_none_match.contains(etag):
+        response = current_app.response_class(status=304)
+    else:
+        response = current_app.response_class(body, mimetype="application/json")
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = f"public, max-age={current_app.config.get('JWKS_MAX_AGE', 300)}"
+    return response
+
@@ -0,0 +1,136 @@
+"""Corpos de requisição e de resposta do auth_bp, declarados uma vez.
+
+As requisições são validadas por decoders compilados do msgspec (tipos,
+campos obrigatórios e não vazios) antes de a view rodar; as respostas são
+Structs serializados pelo MsgspecJSONProvider (json_provider.py).
+"""
+import functools
+from typing import Annotated, ClassVar, Optional
+
+import msgspec
+from flask import jsonify, request
+
+from metrics import phase_timer
+
+# Obrigatório e não vazio (o mesmo que `not data.get(...)` recusava)
+Obrigatorio = Annotated[str, msgspec.Meta(min_length=1)]
+
+
+# Requisições: `erro` é a mensagem do 400 quando o corpo não confere
+
+class CadastroIn(msgspec.Struct):
+    erro: ClassVar[str] = "Nome, email e senha são obrigatórios"
+    nome: Obrigatorio
+    email: Obrigatorio
+    senha: Obrigatorio
+    confirmar_senha: Optional[str] = None
+
+
+class LoginIn(msgspec.Struct):
+    erro: ClassVar[str] = "Email e senha são obrigatórios"
+    email: Obrigatorio
+    senha: Obrigatorio
+
+
+class GoogleLoginIn(msgspec.Struct):
+    erro: ClassVar[str] = "Token do Google é obrigatório"
+    token: Obrigatorio
+
+
+class EsqueceuSenhaIn(msgspec.Struct):
+    erro: ClassVar[str] = "Email é obrigatório"
+    email: Obrigatorio
+
+
+class RecuperarSenhaIn(msgspec.Struct):
+    erro: ClassVar[str] = "Token e senhas são obrigatórios"
+    token: Obrigatorio
+    nova_senha: Obrigatorio
+    confirmar_senha: Obrigatorio
+
+
+# Respostas
+
+class Usuario(msgspec.Struct):
+    """As mesmas chaves de User.to_dict()"""
+    id: int
+    nome: str
+    email: str
+    is_google_user: bool
+    picture: Optional[str] = None
+
+    @classmethod
+    def from_user(cls, user):
+        return cls(user.id, user.nome, user.email, user.is_google_user, user.picture)
+
+
+class Resposta(msgspec.Struct, kw_only=True):
+    success: bool = True
+
+
+class Erro(Resposta, kw_only=True):
+    success: bool = False
+    error: str
+
+
+class Mensagem(Resposta, kw_only=True):
+    message: str
+
+
+class Cadastro(Mensagem, kw_only=True):
+    usuario: Usuario
+
+
+class Tokens(Resposta, kw_only=True):
+    access_token: str
+    refresh_token: str
+
+
+class Login(Tokens, kw_only=True):
+    message: str
+    usuario: Usuario
+
+
+class GoogleLogin(Login, kw_only=True):
+    is_new_user: bool
+
+
+class Perfil(Resposta, kw_only=True):
+    # Dict do cache de perfis (User.to_dict()), o mesmo usado no ETag
+    usuario: dict
+
+
+class PaginaUsuarios(Resposta, kw_only=True):
+    usuarios: list[Usuario]
+    next_cursor: Optional[str]
+
+
+# Respostas fixas montadas uma vez
+SERVIDOR_OCUPADO = Erro(error="Servidor ocupado. Tente novamente em instantes")
+MUITAS_TENTATIVAS = Erro(error="Muitas tentativas. Tente novamente mais tarde")
+SENHA_VAZADA = Erro(error="Esta senha aparece em vazamentos de dados conhecidos. Escolha outra senha")
+
+
+def json_body(schema):
+    """Decodifica e valida o corpo JSON com `schema` e passa o Struct à view.
+
+    Corpo que não é JSON, não é objeto ou não confere com o schema responde
+    400 com `schema.erro`, sem chegar à view.
+    """
+    decoder = msgspec.json.Decoder(schema)
+
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            data = None
+            if request.is_json:
+                try:
+                    with phase_timer("json"):
+                        data = decoder.decode(request.get_data())
+                except msgspec.DecodeError:
+                    pass
+            if data is None:
+                return jsonify(Erro(error=schema.erro)), 400
+            return view(data, *args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,125 @@
+import uuid
+from datetime import datetime, timezone
+
+from flask import current_app, jsonify
+from flask_jwt_extended import create_access_token, create_refresh_token
+
+from cache import LRUCache
+from auth.keys import init_jwt_keys
+from database import db
+from models import RefreshToken, RevokedToken
+
+# jti do access token -> revogado? Revogação é definitiva, então "True" fica até
+# o token expirar; "False" fica pouco tempo para enxergar revogações de outros workers.
+revocation_cache = LRUCache()
+
+
+def init_jwt(jwt, app):
+    """Registra as chaves de assinatura, a checagem de revogação e as respostas de erro no JWTManager"""
+    init_jwt_keys(jwt, app)
+
+    revocation_cache.maxsize = app.config.get("REVOCATION_CACHE_SIZE", 100_000)
+    revocation_cache.ttl = app.config.get("REVOCATION_CACHE_TTL", 30)
+    revocation_cache.clear()
+
+    jwt.token_in_blocklist_loader(is_token_revoked)
+
+    @jwt.revoked_token_loader
+    def revoked_token_response(jwt_header, jwt_payload):
+        return jsonify({
+            "success": False,
+            "error": "Token revogado. Faça login novamente"
+        }), 401
+
+    @jwt.expired_token_loader
+    def expired_token_response(jwt_header, jwt_payload):
+        return jsonify({
+            "success": False,
+            "error": "Token expirado"
+        }), 401
+
+
+def _expires_at(jwt_payload):
+    return datetime.fromtimestamp(jwt_payload["exp"], tz=timezone.utc).replace(tzinfo=None)
+
+
+def _seconds_left(jwt_payload):
+    return max(jwt_payload["exp"] - datetime.now(timezone.utc).timestamp(), 1)
+
+
+def is_token_revoked(jwt_header, jwt_payload):
+    """Consulta o cache LRU e só vai ao banco quando o jti não está nele.
+
+    Refresh tokens são conferidos em /refresh (rotate_refresh_token), que
+    precisa ver o token reutilizado para revogar a família.
+    """
+    if jwt_payload.get("type") == "refresh":
+        return False
+
+    jti = jwt_payload["jti"]
+    revoked = revocation_cache.get(jti)
+    if revoked is not None:
+        return revoked
+
+    revoked = db.session.query(RevokedToken.id).filter_by(jti=jti).first() is not None
+    revocation_cache.set(jti, revoked, ttl=_seconds_left(jwt_payload) if revoked else None)
+    return revoked
+
+
+def issue_tokens(user, family_id=None, replaces=None):
+    """Cria access token curto + refresh token (gravado no banco) e faz commit"""
+    jti = str(uuid.uuid4())
+    family_id = family_id or str(uuid.uuid4())
+    expires_delta = current_app.config["JWT_REFRESH_TOKEN_EXPIRES"]
+
+    access_token = create_access_token(identity=str(user.id), additional_claims={"fam": family_id})
+    refresh_token = create_refresh_token(
+        identity=str(user.id),
+        additional_claims={"jti": jti, "fam": family_id}
+    )
+
+    db.session.add(RefreshToken(
+        jti=jti,
+        family_id=family_id,
+        user_id=user.id,
+        expires_at=datetime.utcnow() + expires_delta
+    ))
+    if replaces is not None:
+        replaces.replaced_by = jti
+    db.session.commit()
+    return access_token, refresh_token
+
+
+def revoke_family(family_id):
+    """Revoga todos os refresh tokens ativos da família (não faz commit)"""
+    RefreshToken.query.filter_by(family_id=family_id, revoked_at=None).update(
+        {"revoked_at": datetime.utcnow()}, synchronize_session=False
+    )
+
+
+def rotate_refresh_token(jwt_payload, user):
+    """Troca o refresh token por um par novo da mesma família.
+
+    Reuso de um refresh token já trocado indica vazamento: a família
+    inteira é revogada e None é retornado.
+    """
+    row = RefreshToken.query.filter_by(jti=jwt_payload["jti"]).first()
+    if row is None or row.user_id != user.id:
+        return None
+
+    # UPDATE condicional: de dois refresh simultâneos com o mesmo token, só um vence
+    claimed = RefreshToken.query.filter_by(id=row.id, revoked_at=None).update(
+        {"revoked_at": datetime.utcnow()}, synchronize_session=False
+    )
+    if not claimed:
+        revoke_family(row.family_id)
+        db.session.commit()
+        return None
+
+    return issue_tokens(user, family_id=row.family_id, replaces=row)
+
+
+def revoke_access_token(jwt_payload):
+    """Revoga o access token até ele expirar (não faz commit)"""
+    db.session.add(RevokedToken(jti=jwt_payload["jti"], expires_at=_expires_at(jwt_payload)))
+    revocation_cache.set(jwt_payload["jti"], True, ttl=_seconds_left(jwt_payload))
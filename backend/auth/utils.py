@@ -1,6 +1,12 @@
+import hashlib
 import secrets
 from datetime import datetime, timedelta
-from flask_mail import Message
+
+from database import db
+from models import EmailOutbox, ResetToken
+from auth.outbox import enqueue_email
+
+RESET_EMAIL_SUBJECT = "🔐 Recuperação de Senha - Ação Necessária"
 
 
 def generate_reset_token():
@@ -10,8 +16,54 @@ def generate_reset_token():
     return token, expiry
 
 
-def send_reset_email(mail, user_email, reset_token):
-    """Envia email de recuperação de senha"""
+def hash_reset_token(token):
+    """Hash do token usado como chave de busca (o token em si não é gravado)"""
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def purge_expired_rows(model, batch_size=1000, where=None):
+    """Remove linhas com expires_at vencido em lotes limitados; retorna o total.
+
+    `where` troca o critério de expiração (avaliado de novo a cada lote).
+    """
+    total = 0
+    while True:
+        criterion = where() if where is not None else model.expires_at < datetime.utcnow()
+        ids = [
+            row.id for row in db.session.query(model.id)
+            .filter(criterion)
+            .limit(batch_size)
+        ]
+        if not ids:
+            db.session.rollback()
+            return total
+        model.query.filter(model.id.in_(ids)).delete(synchronize_session=False)
+        db.session.commit()
+        total += len(ids)
+
+
+def purge_expired_reset_tokens(batch_size=1000):
+    """Remove tokens de recuperação expirados"""
+    return purge_expired_rows(ResetToken, batch_size)
+
+
+def purge_finished_emails(retention_days=7, batch_size=1000):
+    """Remove emails enviados ou descartados há mais de `retention_days` dias"""
+    cutoff = datetime.utcnow() - timedelta(days=retention_days)
+    # next_attempt_at é o horário da última tentativa: usa ix_email_outbox_pending
+    return purge_expired_rows(EmailOutbox, batch_size, where=lambda: db.and_(
+        EmailOutbox.status.in_(("sent", "failed")),
+        EmailOutbox.next_attempt_at < cutoff
+    ))
+
+
+def queue_reset_email(user_email, reset_token):
+    """Coloca o email de recuperação na outbox (enviado após o commit)"""
+    return enqueue_email(user_email, RESET_EMAIL_SUBJECT, render_reset_email(reset_token))
+
+
+def render_reset_email(reset_token):
+    """Monta o HTML do email de recuperação de senha"""
     
     reset_link = f"http://localhost:4200/recuperar?token={reset_token}"
     
@@ -117,17 +169,4 @@ def send_reset_email(mail, user_email, reset_token):
     </html>
     """
     
-    msg = Message(
-        subject="🔐 Recuperação de Senha - Ação Necessária",
-        recipients=[user_email],
-        html=html_body
-    )
-    
-    try:
-        mail.send(msg)
-        print(f"✅ Email enviado com sucesso para: {user_email}")
-        return True
-    except Exception as e:
-        print(f"❌ Erro ao enviar email: {str(e)}")
-        return False
-
+    return html_body
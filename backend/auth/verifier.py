@@ -0,0 +1,91 @@
+"""Validação local dos access tokens pelo JWKS publicado em /.well-known/jwks.json.
+
+Para os outros serviços: só depende do PyJWT (com cryptography) e pode
+ser copiado para eles. As chaves ficam em memória; o JWKS é buscado de
+novo quando o cache vence ou aparece um kid novo (rotação), no máximo uma
+vez a cada `min_refresh_interval`. Se a busca falha, as chaves que já
+estavam em memória continuam valendo.
+
+    verifier = TokenVerifier("https://auth.exemplo.com/.well-known/jwks.json")
+    payload = verifier.verify(token)  # levanta jwt.InvalidTokenError
+    user_id = payload["sub"]
+
+Revogação (logout) não é vista aqui: o access token vale até expirar
+(JWT_ACCESS_TOKEN_MINUTES).
+"""
+import threading
+import time
+
+import jwt
+from jwt import InvalidTokenError, PyJWKClient, PyJWKClientError, PyJWKSetError
+
+
+class TokenVerifier:
+    def __init__(self, jwks_url, algorithms=("RS256", "EdDSA"), audience=None, issuer=None,
+                 cache_ttl=300, min_refresh_interval=10, leeway=0, timeout=5):
+        # Sem o cache do PyJWKClient: o controle de validade e de nova busca fica aqui
+        self._client = PyJWKClient(jwks_url, cache_jwk_set=False, cache_keys=False, timeout=timeout)
+        self.algorithms = set(algorithms)
+        self.audience = audience
+        self.issuer = issuer
+        self.cache_ttl = cache_ttl
+        self.min_refresh_interval = min_refresh_interval
+        self.leeway = leeway
+        self._keys = {}
+        self._fetched_at = None
+        self._lock = threading.Lock()
+
+    def _stale(self, now):
+        return self._fetched_at is None or now - self._fetched_at >= self.cache_ttl
+
+    def _refresh(self, now):
+        try:
+            keys = self._client.get_jwk_set().keys
+        except PyJWKSetError:
+            # JWKS sem chaves utilizáveis (API ainda em HS256)
+            keys = []
+        except PyJWKClientError:
+            if not self._keys:
+                raise
+            # Indisponível: segue com as chaves antigas e tenta de novo depois
+            keys = self._keys.values()
+        self._keys = {
+            key.key_id: key for key in keys
+            if key.key_id and key.algorithm_name in self.algorithms and key.public_key_use in (None, "sig")
+        }
+        self._fetched_at = now
+
+    def signing_key(self, kid):
+        now = time.monotonic()
+        key = self._keys.get(kid)
+        if key is not None and not self._stale(now):
+            return key
+
+        with self._lock:
+            key = self._keys.get(kid)
+            if key is None or self._stale(now):
+                # kid desconhecido não dispara uma busca por requisição
+                recent = self._fetched_at is not None and now - self._fetched_at < self.min_refresh_interval
+                if not recent:
+                    self._refresh(now)
+                    key = self._keys.get(kid)
+        if key is None:
+            raise InvalidTokenError("Chave de assinatura desconhecida")
+        return key
+
+    def verify(self, token, token_type="access"):
+        """Valida assinatura, exp e tipo do token; retorna o payload"""
+        header = jwt.get_unverified_header(token)
+        key = self.signing_key(header.get("kid"))
+        payload = jwt.decode(
+            token,
+            key.key,
+            algorithms=[key.algorithm_name],
+            audience=self.audience,
+            issuer=self.issuer,
+            leeway=self.leeway,
+            options={"require": ["exp", "sub", "jti"], "verify_aud": self.audience is not None}
+        )
+        if token_type is not None and payload.get("type") != token_type:
+            raise InvalidTokenError(f"Esperado token do tipo {token_type}")
+        return payload
@@ -0,0 +1,133 @@
+"""Compara a gravação do login Google: caminho antigo x upsert_google_user.
+
+Mede, para usuários novos, logins repetidos sem mudança e perfis
+alterados, a vazão e o número de statements por login (cada login termina
+com um commit, como nas rotas). O filtro de emails fica ligado, como em
+produção.
+
+Uso (dentro de backend/):
+    python -m bench.google_upsert --users 2000 --output upsert.json
+"""
+import argparse
+import json
+import os
+import secrets
+import sys
+import tempfile
+import time
+
+from sqlalchemy import event
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app  # noqa: E402
+from auth.email_filter import email_filter, find_user_by_email  # noqa: E402
+from auth.google_users import upsert_google_user  # noqa: E402
+from database import db  # noqa: E402
+from models import User  # noqa: E402
+
+
+def legacy_upsert(id_info):
+    """Caminho anterior das rotas: lê, depois insere ou atualiza sempre"""
+    google_id = id_info["sub"]
+    email = id_info["email"]
+    nome = id_info.get("name", email.split("@")[0])
+    picture = id_info.get("picture", "")
+    user = find_user_by_email(email)
+    if user:
+        user.google_id = google_id
+        user.nome = nome
+        user.picture = picture
+        db.session.commit()
+        return user, False
+    user = User(nome=nome, email=email, is_google_user=True, google_id=google_id, picture=picture)
+    db.session.add(user)
+    db.session.commit()
+    return user, True
+
+
+def new_upsert(id_info):
+    result = upsert_google_user(id_info)
+    db.session.commit()
+    return result
+
+
+def profiles(prefix, n, name="Usuário"):
+    return [
+        {"sub": f"{prefix}-{i}", "email": f"{prefix}.{i}@gmail.com", "name": f"{name} {i}", "picture": ""}
+        for i in range(n)
+    ]
+
+
+def measure(engine, func, id_infos):
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", count)
+    started = time.perf_counter()
+    try:
+        for id_info in id_infos:
+            func(id_info)
+            # Sessão nova a cada login, como em requisições separadas
+            db.session.remove()
+    finally:
+        elapsed = time.perf_counter() - started
+        event.remove(engine, "before_cursor_execute", count)
+    return {
+        "logins_per_s": round(len(id_infos) / elapsed, 1),
+        "ms_per_login": round(elapsed / len(id_infos) * 1000, 3),
+        "statements_per_login": round(len(statements) / len(id_infos), 2)
+    }
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--database-url", help="Banco existente (padrão: SQLite temporário)")
+    parser.add_argument("--output", help="Grava o resultado em JSON")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    database_url = args.database_url or (
+        f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='auth-upsert-'), 'upsert.db')}"
+    )
+    app = create_app({
+        "SQLALCHEMY_DATABASE_URI": database_url,
+        "OUTBOX_SENDER_ENABLED": False
+    })
+    run = secrets.token_hex(3)
+    result = {"users": args.users, "database": database_url.split(":", 1)[0]}
+
+    with app.app_context():
+        db.create_all()
+        # Filtro de emails como em produção, sem a thread de sincronização
+        email_filter.shutdown()
+        email_filter.build()
+        engine = db.engine
+        for label, func in (("antigo", legacy_upsert), ("upsert", new_upsert)):
+            prefix = f"{label}-{run}"
+            result[label] = {
+                "novos": measure(engine, func, profiles(prefix, args.users)),
+                "repetidos": measure(engine, func, profiles(prefix, args.users)),
+                "alterados": measure(engine, func, profiles(prefix, args.users, name="Alterado"))
+            }
+    email_filter.shutdown()
+
+    print(f"{'cenário':<12} {'caminho':<8} {'logins/s':>10} {'ms/login':>10} {'stmts/login':>12}")
+    for scenario in ("novos", "repetidos", "alterados"):
+        for label in ("antigo", "upsert"):
+            row = result[label][scenario]
+            print(f"{scenario:<12} {label:<8} {row['logins_per_s']:>10} "
+                  f"{row['ms_per_login']:>10} {row['statements_per_login']:>12}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""Custo por requisição de ler o corpo JSON e serializar a resposta.
+
+Compara, para o corpo e a resposta de /login e para um corpo inválido,
+o caminho antigo (request.get_json(), checagens com data.get() e jsonify
+de um dict pelo provider padrão do Flask) com o atual (decoder compilado
+de auth/schemas.py e Structs pelo MsgspecJSONProvider). Cada rodada monta
+um contexto de requisição novo; o custo do contexto vazio é descontado.
+As colunas "json" medem só parse, validação e serialização, sem o Flask.
+
+Uso (dentro de backend/):
+    python -m bench.json_overhead --repeat 20000 --output json.json
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from collections import defaultdict
+
+import msgspec
+from flask import g, jsonify, request
+from flask.json.provider import DefaultJSONProvider
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app  # noqa: E402
+from auth.schemas import Erro, Login, LoginIn, Usuario, json_body  # noqa: E402
+
+CORPO = json.dumps({"email": "teste@teste.com", "senha": "Teste123"})
+INVALIDO = json.dumps(["nao", "e", "objeto"])
+TOKEN = "x" * 400  # tamanho de um JWT RS256 típico
+USUARIO = {"id": 42, "nome": "Teste", "email": "teste@teste.com", "is_google_user": False, "picture": None}
+
+
+def resposta_dict():
+    return {
+        "success": True,
+        "message": "Login realizado com sucesso",
+        "access_token": TOKEN,
+        "refresh_token": TOKEN,
+        "usuario": dict(USUARIO)
+    }
+
+
+def resposta_struct():
+    return Login(
+        message="Login realizado com sucesso",
+        access_token=TOKEN,
+        refresh_token=TOKEN,
+        usuario=Usuario(**USUARIO)
+    )
+
+
+def antes():
+    try:
+        data = request.get_json()
+        if not data or not data.get("email") or not data.get("senha"):
+            return jsonify({"success": False, "error": "Email e senha são obrigatórios"}), 400
+        return jsonify(resposta_dict()), 200
+    except Exception as e:
+        return jsonify({"success": False, "error": f"Erro ao fazer login: {str(e)}"}), 500
+
+
+@json_body(LoginIn)
+def depois(data):
+    return jsonify(resposta_struct()), 200
+
+
+def timed(app, view, body, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        with app.test_request_context("/login", method="POST", data=body, content_type="application/json"):
+            g._metrics_phases = defaultdict(float)  # como no before_request do auth_bp
+            if view is not None:
+                view()
+    return (time.perf_counter() - started) / repeat * 1e6
+
+
+def timed_json(app, body, repeat):
+    """Só parse + validação + serialização, sem Flask: (antes µs, depois µs)"""
+    provider = DefaultJSONProvider(app)
+    decoder = msgspec.json.Decoder(LoginIn)
+    encoder = msgspec.json.Encoder()
+
+    started = time.perf_counter()
+    for _ in range(repeat):
+        try:
+            data = provider.loads(body)
+            ok = bool(data and data.get("email") and data.get("senha"))
+        except AttributeError:
+            ok = False
+        provider.dumps(resposta_dict() if ok else {"success": False, "error": "Email e senha são obrigatórios"})
+    old = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for _ in range(repeat):
+        try:
+            decoder.decode(body)
+            ok = True
+        except msgspec.DecodeError:
+            ok = False
+        encoder.encode(resposta_struct() if ok else Erro(error="Email e senha são obrigatórios"))
+    new = time.perf_counter() - started
+    return old / repeat * 1e6, new / repeat * 1e6
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=20_000)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--output", help="Grava o resultado em JSON")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    config = {"SQLALCHEMY_DATABASE_URI": "sqlite://", "OUTBOX_SENDER_ENABLED": False, "EMAIL_FILTER_ENABLED": False}
+    atual = create_app(config)
+    antigo = create_app(config)
+    antigo.json = DefaultJSONProvider(antigo)
+
+    # Aquecimento (imports preguiçosos, caches do Werkzeug)
+    for app, view in ((antigo, antes), (atual, depois)):
+        timed(app, view, CORPO, 100)
+
+    per_round = max(1, args.repeat // args.rounds)
+    result = {"repeat": args.repeat, "rounds": args.rounds, "cases": []}
+    for label, body in (("login válido", CORPO), ("corpo inválido", INVALIDO)):
+        # Melhor de várias rodadas intercaladas: o ruído da máquina fica de fora
+        rounds = [
+            (timed(atual, None, body, per_round), timed(antigo, antes, body, per_round),
+             timed(atual, depois, body, per_round), *timed_json(atual, body, per_round))
+            for _ in range(args.rounds)
+        ]
+        base, old, new, json_old, json_new = (min(column) for column in zip(*rounds))
+        old, new = old - base, new - base
+        result["cases"].append({
+            "caso": label,
+            "contexto_us": round(base, 2),
+            "view_antes_us": round(old, 2),
+            "view_depois_us": round(new, 2),
+            "json_antes_us": round(json_old, 2),
+            "json_depois_us": round(json_new, 2)
+        })
+
+    print(f"{'caso':<16} {'contexto':>9} {'view antes':>11} {'view depois':>12} {'json antes':>11} {'json depois':>12}  (µs)")
+    for case in result["cases"]:
+        print(
+            f"{case['caso']:<16} {case['contexto_us']:>9} {case['view_antes_us']:>11} {case['view_depois_us']:>12}"
+            f" {case['json_antes_us']:>11} {case['json_depois_us']:>12}"
+        )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+"""Teste de carga dos endpoints de autenticação.
+
+Sobe o app em uma thread local contra um SQLite temporário (ou
+--database-url), com Google e SMTP substituídos por servidores locais,
+e mede vazão e latência (p50/p95/p99) de cada endpoint.
+
+Uso (dentro de backend/):
+    python -m bench.loadtest --requests 500 --concurrency 16 --output resultado.json
+"""
+import argparse
+import json
+import logging
+import os
+import secrets
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fakes import FakeGoogle, FakeSMTP  # noqa: E402
+
+ENDPOINTS = ("cadastrar", "login", "google-login", "esqueceuSenha", "recuperarSenha")
+PASSWORD = "Bench1234"
+
+
+def percentile(sorted_values, pct):
+    """Percentil pelo método nearest-rank"""
+    if not sorted_values:
+        return None
+    index = max(int(round(pct / 100 * len(sorted_values) + 0.5)) - 1, 0)
+    return sorted_values[min(index, len(sorted_values) - 1)]
+
+
+def configure_environment(args, fake_google, fake_smtp):
+    """Configura o ambiente antes de importar o app"""
+    if args.database_url:
+        database_url = args.database_url
+    else:
+        tmp_dir = tempfile.mkdtemp(prefix="auth-bench-")
+        database_url = f"sqlite:///{os.path.join(tmp_dir, 'bench.db')}"
+
+    os.environ.update({
+        "SECRET_KEY": "bench-secret",
+        "JWT_SECRET_KEY": "bench-jwt-secret-com-pelo-menos-32-bytes",
+        "SQLALCHEMY_DATABASE_URI": database_url,
+        "MAIL_SERVER": "127.0.0.1",
+        "MAIL_PORT": str(fake_smtp.port),
+        "MAIL_USE_TLS": "false",
+        "MAIL_DEFAULT_SENDER": "bench@teste.com",
+        "GOOGLE_CLIENT_ID": fake_google.client_id,
+        "GOOGLE_CLIENT_SECRET": "bench-secret",
+        "GOOGLE_REDIRECT_URI": "http://localhost/auth/google/callback",
+        "GOOGLE_CERTS_URL": fake_google.certs_url,
+        "GOOGLE_TOKEN_URL": fake_google.token_url,
+        # Todo o tráfego sai do mesmo IP: o limitador derrubaria o teste
+        "RATELIMIT_ENABLED": "false"
+    })
+
+
+def prepare_data(app, args, fake_google):
+    """Cria usuários, tokens de recuperação e ID tokens usados nos cenários"""
+    from database import db
+    from models import User, ResetToken
+    from auth.utils import hash_reset_token
+    from auth.email_filter import email_filter
+    from werkzeug.security import generate_password_hash
+
+    senha_hash = generate_password_hash(PASSWORD)
+    expires_at = datetime.utcnow() + timedelta(hours=1)
+    n = args.requests
+    # Sufixo por execução: permite rodar de novo contra o mesmo banco
+    run = secrets.token_hex(3)
+
+    with app.app_context():
+        db.session.execute(User.__table__.insert(), [
+            {"nome": f"Bench {i}", "email": f"bench{i}.{run}@teste.com",
+             "senha_hash": senha_hash, "is_google_user": False}
+            for i in range(n)
+        ])
+        db.session.commit()
+        user_ids = [
+            row.id for row in db.session.query(User.id)
+            .filter(User.email.like(f"bench%.{run}@teste.com"))
+            .order_by(User.id)
+        ]
+        db.session.execute(ResetToken.__table__.insert(), [
+            {"user_id": user_id, "token_hash": hash_reset_token(f"reset-{run}-{i}"),
+             "expires_at": expires_at, "created_at": datetime.utcnow()}
+            for i, user_id in enumerate(user_ids)
+        ])
+        db.session.commit()
+        # Inserção em massa não passa pelo ORM: atualiza o filtro de emails já
+        email_filter.sync()
+
+    # Metade dos logins Google cria conta, a outra metade repete o mesmo usuário
+    google_tokens = [
+        fake_google.make_id_token(f"google{i % max(n // 2, 1)}.{run}@gmail.com", name=f"Google {i}")
+        for i in range(n)
+    ]
+
+    return {
+        "cadastrar": lambda i: ("POST", "/cadastrar", {
+            "nome": f"Novo {i}", "email": f"novo{i}.{run}@teste.com",
+            "senha": PASSWORD, "confirmar_senha": PASSWORD
+        }),
+        "login": lambda i: ("POST", "/login", {
+            "email": f"bench{i}.{run}@teste.com", "senha": PASSWORD
+        }),
+        "google-login": lambda i: ("POST", "/google-login", {"token": google_tokens[i]}),
+        "esqueceuSenha": lambda i: ("POST", "/esqueceuSenha", {
+            "email": f"bench{i}.{run}@teste.com"
+        }),
+        "recuperarSenha": lambda i: ("POST", "/recuperarSenha", {
+            "token": f"reset-{run}-{i}", "nova_senha": PASSWORD, "confirmar_senha": PASSWORD
+        })
+    }
+
+
+def run_scenario(base_url, build_request, total, concurrency, headers=None):
+    """Dispara `total` requisições com `concurrency` clientes simultâneos"""
+    local = threading.local()
+    latencies = []
+    statuses = {}
+    lock = threading.Lock()
+
+    def one(i):
+        session = getattr(local, "session", None)
+        if session is None:
+            session = local.session = requests.Session()
+        method, path, body = build_request(i)
+        started = time.perf_counter()
+        try:
+            status = session.request(method, base_url + path, json=body, headers=headers, timeout=60).status_code
+        except requests.RequestException:
+            status = "erro"
+        elapsed = time.perf_counter() - started
+        with lock:
+            latencies.append(elapsed)
+            statuses[str(status)] = statuses.get(str(status), 0) + 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(one, range(total)))
+    duration = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": total,
+        "concurrency": concurrency,
+        "duration_s": round(duration, 4),
+        "throughput_rps": round(total / duration, 2),
+        "latency_ms": {
+            "mean": round(statistics.fmean(latencies) * 1000, 3),
+            "p50": round(percentile(latencies, 50) * 1000, 3),
+            "p95": round(percentile(latencies, 95) * 1000, 3),
+            "p99": round(percentile(latencies, 99) * 1000, 3),
+            "max": round(latencies[-1] * 1000, 3)
+        },
+        "status": statuses
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--endpoints", nargs="+", default=list(ENDPOINTS), choices=ENDPOINTS)
+    parser.add_argument("--requests", type=int, default=200, help="Requisições por endpoint")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--database-url", help="Banco a usar (padrão: SQLite temporário)")
+    parser.add_argument("--output", help="Arquivo JSON com os resultados")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    fake_google = FakeGoogle("bench-client-id").start()
+    fake_smtp = FakeSMTP().start()
+    configure_environment(args, fake_google, fake_smtp)
+
+    from sqlalchemy import create_engine
+    from werkzeug.serving import make_server
+    from app import create_app, start_worker
+    from database import db
+
+    # Schema antes do app: as threads de fundo já consultam as tabelas
+    engine = create_engine(os.environ["SQLALCHEMY_DATABASE_URI"])
+    db.metadata.create_all(engine)
+    engine.dispose()
+    app = create_app()
+    start_worker(app)
+
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)
+
+    scenarios = prepare_data(app, args, fake_google)
+
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_port}"
+
+    results = {
+        "started_at": datetime.utcnow().isoformat() + "Z",
+        "python": sys.version.split()[0],
+        "cpu_count": os.cpu_count(),
+        "database": app.config["SQLALCHEMY_DATABASE_URI"].split(":", 1)[0],
+        "endpoints": {}
+    }
+    try:
+        for name in args.endpoints:
+            result = run_scenario(base_url, scenarios[name], args.requests, args.concurrency)
+            results["endpoints"][name] = result
+            latency = result["latency_ms"]
+            print(
+                f"{name:<16} {result['throughput_rps']:>9.1f} req/s  "
+                f"p50 {latency['p50']:>8.2f} ms  p95 {latency['p95']:>8.2f} ms  "
+                f"p99 {latency['p99']:>8.2f} ms  {result['status']}"
+            )
+    finally:
+        server.shutdown()
+        fake_google.stop()
+        fake_smtp.stop()
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"✅ Resultados salvos em {args.output}")
+    return results
+
+
+if __name__ == "__main__":
+    main()
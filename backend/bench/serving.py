@@ -0,0 +1,170 @@
+"""Servidor de desenvolvimento x gunicorn (gunicorn.conf.py) na mesma máquina.
+
+Cada servidor sobe em um processo próprio contra o mesmo SQLite
+temporário (ou --database-url) e recebe a mesma carga: /login (hash de
+senha), /me (token e cache de perfil) e /.well-known/jwks.json (resposta
+pronta). "dev" é o antigo `python app.py`: app.run(debug=True).
+
+Uso (dentro de backend/):
+    python -m bench.serving --requests 2000 --login-requests 200 --concurrency 16 --output serving.json
+"""
+import argparse
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import requests
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from bench.loadtest import run_scenario  # noqa: E402
+
+EMAIL = "bench@teste.com"
+PASSWORD = "Bench1234"
+
+DEV_SERVER = (
+    "from app import create_app, start_worker; app = create_app(); start_worker(app); "
+    "app.run(debug=True, port={port}, host='127.0.0.1')"
+)
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def environment(database_url):
+    env = dict(os.environ)
+    env.update({
+        "SECRET_KEY": "bench-secret",
+        "JWT_SECRET_KEY": "bench-jwt-secret-com-pelo-menos-32-bytes",
+        "SQLALCHEMY_DATABASE_URI": database_url,
+        "MAIL_SERVER": "127.0.0.1",
+        "MAIL_DEFAULT_SENDER": "bench@teste.com",
+        "OUTBOX_SENDER_ENABLED": "false",
+        # Todo o tráfego sai do mesmo IP: o limitador derrubaria o teste
+        "RATELIMIT_ENABLED": "false",
+        # Mesmo custo de log nos dois servidores (o do werkzeug também sai)
+        "LOG_LEVEL": "WARNING",
+        "GUNICORN_LOG_LEVEL": "warning"
+    })
+    return env
+
+
+def start_server(name, port, env, args):
+    if name == "dev":
+        command = [sys.executable, "-c", DEV_SERVER.format(port=port)]
+    else:
+        command = [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "wsgi:app"]
+        env = dict(env, GUNICORN_BIND=f"127.0.0.1:{port}", WEB_CONCURRENCY=str(args.workers),
+                   GUNICORN_THREADS=str(args.threads))
+    # Sessão própria: o reloader do modo debug cria um processo filho
+    process = subprocess.Popen(
+        command, cwd=BACKEND_DIR, env=env, start_new_session=True,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            if requests.get(base_url + "/.well-known/jwks.json", timeout=1).status_code == 200:
+                return process, base_url
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    stop_server(process)
+    raise RuntimeError(f"Servidor {name} não subiu")
+
+
+def stop_server(process):
+    os.killpg(process.pid, signal.SIGTERM)
+    try:
+        process.wait(30)
+    except subprocess.TimeoutExpired:
+        os.killpg(process.pid, signal.SIGKILL)
+
+
+def prepare_database(database_url):
+    from sqlalchemy import create_engine, insert
+    from werkzeug.security import generate_password_hash
+
+    from database import db
+    from models import User
+
+    engine = create_engine(database_url)
+    db.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(User.__table__.delete().where(User.email == EMAIL))
+        conn.execute(insert(User.__table__), [{
+            "nome": "Bench", "email": EMAIL, "senha_hash": generate_password_hash(PASSWORD),
+            "is_google_user": False
+        }])
+    engine.dispose()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--servers", nargs="+", default=["dev", "gunicorn"], choices=["dev", "gunicorn"])
+    parser.add_argument("--requests", type=int, default=2000, help="Requisições em /me e no JWKS")
+    parser.add_argument("--login-requests", type=int, default=200, help="Requisições em /login")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Workers do gunicorn")
+    parser.add_argument("--threads", type=int, default=4, help="Threads por worker do gunicorn")
+    parser.add_argument("--database-url", help="Banco a usar (padrão: SQLite temporário)")
+    parser.add_argument("--output", help="Arquivo JSON com os resultados")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    database_url = args.database_url or (
+        f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='auth-serving-'), 'bench.db')}"
+    )
+    prepare_database(database_url)
+    env = environment(database_url)
+
+    results = {
+        "started_at": datetime.utcnow().isoformat() + "Z",
+        "python": sys.version.split()[0],
+        "cpu_count": os.cpu_count(),
+        "gunicorn": {"workers": args.workers, "threads": args.threads},
+        "servers": {}
+    }
+    for name in args.servers:
+        process, base_url = start_server(name, free_port(), env, args)
+        try:
+            token = requests.post(base_url + "/login", json={"email": EMAIL, "senha": PASSWORD}).json()["access_token"]
+            scenarios = {
+                "login": (args.login_requests, lambda i: ("POST", "/login", {"email": EMAIL, "senha": PASSWORD}), {}),
+                "me": (args.requests, lambda i: ("GET", "/me", None), {"Authorization": f"Bearer {token}"}),
+                "jwks": (args.requests, lambda i: ("GET", "/.well-known/jwks.json", None), {})
+            }
+            results["servers"][name] = {}
+            for endpoint, (total, build, headers) in scenarios.items():
+                result = run_scenario(base_url, build, total, args.concurrency, headers=headers)
+                results["servers"][name][endpoint] = result
+                latency = result["latency_ms"]
+                print(
+                    f"{name:<9} {endpoint:<6} {result['throughput_rps']:>9.1f} req/s  "
+                    f"p50 {latency['p50']:>8.2f} ms  p99 {latency['p99']:>8.2f} ms  {result['status']}"
+                )
+        finally:
+            stop_server(process)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"✅ Resultados salvos em {args.output}")
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""Tempo de inicialização a frio de um worker.
+
+Cada rodada é um processo Python novo que importa o app, chama
+create_app() e atende a primeira requisição; mede cada etapa e quais
+dependências pesadas já foram carregadas ao final.
+
+Uso (dentro de backend/):
+    python -m bench.startup --runs 10 --output startup.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Módulos que não deveriam ser carregados até o primeiro uso
+LAZY_MODULES = ("requests", "google.auth", "smtplib")
+
+CHILD = """
+import json, sys, time
+started = time.perf_counter()
+from app import create_app, start_worker
+imported = time.perf_counter()
+app = create_app()
+start_worker(app)
+created = time.perf_counter()
+response = app.test_client().post("/login", json={"email": "ninguem@teste.com", "senha": "x"})
+first_request = time.perf_counter()
+print(json.dumps({
+    "import": imported - started,
+    "create_app": created - imported,
+    "first_request": first_request - created,
+    "status": response.status_code,
+    "loaded": [name for name in %r if name in sys.modules]
+}))
+""" % (LAZY_MODULES,)
+
+
+def child_environment(database_url):
+    env = dict(os.environ)
+    env.update({
+        "SECRET_KEY": "bench-secret",
+        "JWT_SECRET_KEY": "bench-jwt-secret-com-pelo-menos-32-bytes",
+        "SQLALCHEMY_DATABASE_URI": database_url,
+        "MAIL_SERVER": "127.0.0.1",
+        "MAIL_DEFAULT_SENDER": "bench@teste.com",
+        "GOOGLE_CLIENT_ID": "bench-client-id",
+        "OUTBOX_SENDER_ENABLED": "false"
+    })
+    return env
+
+
+def run_once(env):
+    """Sobe um processo novo e retorna os tempos (segundos) de cada etapa"""
+    result = subprocess.run(
+        [sys.executable, "-c", CHILD],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def summarize(values):
+    return {
+        "median_ms": round(statistics.median(values) * 1000, 2),
+        "max_ms": round(max(values) * 1000, 2)
+    }
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--database-url", help="Banco existente (padrão: SQLite temporário)")
+    parser.add_argument("--output", help="Grava o resultado em JSON")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    database_url = args.database_url or (
+        f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='auth-startup-'), 'startup.db')}"
+    )
+    env = child_environment(database_url)
+    subprocess.run(
+        [sys.executable, "-m", "flask", "--app", "app", "init-db"],
+        cwd=BACKEND_DIR, env=env, capture_output=True, check=True
+    )
+
+    runs = [run_once(env) for _ in range(args.runs)]
+    result = {
+        "runs": args.runs,
+        "database": database_url.split(":", 1)[0],
+        "python": sys.version.split()[0]
+    }
+    for stage in ("import", "create_app", "first_request"):
+        result[stage] = summarize([run[stage] for run in runs])
+    result["total"] = summarize([run["import"] + run["create_app"] + run["first_request"] for run in runs])
+    result["loaded_lazy_modules"] = sorted({name for run in runs for name in run["loaded"]})
+
+    print(f"{'etapa':<15} {'mediana':>10} {'máximo':>10}")
+    for stage in ("import", "create_app", "first_request", "total"):
+        print(f"{stage:<15} {result[stage]['median_ms']:>8.1f}ms {result[stage]['max_ms']:>8.1f}ms")
+    print(f"módulos lazy carregados: {', '.join(result['loaded_lazy_modules']) or 'nenhum'}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""Listagem de usuários: keyset (page_statement) x OFFSET em várias profundidades.
+
+Popula um SQLite temporário (ou --database-url vazio) com --rows usuários
+e mede o tempo médio de uma página de --limit linhas no início, no meio
+e no fim da tabela, em ordem de id e na busca por prefixo de nome.
+
+Uso (dentro de backend/):
+    python -m bench.user_listing --rows 1000000 --output listagem.json
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+from sqlalchemy import func, insert, select
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app  # noqa: E402
+from auth.admin import USER_COLUMNS, encode_cursor, page_statement  # noqa: E402
+from database import db  # noqa: E402
+from models import User  # noqa: E402
+
+PRIMEIROS_NOMES = ["Ana", "Bruno", "Carla", "Daniel", "Eduarda", "Felipe", "Gabriela", "Henrique", "Isabela", "João"]
+
+
+def populate(rows, batch=50_000):
+    rng = random.Random(42)
+    table = User.__table__
+    for start in range(0, rows, batch):
+        db.session.execute(insert(table), [
+            {
+                "nome": f"{rng.choice(PRIMEIROS_NOMES)} {i:07d}",
+                "email": f"user{i:07d}@exemplo.com",
+                "senha_hash": "x",
+                "is_google_user": False
+            }
+            for i in range(start, min(start + batch, rows))
+        ])
+        db.session.commit()
+
+
+def timed(stmt, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        db.session.execute(stmt).all()
+    return round((time.perf_counter() - started) / repeat * 1000, 3)
+
+
+def offset_statement(limit, offset, q=None):
+    # O que as consultas ad-hoc faziam: mesma ordem, pulando linhas com OFFSET
+    stmt = select(*USER_COLUMNS)
+    if q:
+        key = func.lower(User.nome)
+        stmt = stmt.where(key >= q, key < q[:-1] + chr(ord(q[-1]) + 1)).order_by(key, User.id)
+    else:
+        stmt = stmt.order_by(User.id)
+    return stmt.offset(offset).limit(limit + 1)
+
+
+def keyset_cursor(depth, q=None):
+    """Cursor da página que começa na linha `depth` (o que o cliente teria recebido)"""
+    if depth == 0:
+        return None
+    if not q:
+        key = db.session.execute(select(User.id).order_by(User.id).offset(depth - 1).limit(1)).scalar_one()
+        return encode_cursor([key])
+    row = db.session.execute(
+        offset_statement(0, depth - 1, q).with_only_columns(func.lower(User.nome), User.id)
+    ).one()
+    return encode_cursor(list(row))
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--database-url", help="Banco vazio existente (padrão: SQLite temporário)")
+    parser.add_argument("--output", help="Grava o resultado em JSON")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    database_url = args.database_url or (
+        f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='auth-listing-'), 'listing.db')}"
+    )
+    app = create_app({
+        "SQLALCHEMY_DATABASE_URI": database_url,
+        "OUTBOX_SENDER_ENABLED": False,
+        "EMAIL_FILTER_ENABLED": False
+    })
+    result = {"rows": args.rows, "limit": args.limit, "database": database_url.split(":", 1)[0], "pages": []}
+
+    with app.app_context():
+        db.create_all()
+        started = time.perf_counter()
+        populate(args.rows)
+        result["populate_s"] = round(time.perf_counter() - started, 1)
+
+        # Busca "ana": ~1/10 das linhas; profundidades relativas ao total de cada consulta
+        matches = db.session.execute(
+            select(func.count()).select_from(offset_statement(0, 0, "ana").limit(None).subquery())
+        ).scalar_one()
+        for label, q, total in (("id", None, args.rows), ("nome 'ana'", "ana", matches)):
+            for fraction in (0, 0.5, 0.99):
+                depth = int(total * fraction)
+                cursor = keyset_cursor(depth, q)
+                result["pages"].append({
+                    "ordem": label,
+                    "profundidade": depth,
+                    "keyset_ms": timed(page_statement(args.limit, cursor, q), args.repeat),
+                    "offset_ms": timed(offset_statement(args.limit, depth, q), args.repeat)
+                })
+
+    print(f"{'ordem':<12} {'profundidade':>12} {'keyset ms':>10} {'offset ms':>10}")
+    for page in result["pages"]:
+        print(f"{page['ordem']:<12} {page['profundidade']:>12} {page['keyset_ms']:>10} {page['offset_ms']:>10}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
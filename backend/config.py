@@ -1,22 +1,165 @@
 from dotenv import load_dotenv
+from datetime import timedelta
+from sqlalchemy.engine import make_url
 import os
 
 load_dotenv()
 
+
+def engine_options(uri):
+    """Opções do create_engine a partir do ambiente (DB_*).
+
+    No SQLite só o pre-ping vale; tamanho de pool e timeout de statement
+    são para Postgres/MySQL.
+    """
+    options = {"pool_pre_ping": os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"}
+    if not uri:
+        return options
+    backend = make_url(uri).get_backend_name()
+    if backend == "sqlite":
+        return options
+
+    options.update(
+        pool_size=int(os.getenv("DB_POOL_SIZE", 10)),
+        max_overflow=int(os.getenv("DB_MAX_OVERFLOW", 5)),
+        pool_recycle=int(os.getenv("DB_POOL_RECYCLE", 1800)),
+        pool_timeout=float(os.getenv("DB_POOL_TIMEOUT", 5))
+    )
+    statement_timeout = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", 0))
+    if statement_timeout and backend == "postgresql":
+        options["connect_args"] = {"options": f"-c statement_timeout={statement_timeout}"}
+    elif statement_timeout and backend in ("mysql", "mariadb"):
+        options["connect_args"] = {"init_command": f"SET SESSION max_execution_time={statement_timeout}"}
+    return options
+
+
 class Config:
     SECRET_KEY = os.getenv("SECRET_KEY")
     JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY")
+    JWT_ACCESS_TOKEN_EXPIRES = timedelta(minutes=int(os.getenv("JWT_ACCESS_TOKEN_MINUTES", 15)))
+    JWT_REFRESH_TOKEN_EXPIRES = timedelta(days=int(os.getenv("JWT_REFRESH_TOKEN_DAYS", 30)))
+    # Assinatura assimétrica (RS256/EdDSA): chaves <kid>.pem geradas com `flask auth generate-jwt-key`.
+    # Sem diretório, os tokens continuam HS256 com JWT_SECRET_KEY
+    JWT_KEYS_DIR = os.getenv("JWT_KEYS_DIR")
+    JWT_ACTIVE_KID = os.getenv("JWT_ACTIVE_KID")  # padrão: a chave mais nova
+    # Aceita tokens HS256 antigos durante a migração (desligue depois de JWT_REFRESH_TOKEN_DAYS)
+    JWT_ACCEPT_HS256 = os.getenv("JWT_ACCEPT_HS256", "true").lower() == "true"
+    JWKS_MAX_AGE = int(os.getenv("JWKS_MAX_AGE", 300))
+
+    # Cache em memória da checagem de revogação de access tokens
+    REVOCATION_CACHE_SIZE = int(os.getenv("REVOCATION_CACHE_SIZE", 100_000))
+    REVOCATION_CACHE_TTL = float(os.getenv("REVOCATION_CACHE_TTL", 30))
+
+    # Cache em memória do /me (perfil por user_id)
+    PROFILE_CACHE_SIZE = int(os.getenv("PROFILE_CACHE_SIZE", 10_000))
+    PROFILE_CACHE_TTL = float(os.getenv("PROFILE_CACHE_TTL", 30))
 
     SQLALCHEMY_DATABASE_URI = os.getenv("SQLALCHEMY_DATABASE_URI")
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(SQLALCHEMY_DATABASE_URI)
+    # Réplica de leitura para as buscas por email (login, cadastro, recuperação de senha)
+    SQLALCHEMY_REPLICA_URI = os.getenv("SQLALCHEMY_REPLICA_URI")
+    SQLALCHEMY_BINDS = (
+        {"replica": {"url": SQLALCHEMY_REPLICA_URI, **engine_options(SQLALCHEMY_REPLICA_URI)}}
+        if SQLALCHEMY_REPLICA_URI else {}
+    )
+    # Depois de gravar um usuário, o worker lê o email do primário por este tempo
+    REPLICA_READ_YOUR_WRITES_SECONDS = float(os.getenv("REPLICA_READ_YOUR_WRITES_SECONDS", 5))
+    # Conexões abertas por worker na inicialização (0 = nenhuma)
+    DB_POOL_WARMUP = int(os.getenv("DB_POOL_WARMUP", 2))
 
     GOOGLE_CLIENT_ID = os.getenv("GOOGLE_CLIENT_ID")
     GOOGLE_CLIENT_SECRET = os.getenv("GOOGLE_CLIENT_SECRET")
     GOOGLE_REDIRECT_URI = os.getenv("GOOGLE_REDIRECT_URI")
+    GOOGLE_CERTS_URL = os.getenv("GOOGLE_CERTS_URL", "https://www.googleapis.com/oauth2/v1/certs")
+    GOOGLE_TOKEN_URL = os.getenv("GOOGLE_TOKEN_URL", "https://oauth2.googleapis.com/token")
+    GOOGLE_HTTP_CONNECT_TIMEOUT = float(os.getenv("GOOGLE_HTTP_CONNECT_TIMEOUT", 3))
+    GOOGLE_HTTP_READ_TIMEOUT = float(os.getenv("GOOGLE_HTTP_READ_TIMEOUT", 5))
+    GOOGLE_HTTP_POOL_SIZE = int(os.getenv("GOOGLE_HTTP_POOL_SIZE", 10))
+    # Servidor ASGI (asgi.py): conexões async ao Google e threads para o Flask
+    GOOGLE_ASYNC_MAX_CONNECTIONS = int(os.getenv("GOOGLE_ASYNC_MAX_CONNECTIONS", 100))
+    ASGI_WSGI_THREADS = int(os.getenv("ASGI_WSGI_THREADS", 16))
 
     MAIL_SERVER = os.getenv("MAIL_SERVER")
-    MAIL_PORT = int(os.getenv("MAIL_PORT"))
-    MAIL_USE_TLS = True
+    MAIL_PORT = int(os.getenv("MAIL_PORT", 587))
+    MAIL_USE_TLS = os.getenv("MAIL_USE_TLS", "true").lower() == "true"
     MAIL_USERNAME = os.getenv("MAIL_USERNAME")
     MAIL_PASSWORD = os.getenv("MAIL_PASSWORD")
     MAIL_DEFAULT_SENDER = os.getenv("MAIL_DEFAULT_SENDER")
+
+    # Outbox de emails (envio em segundo plano)
+    OUTBOX_SENDER_ENABLED = os.getenv("OUTBOX_SENDER_ENABLED", "true").lower() == "true"
+    OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", 50))
+    OUTBOX_POLL_INTERVAL = float(os.getenv("OUTBOX_POLL_INTERVAL", 5))
+    OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", 8))
+    OUTBOX_BACKOFF_BASE = float(os.getenv("OUTBOX_BACKOFF_BASE", 10))
+    # Emails enviados ou descartados ficam este tempo (`flask auth purge-outbox`)
+    OUTBOX_RETENTION_DAYS = int(os.getenv("OUTBOX_RETENTION_DAYS", 7))
+
+    # Filtro em memória de emails cadastrados
+    EMAIL_FILTER_ENABLED = os.getenv("EMAIL_FILTER_ENABLED", "true").lower() == "true"
+    EMAIL_FILTER_CAPACITY = int(os.getenv("EMAIL_FILTER_CAPACITY", 1_000_000))
+    EMAIL_FILTER_ERROR_RATE = float(os.getenv("EMAIL_FILTER_ERROR_RATE", 0.001))
+    EMAIL_FILTER_SYNC_INTERVAL = float(os.getenv("EMAIL_FILTER_SYNC_INTERVAL", 1))
+    # Ids menores que o maior já lido são relidos por este tempo (commits fora de ordem)
+    EMAIL_FILTER_GAP_SECONDS = float(os.getenv("EMAIL_FILTER_GAP_SECONDS", 60))
+    # Reconstrução completa periódica (0 = só com `flask auth rebuild-email-filter`)
+    EMAIL_FILTER_REBUILD_INTERVAL = float(os.getenv("EMAIL_FILTER_REBUILD_INTERVAL", 3600))
+
+    # Limite de tentativas ("limite/segundos"); storage "memory://" ou "redis://host:6379/0"
+    RATELIMIT_ENABLED = os.getenv("RATELIMIT_ENABLED", "true").lower() == "true"
+    RATELIMIT_STORAGE_URL = os.getenv("RATELIMIT_STORAGE_URL", "memory://")
+    RATELIMIT_LOGIN_IP = os.getenv("RATELIMIT_LOGIN_IP", "30/60")
+    RATELIMIT_LOGIN_EMAIL = os.getenv("RATELIMIT_LOGIN_EMAIL", "5/60")
+    RATELIMIT_RESET_IP = os.getenv("RATELIMIT_RESET_IP", "10/3600")
+    RATELIMIT_RESET_EMAIL = os.getenv("RATELIMIT_RESET_EMAIL", "3/3600")
+
+    # Proxies confiáveis na frente do app (load balancer, nginx): quantos valores de
+    # X-Forwarded-For/-Proto aceitar. 0 = usa o endereço da conexão (sem proxy), senão
+    # todo cliente teria o IP do proxy no limite por IP e nos logs
+    PROXY_FIX_X_FOR = int(os.getenv("PROXY_FIX_X_FOR", 0))
+    PROXY_FIX_X_PROTO = int(os.getenv("PROXY_FIX_X_PROTO", 0))
+
+    # Logs JSON em segundo plano; sucessos de alto volume são amostrados por rota
+    LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+    LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", 10_000))
+    LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", 1))
+    LOG_SAMPLE_RATES = os.getenv("LOG_SAMPLE_RATES", "/login=0.1,/refresh=0.1,/me=0.01,/google-login=0.1")
+
+    # Idempotency-Key em /cadastrar, /esqueceuSenha e /recuperarSenha; storage "memory://" ou "redis://..."
+    IDEMPOTENCY_ENABLED = os.getenv("IDEMPOTENCY_ENABLED", "true").lower() == "true"
+    IDEMPOTENCY_STORAGE_URL = os.getenv("IDEMPOTENCY_STORAGE_URL", "memory://")
+    IDEMPOTENCY_TTL = int(os.getenv("IDEMPOTENCY_TTL", 86400))
+    IDEMPOTENCY_MAX_KEYS = int(os.getenv("IDEMPOTENCY_MAX_KEYS", 100_000))
+    # Quanto uma duplicata espera a primeira terminar antes de responder 409
+    IDEMPOTENCY_WAIT_TIMEOUT = float(os.getenv("IDEMPOTENCY_WAIT_TIMEOUT", 10))
+    IDEMPOTENCY_LOCK_TTL = float(os.getenv("IDEMPOTENCY_LOCK_TTL", 30))
+
+    # Senhas vazadas recusadas no cadastro e na recuperação de senha
+    # (arquivo gerado por `flask auth build-breached-passwords`; vazio = desligado)
+    BREACHED_PASSWORDS_FILE = os.getenv("BREACHED_PASSWORDS_FILE") or None
+
+    # Profiling sob demanda do auth_bp (ver profiling.py): header X-Profile com o
+    # token ou amostra das rotas listadas; modo "sample" (.folded) ou "cprofile" (.pstats)
+    PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").lower() == "true"
+    PROFILING_MODE = os.getenv("PROFILING_MODE", "sample")
+    PROFILING_TOKEN = os.getenv("PROFILING_TOKEN")
+    PROFILING_SAMPLE_RATE = float(os.getenv("PROFILING_SAMPLE_RATE", 0))
+    PROFILING_ROUTES = [
+        route.strip() for route in os.getenv("PROFILING_ROUTES", "/login,/auth/google/callback").split(",")
+        if route.strip()
+    ]
+    PROFILING_INTERVAL = float(os.getenv("PROFILING_INTERVAL", 0.001))
+    PROFILING_DIR = os.getenv("PROFILING_DIR", "profiles")
+    PROFILING_MAX_FILES = int(os.getenv("PROFILING_MAX_FILES", 100))
+
+    # Endpoint /metrics (formato Prometheus)
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+
+    # Método do werkzeug para novos hashes ("scrypt:N:r:p" ou "pbkdf2:sha256:iterações");
+    # `flask auth calibrate-hash` sugere um valor para esta máquina
+    PASSWORD_HASH_METHOD = os.getenv("PASSWORD_HASH_METHOD", "scrypt:32768:8:1")
+
+    # Pool de processos para hash de senha (0 = executa na thread da requisição)
+    HASH_POOL_SIZE = int(os.getenv("HASH_POOL_SIZE", os.cpu_count() or 1))
+    HASH_QUEUE_DEPTH = int(os.getenv("HASH_QUEUE_DEPTH", 32))
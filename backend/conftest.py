@@ -0,0 +1,156 @@
+import os
+import re
+import tempfile
+
+import pytest
+from sqlalchemy import event
+
+# Configuração de teste antes de importar o app (Config lê o ambiente na importação)
+_tmp_dir = tempfile.mkdtemp(prefix="auth-tests-")
+os.environ["SECRET_KEY"] = "test-secret"
+os.environ["JWT_SECRET_KEY"] = "test-jwt-secret-com-pelo-menos-32-bytes"
+os.environ["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{os.path.join(_tmp_dir, 'test.db')}"
+os.environ["MAIL_SERVER"] = "127.0.0.1"
+os.environ["MAIL_PORT"] = "2525"
+os.environ["MAIL_USE_TLS"] = "false"
+os.environ["MAIL_DEFAULT_SENDER"] = "noreply@teste.com"
+os.environ["GOOGLE_CLIENT_ID"] = "test-client-id"
+os.environ["GOOGLE_CLIENT_SECRET"] = "test-client-secret"
+os.environ["GOOGLE_REDIRECT_URI"] = "http://localhost:5000/auth/google/callback"
+os.environ["HASH_POOL_SIZE"] = "0"
+os.environ["OUTBOX_SENDER_ENABLED"] = "false"
+os.environ["EMAIL_FILTER_ENABLED"] = "false"
+
+
+@pytest.fixture(scope="session")
+def _app():
+    from app import create_app
+
+    return create_app({"TESTING": True})
+
+
+@pytest.fixture
+def app(_app):
+    from auth.idempotency import idempotency
+    from auth.profile_cache import profile_cache
+    from auth.ratelimit import rate_limiter
+    from database import db
+
+    flask_app = _app
+    rate_limiter.init_app(flask_app)
+    idempotency.init_app(flask_app)
+    # Ids se repetem entre testes (banco recriado)
+    profile_cache.clear()
+    with flask_app.app_context():
+        # Só o banco principal: test_replica registra um bind a mais no db
+        db.drop_all(bind_key=None)
+        db.create_all(bind_key=None)
+    yield flask_app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def login():
+    """login(client): cadastra teste@teste.com (se preciso), entra e retorna a resposta de /login"""
+    def login(client):
+        client.post("/cadastrar", json={
+            "nome": "Teste",
+            "email": "teste@teste.com",
+            "senha": "Teste123",
+            "confirmar_senha": "Teste123"
+        })
+        return client.post("/login", json={"email": "teste@teste.com", "senha": "Teste123"}).get_json()
+    return login
+
+
+@pytest.fixture
+def fake_google(app):
+    """Servidor local no lugar do Google (certificados e troca de código)"""
+    from auth.google_client import google_client
+    from fakes import FakeGoogle
+
+    urls = {name: app.config.get(name) for name in ("GOOGLE_CERTS_URL", "GOOGLE_TOKEN_URL")}
+    fake = FakeGoogle(app.config["GOOGLE_CLIENT_ID"]).start()
+    app.config["GOOGLE_CERTS_URL"] = fake.certs_url
+    app.config["GOOGLE_TOKEN_URL"] = fake.token_url
+    google_client.init_app(app)
+    yield fake
+    google_client.shutdown()
+    fake.stop()
+    # O app é da sessão: os próximos testes não podem apontar para o servidor parado
+    app.config.update(urls)
+    google_client.init_app(app)
+
+
+@pytest.fixture
+def filtro(app):
+    """Filtro de emails habilitado, sem a thread de sincronização"""
+    from auth.email_filter import email_filter
+
+    app.config["EMAIL_FILTER_ENABLED"] = True
+    email_filter.init_app(app)
+    email_filter.shutdown()
+    yield email_filter
+    app.config["EMAIL_FILTER_ENABLED"] = False
+    email_filter.init_app(app)
+
+
+class SQLRecorder:
+    """SQL executado nos engines observados, como (nome do engine, statement)"""
+
+    def __init__(self):
+        self.executed = []
+        self._listeners = []
+
+    def watch(self, engine, name="primario"):
+        def listener(conn, cursor, statement, parameters, context, executemany):
+            self.executed.append((name, statement))
+
+        event.listen(engine, "before_cursor_execute", listener)
+        self._listeners.append((engine, listener))
+
+    def clear(self):
+        self.executed.clear()
+
+    def _matching(self, commands, table):
+        pattern = re.compile(rf"\b(FROM|INTO|UPDATE|JOIN)\s+{table}\b", re.I) if table else None
+        for name, statement in self.executed:
+            if commands and not statement.lstrip().upper().startswith(commands):
+                continue
+            if pattern and not pattern.search(statement):
+                continue
+            yield name, statement
+
+    def statements(self, *commands, table=None):
+        """Statements que começam com um dos `commands` (SELECT, INSERT...) e usam `table`"""
+        return [statement for _, statement in self._matching(commands, table)]
+
+    def engines(self, *commands, table=None):
+        """Nome do engine de cada statement filtrado como em statements()"""
+        return [name for name, _ in self._matching(commands, table)]
+
+    def close(self):
+        for engine, listener in self._listeners:
+            event.remove(engine, "before_cursor_execute", listener)
+        self._listeners.clear()
+
+
+@pytest.fixture
+def sql_recorder():
+    recorder = SQLRecorder()
+    yield recorder
+    recorder.close()
+
+
+@pytest.fixture
+def sql(app, sql_recorder):
+    """SQL executado no banco principal do `app` durante o teste"""
+    from database import db
+
+    with app.app_context():
+        sql_recorder.watch(db.engine)
+    return sql_recorder
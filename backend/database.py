@@ -1,3 +1,151 @@
+import logging
+import time
+
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+from cache import LRUCache
+from metrics import Counter, Gauge, Histogram, record_phase
+
+db = SQLAlchemy()
+
+# Bind opcional (SQLALCHEMY_BINDS) para leituras que toleram atraso de replicação
+REPLICA_BIND = "replica"
+
+# Engines por bind ("default" = banco principal), lidos na coleta das métricas
+_engines = {}
+
+
+def _pool_status(method):
+    def collect():
+        status = {}
+        for bind, engine in _engines.items():
+            pool = engine.pool
+            if isinstance(pool, QueuePool):
+                status[(bind,)] = max(getattr(pool, method)(), 0)
+        return status
+    return collect
+
+
+DB_POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out",
+    "Conexões do pool em uso",
+    labelnames=("bind",),
+    function=_pool_status("checkedout")
+)
+DB_POOL_CHECKED_IN = Gauge(
+    "db_pool_checked_in",
+    "Conexões ociosas no pool",
+    labelnames=("bind",),
+    function=_pool_status("checkedin")
+)
+DB_POOL_OVERFLOW = Gauge(
+    "db_pool_overflow",
+    "Conexões abertas além de pool_size",
+    labelnames=("bind",),
+    function=_pool_status("overflow")
+)
+DB_POOL_WAIT = Histogram(
+    "db_pool_wait_seconds",
+    "Tempo para obter uma conexão do pool (inclui abrir uma nova)"
+)
+DB_POOL_TIMEOUTS = Counter(
+    "db_pool_timeouts_total",
+    "Requisições que desistiram de esperar uma conexão (pool_timeout)"
+)
+DB_ROUTED_READS = Counter(
+    "db_routed_reads_total",
+    "Leituras roteáveis para a réplica, por destino (replica, primary, fallback)",
+    labelnames=("target",)
+)
+
+# Chaves (ex.: emails) escritas há pouco neste worker: leem do primário até a réplica alcançar
+recent_writes = LRUCache()
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool que mede a espera por conexão"""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            DB_POOL_TIMEOUTS.inc()
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            DB_POOL_WAIT.observe(elapsed)
+            record_phase("db_pool", elapsed)
+
+
+# Fora do logger "sqlalchemy", o pool registraria cada dispose/recreate em INFO
+logging.getLogger(f"{__name__}.{TimedQueuePool.__name__}").setLevel(logging.WARNING)
+
+
+def init_db(app):
+    """Configura o db no app usando o pool instrumentado"""
+    options = dict(app.config.get("SQLALCHEMY_ENGINE_OPTIONS") or {})
+    # SQLite em memória continua com StaticPool (o Flask-SQLAlchemy sobrescreve)
+    options.setdefault("poolclass", TimedQueuePool)
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = options
+    db.init_app(app)
+    recent_writes.maxsize = app.config.get("REPLICA_RECENT_WRITES_SIZE", 10_000)
+    recent_writes.ttl = app.config.get("REPLICA_READ_YOUR_WRITES_SECONDS", 5)
+    recent_writes.clear()
+    with app.app_context():
+        _engines.clear()
+        _engines.update({bind or "default": engine for bind, engine in db.engines.items()})
+
+
+@event.listens_for(db.session, "after_flush")
+def _mark_session_wrote(session, flush_context):
+    session.info["wrote"] = True
+
+
+def mark_written(key):
+    """Lê `key` do primário pelos próximos REPLICA_READ_YOUR_WRITES_SECONDS"""
+    recent_writes.set(key, True)
+
+
+def read_bind(key=None):
+    """Engine da réplica para uma leitura, ou None para usar o primário.
+
+    Read-your-writes: vai ao primário se não há réplica, se a sessão já
+    escreveu (até o fim da requisição) ou se `key` foi escrita há pouco
+    neste worker. Escritas de outros workers não são vistas aqui: quem
+    chama deve repetir no primário quando a réplica não encontra a linha.
+    """
+    replica = db.engines.get(REPLICA_BIND)
+    if replica is None:
+        return None
+    if db.session.info.get("wrote") or (key is not None and recent_writes.get(key)):
+        DB_ROUTED_READS.inc(target="primary")
+        return None
+    DB_ROUTED_READS.inc(target="replica")
+    return replica
+
+
+def warm_pool(app, connections=None):
+    """Abre conexões antes da primeira requisição do worker.
 
-db = SQLAlchemy()
\ No newline at end of file
+    Deve rodar depois do fork: conexões abertas no processo pai não podem
+    ser compartilhadas com os filhos.
+    """
+    connections = app.config.get("DB_POOL_WARMUP", 0) if connections is None else connections
+    if connections <= 0:
+        return 0
+    with app.app_context():
+        opened = []
+        try:
+            for engine in db.engines.values():
+                pool = engine.pool
+                limit = pool.size() if isinstance(pool, QueuePool) else 1
+                for _ in range(min(connections, limit)):
+                    opened.append(engine.raw_connection())
+        finally:
+            for connection in opened:
+                connection.close()
+    return len(opened)
@@ -0,0 +1,166 @@
+"""Servidores locais que substituem serviços externos em testes e benchmarks"""
+import json
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from google.auth import crypt, jwt as google_jwt
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class FakeGoogle:
+    """Imita os endpoints de certificados e de token do Google.
+
+    Assina ID tokens com uma chave RSA local; `codes` mapeia códigos de
+    autorização para o perfil que o endpoint de token deve devolver.
+    """
+
+    def __init__(self, client_id, max_age=3600):
+        self.client_id = client_id
+        self.max_age = max_age
+        self.key_id = "fake-key-1"
+        self.codes = {}
+        self.certs_requests = 0
+        self.token_requests = 0
+
+        key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        private_pem = key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption()
+        )
+        self.public_pem = key.public_key().public_bytes(
+            serialization.Encoding.PEM,
+            serialization.PublicFormat.SubjectPublicKeyInfo
+        ).decode()
+        self._signer = crypt.RSASigner.from_string(private_pem, key_id=self.key_id)
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    @property
+    def certs_url(self):
+        return f"{self.base_url}/oauth2/v1/certs"
+
+    @property
+    def token_url(self):
+        return f"{self.base_url}/token"
+
+    def make_id_token(self, email, sub=None, name=None, picture=None, aud=None,
+                      iss="https://accounts.google.com", expires_in=3600):
+        """Gera um ID token assinado como o Google faria"""
+        now = int(time.time())
+        payload = {
+            "iss": iss,
+            "aud": aud or self.client_id,
+            "sub": sub or f"google-{email}",
+            "email": email,
+            "iat": now,
+            "exp": now + expires_in
+        }
+        if name:
+            payload["name"] = name
+        if picture:
+            payload["picture"] = picture
+        return google_jwt.encode(self._signer, payload).decode()
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send_json(self, status, body, headers=None):
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                if self.path != "/oauth2/v1/certs":
+                    return self._send_json(404, {"error": "not_found"})
+                fake.certs_requests += 1
+                self._send_json(
+                    200,
+                    {fake.key_id: fake.public_pem},
+                    {"Cache-Control": f"public, max-age={fake.max_age}, must-revalidate"}
+                )
+
+            def do_POST(self):
+                if self.path != "/token":
+                    return self._send_json(404, {"error": "not_found"})
+                fake.token_requests += 1
+                length = int(self.headers.get("Content-Length", 0))
+                form = parse_qs(self.rfile.read(length).decode())
+                profile = fake.codes.get(form.get("code", [""])[0])
+                if profile is None:
+                    return self._send_json(400, {"error": "invalid_grant"})
+                self._send_json(200, {
+                    "access_token": "fake-access-token",
+                    "id_token": fake.make_id_token(**profile),
+                    "token_type": "Bearer",
+                    "expires_in": 3599
+                })
+
+        return Handler
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+class FakeSMTP:
+    """Servidor SMTP local (aiosmtpd) que guarda as mensagens recebidas"""
+
+    def __init__(self):
+        from aiosmtpd.controller import Controller
+
+        self.messages = []
+        self.sessions = 0
+        self.running = False
+        self.port = _free_port()
+        self._controller = Controller(self, hostname="127.0.0.1", port=self.port)
+
+    async def handle_EHLO(self, server, session, envelope, hostname, responses):
+        self.sessions += 1
+        session.host_name = hostname
+        return responses
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages.append(envelope)
+        return "250 Message accepted for delivery"
+
+    def start(self):
+        self._controller.start()
+        self.running = True
+        return self
+
+    def stop(self):
+        if self.running:
+            self._controller.stop()
+            self.running = False
@@ -0,0 +1,60 @@
+"""Configuração do gunicorn para produção: gunicorn -c gunicorn.conf.py wsgi:app
+
+Valores lidos do ambiente, como em config.py. O app é carregado uma vez no
+processo pai (preload) e os workers são criados por fork: o código e o
+que create_app() já montou (chaves, arquivo de senhas vazadas) ficam em
+páginas compartilhadas. Cada worker inicia o próprio trabalho de fundo
+em post_worker_init.
+"""
+import os
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:5000")
+
+# Processos x threads: o hash das senhas roda no pool de processos de cada
+# worker (HASH_POOL_SIZE), então as threads ficam livres para I/O (banco,
+# Google, SMTP). Cada thread usa uma conexão do pool (DB_POOL_SIZE).
+workers = int(os.getenv("WEB_CONCURRENCY", os.cpu_count() or 1))
+worker_class = "gthread"
+threads = int(os.getenv("GUNICORN_THREADS", 4))
+
+preload_app = os.getenv("GUNICORN_PRELOAD", "true").lower() == "true"
+
+# SIGTERM: o worker para de aceitar conexões, termina as requisições em
+# andamento e o trabalho de fundo (worker_exit) em até graceful_timeout
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 30))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", 30))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", 5))
+
+# Reciclagem opcional de workers (0 = desligada)
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", 0))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", 0))
+
+# O app já registra cada requisição (logs.py); o gunicorn só os próprios eventos
+accesslog = None
+errorlog = "-"
+loglevel = os.getenv("GUNICORN_LOG_LEVEL", "info")
+
+
+def when_ready(server):
+    # Pai, depois do preload e antes do fork: sem threads ou conexões abertas,
+    # nenhum worker herda um lock preso ou um socket do banco em uso
+    if server.cfg.preload_app:
+        from app import stop_background
+        from wsgi import app
+
+        stop_background(app)
+
+
+def post_worker_init(worker):
+    # No worker, com o app já carregado (herdado do pai ou importado agora)
+    from app import start_worker
+    from wsgi import app
+
+    start_worker(app)
+
+
+def worker_exit(server, worker):
+    from app import stop_background
+    from wsgi import app
+
+    stop_background(app)
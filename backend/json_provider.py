@@ -0,0 +1,47 @@
+import msgspec
+from flask.json.provider import DefaultJSONProvider
+
+from metrics import phase_timer
+
+
+class MsgspecJSONProvider(DefaultJSONProvider):
+    """Provider JSON do app com msgspec, medindo a serialização como fase "json".
+
+    Serializa dicts, listas e os Structs de auth/schemas.py direto para
+    bytes, sem o json da stdlib. Diferenças do provider padrão: as chaves
+    saem na ordem de declaração (sem sort_keys) e datetime sai em ISO 8601.
+    Chamadas com opções (indent, sort_keys...) usam o json da stdlib, que
+    converte os Structs em default().
+    """
+
+    def __init__(self, app):
+        super().__init__(app)
+        # Tipos que o msgspec não conhece (UUID já é nativo) caem no default do Flask
+        self._encoder = msgspec.json.Encoder(enc_hook=self.default)
+
+    @staticmethod
+    def default(o):
+        if isinstance(o, msgspec.Struct):
+            return msgspec.structs.asdict(o)
+        return DefaultJSONProvider.default(o)
+
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        with phase_timer("json"):
+            return self._encoder.encode(obj).decode()
+
+    def loads(self, s, **kwargs):
+        # msgspec.DecodeError é um ValueError: request.get_json() trata igual
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return msgspec.json.decode(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        with phase_timer("json"):
+            body = self._encoder.encode(obj)
+        if self.compact is False or (self.compact is None and self._app.debug):
+            # Modo debug: indentado, como o provider padrão
+            body = msgspec.json.format(body, indent=2)
+        return self._app.response_class(body, mimetype=self.mimetype)
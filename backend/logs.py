@@ -0,0 +1,213 @@
+"""Logs estruturados (JSON) sem bloquear as requisições.
+
+Os handlers do logger raiz viram um QueueHandler: a requisição só
+formata a mensagem e coloca o registro numa fila limitada; uma thread
+(QueueListener) escreve no stdout. Fila cheia descarta o registro e conta
+em auth_log_dropped_total em vez de esperar.
+
+Eventos de sucesso de alto volume são logados com `extra={"sample": True}`
+e passam pela amostragem por rota (LOG_SAMPLE_RATE / LOG_SAMPLE_RATES);
+avisos e erros nunca são amostrados.
+"""
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+
+from flask import g, has_request_context, request
+
+from metrics import Counter
+
+LOGS_DROPPED = Counter("auth_log_dropped_total", "Registros de log descartados com a fila cheia")
+
+REQUEST_ID_HEADER = "X-Request-ID"
+_VALID_REQUEST_ID = re.compile(r"^[A-Za-z0-9._:-]{1,128}$")
+# Atributos de todo LogRecord; o resto veio de `extra` e vai para o JSON
+_RECORD_FIELDS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+logger = logging.getLogger(__name__)
+
+
+def parse_sample_rates(value):
+    """"/login=0.1,/me=0.01" -> {"/login": 0.1, "/me": 0.01}"""
+    rates = {}
+    for item in filter(None, (part.strip() for part in (value or "").split(","))):
+        route, _, rate = item.partition("=")
+        rates[route.strip()] = float(rate)
+    return rates
+
+
+class JsonFormatter(logging.Formatter):
+    """Uma linha JSON por registro, com os campos passados em `extra`"""
+
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage()
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_FIELDS and key != "sample":
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class ContextFilter(logging.Filter):
+    """Na thread da requisição: anexa request_id/rota e aplica a amostragem"""
+
+    def __init__(self, sample_rate=1.0, sample_rates=None):
+        super().__init__()
+        self.sample_rate = sample_rate
+        self.sample_rates = sample_rates or {}
+
+    def filter(self, record):
+        route = getattr(record, "route", None)
+        if has_request_context():
+            if not hasattr(record, "request_id"):
+                record.request_id = g.get("request_id")
+            if route is None and request.url_rule is not None:
+                route = record.route = request.url_rule.rule
+        if getattr(record, "sample", False) and record.levelno < logging.WARNING:
+            rate = self.sample_rates.get(route, self.sample_rate)
+            return rate >= 1 or random.random() < rate
+        return True
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            LOGS_DROPPED.inc()
+
+    def prepare(self, record):
+        # Mensagem e traceback viram texto aqui; os campos de `extra` seguem para o JSON
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def emit(self, record):
+        log_queue.start()
+        super().emit(record)
+
+
+class LogQueue:
+    """Fila de logs e a thread que escreve no stdout"""
+
+    def __init__(self):
+        self.queue = None
+        self.handler = None
+        self._output = None
+        self._listener = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        config = app.config
+        self.shutdown()
+        self.queue = queue.Queue(maxsize=config.get("LOG_QUEUE_SIZE", 10_000))
+        output = logging.StreamHandler(sys.stdout)
+        output.setFormatter(JsonFormatter())
+        self._output = output
+
+        self.handler = NonBlockingQueueHandler(self.queue)
+        self.handler.addFilter(ContextFilter(
+            config.get("LOG_SAMPLE_RATE", 1.0),
+            parse_sample_rates(config.get("LOG_SAMPLE_RATES"))
+        ))
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            if isinstance(handler, NonBlockingQueueHandler):
+                root.removeHandler(handler)
+        root.addHandler(self.handler)
+        root.setLevel(config.get("LOG_LEVEL", "INFO"))
+        app.extensions["log_queue"] = self
+
+    def start(self):
+        """Inicia a thread de escrita (de novo, se o processo foi clonado por fork).
+
+        Chamado por start_worker e, sob demanda, pelo primeiro registro emitido:
+        init_app não inicia a thread (comandos `flask` e o master do gunicorn
+        com preload também criam o app).
+        """
+        if self._listener is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self.queue is None or (self._listener is not None and self._pid == os.getpid()):
+                return
+            self._pid = os.getpid()
+            self._listener = logging.handlers.QueueListener(self.queue, self._output)
+            self._listener.start()
+
+    def _after_fork_in_child(self):
+        # A fila herdada guarda os waiters da thread do pai, que não existe aqui:
+        # um put() acordaria a thread errada. Os registros pendentes são do pai.
+        self._lock = threading.Lock()
+        self._listener = None
+        if self.queue is not None:
+            self.queue = queue.Queue(maxsize=self.queue.maxsize)
+            self.handler.queue = self.queue
+
+    def shutdown(self):
+        """Para a thread depois de escrever o que está na fila"""
+        with self._lock:
+            if self._listener is not None and self._pid == os.getpid():
+                try:
+                    self._listener.stop()
+                except queue.Full:
+                    pass
+            self._listener = None
+
+
+log_queue = LogQueue()
+atexit.register(log_queue.shutdown)
+os.register_at_fork(after_in_child=log_queue._after_fork_in_child)
+
+
+def _start_request():
+    incoming = request.headers.get(REQUEST_ID_HEADER, "")
+    g.request_id = incoming if _VALID_REQUEST_ID.match(incoming) else uuid.uuid4().hex
+    g.request_started = time.perf_counter()
+
+
+def _finish_request(response):
+    response.headers[REQUEST_ID_HEADER] = g.request_id
+    logger.log(
+        logging.WARNING if response.status_code >= 500 else logging.INFO,
+        "%s %s %s", request.method, request.path, response.status_code,
+        extra={
+            "event": "request",
+            "method": request.method,
+            "status": response.status_code,
+            "duration_ms": round((time.perf_counter() - g.request_started) * 1000, 2),
+            # Sucessos são amostrados; erros sempre aparecem
+            "sample": response.status_code < 400
+        }
+    )
+    return response
+
+
+def init_logging(app):
+    """Configura os logs JSON e o request id (header X-Request-ID) do app"""
+    log_queue.init_app(app)
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
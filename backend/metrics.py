@@ -0,0 +1,268 @@
+"""Métricas em memória no formato texto do Prometheus.
+
+Cada processo tem o próprio registro; com vários workers, cada um expõe
+os seus valores em /metrics.
+"""
+import threading
+import time
+from collections import defaultdict
+
+from flask import Response, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+REGISTRY = []
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    pairs += [f'{name}="{value}"' for name, value in extra]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    type = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._series = {}
+        REGISTRY.append(self)
+
+    def _key(self, labels):
+        return tuple(labels.get(name, "") for name in self.labelnames)
+
+    def _samples(self):
+        raise NotImplementedError
+
+    def render(self):
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type}"
+        ]
+        for suffix, values, extra, value in self._samples():
+            labels = _format_labels(self.labelnames, values, extra)
+            lines.append(f"{self.name}{suffix}{labels} {_format_value(value)}")
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    """Contador que só cresce"""
+    type = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._series[key] = self._series.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._series.get(self._key(labels), 0)
+
+    def _samples(self):
+        with self._lock:
+            items = list(self._series.items())
+        return [("", key, (), value) for key, value in items]
+
+
+class Gauge(_Metric):
+    """Valor instantâneo; com `function`, é lido só na hora da coleta"""
+    type = "gauge"
+
+    def __init__(self, name, documentation, labelnames=(), function=None):
+        super().__init__(name, documentation, labelnames)
+        self.function = function
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._series[self._key(labels)] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._series[key] = self._series.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def _samples(self):
+        if self.function is not None:
+            values = self.function()
+            items = values.items() if isinstance(values, dict) else [((), values)]
+        else:
+            with self._lock:
+                items = list(self._series.items())
+        return [("", key, (), value) for key, value in items]
+
+
+class Histogram(_Metric):
+    """Histograma com buckets fixos (em segundos)"""
+    type = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        """Registra uma observação (em segundos)"""
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = {
+                    "counts": [0] * len(self.buckets),
+                    "count": 0,
+                    "sum": 0.0
+                }
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series["counts"][i] += 1
+                    break
+            series["count"] += 1
+            series["sum"] += value
+
+    def snapshot(self):
+        """Retorna cópia dos valores atuais por combinação de labels"""
+        with self._lock:
+            return {
+                key: {
+                    "counts": list(series["counts"]),
+                    "count": series["count"],
+                    "sum": series["sum"]
+                }
+                for key, series in self._series.items()
+            }
+
+    def _samples(self):
+        samples = []
+        for key, series in self.snapshot().items():
+            cumulative = 0
+            for bound, count in zip(self.buckets, series["counts"]):
+                cumulative += count
+                samples.append(("_bucket", key, (("le", _format_value(float(bound))),), cumulative))
+            samples.append(("_bucket", key, (("le", "+Inf"),), series["count"]))
+            samples.append(("_sum", key, (), series["sum"]))
+            samples.append(("_count", key, (), series["count"]))
+        return samples
+
+
+def render_metrics():
+    """Todas as métricas registradas no formato texto do Prometheus"""
+    return "\n".join(metric.render() for metric in REGISTRY) + "\n"
+
+
+# Requisições do auth_bp e fases de cada uma
+
+AUTH_REQUESTS = Counter(
+    "auth_requests_total",
+    "Requisições atendidas pelo auth_bp",
+    labelnames=("route", "method", "status")
+)
+AUTH_REQUEST_LATENCY = Histogram(
+    "auth_request_duration_seconds",
+    "Latência das requisições do auth_bp",
+    labelnames=("route", "method", "status")
+)
+AUTH_REQUEST_PHASE = Histogram(
+    "auth_request_phase_seconds",
+    "Tempo por fase (db, db_pool, hash, google_http, json, smtp) dentro de cada requisição",
+    labelnames=("route", "phase")
+)
+
+
+def record_phase(phase, seconds):
+    """Soma o tempo de uma fase à requisição atual (ou a 'background' fora dela)"""
+    if has_request_context() and "_metrics_phases" in g:
+        g._metrics_phases[phase] += seconds
+    else:
+        AUTH_REQUEST_PHASE.observe(seconds, route="background", phase=phase)
+
+
+class phase_timer:
+    """Context manager que mede uma fase: `with phase_timer("google_http"): ...`"""
+
+    def __init__(self, phase):
+        self.phase = phase
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed = time.perf_counter() - self.started
+        record_phase(self.phase, self.elapsed)
+
+
+def _route_label():
+    return request.url_rule.rule if request.url_rule is not None else "unmatched"
+
+
+def _start_request():
+    g._metrics_started = time.perf_counter()
+    g._metrics_phases = defaultdict(float)
+
+
+def _finish_request(response):
+    started = g.pop("_metrics_started", None)
+    if started is None:
+        return response
+    route = _route_label()
+    status = str(response.status_code)
+    AUTH_REQUESTS.inc(route=route, method=request.method, status=status)
+    AUTH_REQUEST_LATENCY.observe(
+        time.perf_counter() - started, route=route, method=request.method, status=status
+    )
+    for phase, seconds in g.pop("_metrics_phases").items():
+        AUTH_REQUEST_PHASE.observe(seconds, route=route, phase=phase)
+    return response
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("_metrics_query_started", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["_metrics_query_started"].pop()
+    record_phase("db", time.perf_counter() - started)
+
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(context):
+    stack = context.connection.info.get("_metrics_query_started") if context.connection else None
+    if stack:
+        started = stack.pop()
+        record_phase("db", time.perf_counter() - started)
+
+
+def init_metrics(app, blueprint):
+    """Instrumenta o blueprint e expõe GET /metrics no app.
+
+    Deve ser chamado antes de app.register_blueprint(blueprint). Os hooks
+    ficam no blueprint, então são instalados uma vez só mesmo que o
+    factory crie vários apps.
+    """
+    if _start_request not in blueprint.before_request_funcs.get(None, []):
+        blueprint.before_request(_start_request)
+        blueprint.after_request(_finish_request)
+
+    if app.config.get("METRICS_ENABLED", True):
+        app.add_url_rule(
+            "/metrics",
+            "metrics",
+            lambda: Response(render_metrics(), mimetype="text/plain; version=0.0.4")
+        )
@@ -1,5 +1,7 @@
+from datetime import datetime
+
 from database import db
-from werkzeug.security import generate_password_hash, check_password_hash
+from auth.hashing import password_hasher
 
 class User(db.Model):
     __tablename__ = "users"
@@ -16,19 +18,25 @@ class User(db.Model):
     google_id = db.Column(db.String(200), nullable=True, unique=True)
     picture = db.Column(db.String(500), nullable=True)
     
-    
-    reset_token = db.Column(db.String(128), nullable=True)
-    reset_token_expiry = db.Column(db.DateTime, nullable=True)
-    
     def set_senha(self, senha):
         """Define senha hash (apenas para usuários normais)"""
-        self.senha_hash = generate_password_hash(senha)
+        self.senha_hash = password_hasher.hash(senha)
         
     def check_senha(self, senha):
         """Verifica senha (apenas para usuários normais)"""
         if not self.senha_hash:
             return False
-        return check_password_hash(self.senha_hash, senha)
+        return password_hasher.verify(self.senha_hash, senha)
+
+    def rehash_senha(self, senha):
+        """Refaz o hash com a política atual se o armazenado usa parâmetros antigos.
+
+        Chamar só depois de check_senha ter dado certo; grava no próximo commit.
+        """
+        if not self.senha_hash or not password_hasher.needs_rehash(self.senha_hash):
+            return False
+        self.set_senha(senha)
+        return True
     
     def to_dict(self):
         """Converte usuário para dicionário"""
@@ -38,4 +46,98 @@ class User(db.Model):
             'email': self.email,
             'is_google_user': self.is_google_user,
             'picture': self.picture
-        }
\ No newline at end of file
+        }
+
+
+# Busca por prefixo de nome sem diferenciar maiúsculas, paginada por (nome, id)
+db.Index("ix_users_nome_lower_id", db.func.lower(User.nome), User.id)
+
+
+class Admin(db.Model):
+    """Acesso a /admin, concedido fora da API (`flask auth grant-admin`)"""
+    __tablename__ = "admins"
+    
+    user_id = db.Column(
+        db.Integer,
+        db.ForeignKey("users.id", ondelete="CASCADE"),
+        primary_key=True
+    )
+    granted_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+
+class ResetToken(db.Model):
+    """Token de recuperação de senha (guardado só o hash SHA-256)"""
+    __tablename__ = "reset_tokens"
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(
+        db.Integer,
+        db.ForeignKey("users.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True
+    )
+    token_hash = db.Column(db.String(64), unique=True, nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+
+class RefreshToken(db.Model):
+    """Refresh token emitido; rotacionado a cada uso dentro da mesma família"""
+    __tablename__ = "refresh_tokens"
+    
+    id = db.Column(db.Integer, primary_key=True)
+    jti = db.Column(db.String(36), unique=True, nullable=False)
+    family_id = db.Column(db.String(36), nullable=False, index=True)
+    user_id = db.Column(
+        db.Integer,
+        db.ForeignKey("users.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True
+    )
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+    revoked_at = db.Column(db.DateTime, nullable=True)
+    replaced_by = db.Column(db.String(36), nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+
+class RevokedToken(db.Model):
+    """Access token revogado antes de expirar (ex.: logout)"""
+    __tablename__ = "revoked_tokens"
+    
+    id = db.Column(db.Integer, primary_key=True)
+    jti = db.Column(db.String(36), unique=True, nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+
+
+class EmailFilterRebuild(db.Model):
+    """Pedido de reconstrução do filtro de emails; os workers comparam o maior id"""
+    __tablename__ = "email_filter_rebuilds"
+    
+    id = db.Column(db.Integer, primary_key=True)
+    requested_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+
+class EmailOutbox(db.Model):
+    """Email pendente, gravado na mesma transação que o gerou"""
+    __tablename__ = "email_outbox"
+    __table_args__ = (
+        db.Index("ix_email_outbox_pending", "status", "next_attempt_at"),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    recipient = db.Column(db.String(120), nullable=False)
+    subject = db.Column(db.String(200), nullable=False)
+    html_body = db.Column(db.Text, nullable=False)
+    
+    # pending -> sent | failed
+    status = db.Column(db.String(20), default="pending", nullable=False)
+    attempts = db.Column(db.Integer, default=0, nullable=False)
+    next_attempt_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    last_error = db.Column(db.Text, nullable=True)
+    
+    # Reserva do lote por um processo de envio
+    claim_token = db.Column(db.String(32), nullable=True, index=True)
+    locked_until = db.Column(db.DateTime, nullable=True)
+    
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    sent_at = db.Column(db.DateTime, nullable=True)
@@ -0,0 +1,199 @@
+"""Profiling sob demanda de requisições do auth_bp em produção.
+
+Com PROFILING_ENABLED=false (padrão) nenhum hook é instalado. Ligado, uma
+requisição do auth_bp é perfilada quando traz o header X-Profile com o
+valor de PROFILING_TOKEN, ou quando cai na amostra PROFILING_SAMPLE_RATE
+das rotas de PROFILING_ROUTES. Cada worker perfila uma requisição por vez.
+
+Modos (PROFILING_MODE):
+- "sample": uma thread lê a pilha da requisição a cada PROFILING_INTERVAL
+  segundos e grava stacks no formato collapsed (.folded), para
+  flamegraph.pl ou speedscope;
+- "cprofile": cProfile da requisição inteira, gravado como .pstats
+  (`python -m pstats arquivo` ou snakeviz).
+
+Os arquivos ficam em PROFILING_DIR, que guarda só os PROFILING_MAX_FILES
+mais recentes. Requisições perfiladas pelo header recebem o nome do
+arquivo em X-Profile-Id.
+"""
+import cProfile
+import collections
+import hmac
+import logging
+import os
+import random
+import sys
+import threading
+from datetime import datetime
+
+from flask import current_app, g, request
+
+from metrics import Counter
+
+PROFILE_HEADER = "X-Profile"
+PROFILE_ID_HEADER = "X-Profile-Id"
+_EXTENSIONS = {"sample": ".folded", "cprofile": ".pstats"}
+
+PROFILES_WRITTEN = Counter(
+    "auth_profiles_total",
+    "Requisições perfiladas, por modo e motivo (header ou amostra)",
+    labelnames=("mode", "reason")
+)
+
+logger = logging.getLogger(__name__)
+
+
+class StackSampler:
+    """Amostra a pilha de uma thread a cada `interval` segundos"""
+
+    def __init__(self, thread_id, interval):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = collections.Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="auth-profiler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_qualname} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def dump(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+class RequestProfiler:
+    """Escolhe, perfila e grava as requisições do auth_bp (ver o docstring do módulo)"""
+
+    def __init__(self, config, blueprint_name):
+        self.blueprint_name = blueprint_name
+        self.mode = config.get("PROFILING_MODE", "sample")
+        if self.mode not in _EXTENSIONS:
+            raise ValueError(f"PROFILING_MODE deve ser {' ou '.join(_EXTENSIONS)}")
+        self.token = config.get("PROFILING_TOKEN") or None
+        self.sample_rate = config.get("PROFILING_SAMPLE_RATE", 0.0)
+        self.routes = set(config.get("PROFILING_ROUTES", ()))
+        self.interval = config.get("PROFILING_INTERVAL", 0.001)
+        self.max_files = config.get("PROFILING_MAX_FILES", 100)
+        self.directory = config.get("PROFILING_DIR", "profiles")
+        os.makedirs(self.directory, exist_ok=True)
+        self._busy = threading.Lock()
+
+    def _reason(self):
+        if request.blueprint != self.blueprint_name:
+            return None
+        header = request.headers.get(PROFILE_HEADER)
+        if header is not None and self.token and hmac.compare_digest(header.encode(), self.token.encode()):
+            return "header"
+        if self.sample_rate > 0 and request.url_rule is not None and request.url_rule.rule in self.routes:
+            if random.random() < self.sample_rate:
+                return "sample"
+        return None
+
+    def start(self):
+        reason = self._reason()
+        # Uma por vez: perfis simultâneos se misturariam (e o custo fica limitado)
+        if reason is None or not self._busy.acquire(blocking=False):
+            return
+        if self.mode == "cprofile":
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+            except ValueError:
+                # Outro profiler já ativo no processo
+                self._busy.release()
+                return
+        else:
+            profiler = StackSampler(threading.get_ident(), self.interval)
+            profiler.start()
+        g._profile = (profiler, reason)
+
+    def finish(self):
+        """Para o profiler da requisição atual (se houver) e grava; retorna (nome do arquivo, motivo)"""
+        profile = g.pop("_profile", None)
+        if profile is None:
+            return None, None
+        profiler, reason = profile
+        try:
+            if self.mode == "cprofile":
+                profiler.disable()
+            else:
+                profiler.stop()
+            name = self._write(profiler)
+        except OSError:
+            logger.exception("Falha ao gravar profile", extra={"event": "profile_error"})
+            return None, reason
+        finally:
+            self._busy.release()
+        PROFILES_WRITTEN.inc(mode=self.mode, reason=reason)
+        logger.info("Requisição perfilada", extra={"event": "profile", "file": name, "reason": reason})
+        return name, reason
+
+    def _write(self, profiler):
+        route = request.url_rule.rule if request.url_rule is not None else request.path
+        slug = route.strip("/").replace("/", "_").replace(".", "_") or "root"
+        name = (
+            f"{datetime.now().strftime('%Y%m%dT%H%M%S%f')}-{os.getpid()}-{slug}-"
+            f"{g.get('request_id') or os.urandom(8).hex()}{_EXTENSIONS[self.mode]}"
+        )
+        path = os.path.join(self.directory, name)
+        if self.mode == "cprofile":
+            profiler.dump_stats(path)
+        else:
+            profiler.dump(path)
+        self._trim()
+        return name
+
+    def _trim(self):
+        # Anel: o nome começa pelo horário, então os mais antigos vêm primeiro
+        files = sorted(
+            entry.name for entry in os.scandir(self.directory)
+            if entry.is_file() and entry.name.endswith(tuple(_EXTENSIONS.values()))
+        )
+        for name in files[:max(len(files) - self.max_files, 0)]:
+            try:
+                os.unlink(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass  # removido por outro worker
+
+
+def _start_profile():
+    current_app.extensions["profiler"].start()
+
+
+def _finish_profile(response):
+    name, reason = current_app.extensions["profiler"].finish()
+    if name is not None and reason == "header":
+        response.headers[PROFILE_ID_HEADER] = name
+    return response
+
+
+def _teardown_profile(exc):
+    # Exceção não tratada: after_request não rodou, o profile ainda está aberto
+    if "_profile" in g:
+        current_app.extensions["profiler"].finish()
+
+
+def init_profiling(app, blueprint):
+    """Instala o profiling sob demanda do blueprint no app, se PROFILING_ENABLED"""
+    if not app.config.get("PROFILING_ENABLED", False):
+        return
+    app.extensions["profiler"] = RequestProfiler(app.config, blueprint.name)
+    app.before_request(_start_profile)
+    app.after_request(_finish_profile)
+    app.teardown_request(_teardown_profile)
@@ -0,0 +1,127 @@
+import pytest
+from sqlalchemy import text
+
+from auth.admin import encode_cursor, list_users, page_statement
+from database import db
+from models import User
+from test_tokens import auth
+
+NOMES = ["Ana Souza", "ana lima", "Bruno", "Anabela", "Carla", "ANA Costa", "Beatriz"]
+
+
+@pytest.fixture
+def admin_token(app, client, login):
+    token = login(client)["access_token"]
+    app.test_cli_runner().invoke(args=["auth", "grant-admin", "teste@teste.com"])
+    with app.app_context():
+        db.session.add_all(
+            User(nome=nome, email=f"user{i}@exemplo.com", senha_hash="x") for i, nome in enumerate(NOMES)
+        )
+        db.session.commit()
+    return token
+
+
+def paginas(client, token, **params):
+    vistos, cursor = [], None
+    while True:
+        query = dict(params, **({"cursor": cursor} if cursor else {}))
+        data = client.get("/admin/users", query_string=query, headers=auth(token)).get_json()
+        vistos.append([u["nome"] for u in data["usuarios"]])
+        cursor = data["next_cursor"]
+        if cursor is None:
+            return vistos
+
+
+def test_somente_administradores(app, client, login):
+    token = login(client)["access_token"]
+
+    assert client.get("/admin/users").status_code == 401
+    assert client.get("/admin/users", headers=auth(token)).status_code == 403
+
+
+def test_email_parecido_com_o_do_admin_nao_da_acesso(app, client, admin_token):
+    client.post("/cadastrar", json={
+        "nome": "Intruso", "email": "Teste@Teste.com", "senha": "Teste123", "confirmar_senha": "Teste123"
+    })
+    token = client.post("/login", json={"email": "Teste@Teste.com", "senha": "Teste123"}).get_json()["access_token"]
+
+    assert client.get("/admin/users", headers=auth(token)).status_code == 403
+    assert client.get("/admin/users", headers=auth(admin_token)).status_code == 200
+
+
+def test_comando_revoga_o_acesso(app, client, admin_token):
+    result = app.test_cli_runner().invoke(args=["auth", "grant-admin", "teste@teste.com", "--revoke"])
+
+    assert result.exit_code == 0
+    assert client.get("/admin/users", headers=auth(admin_token)).status_code == 403
+    assert app.test_cli_runner().invoke(args=["auth", "grant-admin", "ninguem@teste.com"]).exit_code == 1
+
+
+def test_lista_por_id_com_keyset(client, admin_token):
+    assert paginas(client, admin_token, limit=3) == [["Teste"] + NOMES[:2], NOMES[2:5], NOMES[5:]]
+
+
+def test_busca_por_prefixo_de_nome_sem_diferenciar_maiusculas(client, admin_token):
+    # Ordem (nome em minúsculas, id): empates no nome desempatados pelo id
+    assert paginas(client, admin_token, q="ANA", limit=2) == [
+        ["ANA Costa", "ana lima"], ["Ana Souza", "Anabela"]
+    ]
+
+
+def test_busca_por_prefixo_de_email(client, admin_token):
+    data = client.get("/admin/users", query_string={"q": "user1", "field": "email"}, headers=auth(admin_token)).get_json()
+    assert [u["email"] for u in data["usuarios"]] == ["user1@exemplo.com"]
+    assert set(data["usuarios"][0]) == {"id", "nome", "email", "is_google_user", "picture"}
+
+
+def test_busca_confere_o_prefixo_dentro_da_faixa(client, admin_token, monkeypatch):
+    # Faixa mais larga que o prefixo, como em collations que ignoram espaços e pontuação
+    monkeypatch.setattr("auth.admin._prefix_end", lambda prefix: "zzz")
+
+    assert paginas(client, admin_token, q="ana") == [["ANA Costa", "ana lima", "Ana Souza", "Anabela"]]
+    assert paginas(client, admin_token, q="user1", field="email") == [["ana lima"]]
+
+
+def test_busca_com_curingas_e_acentos(app, client, admin_token):
+    with app.app_context():
+        db.session.add_all([
+            User(nome="Álvaro", email="alvaro@exemplo.com", senha_hash="x"),
+            User(nome="100% Bruno", email="cem@exemplo.com", senha_hash="x"),
+            User(nome="100 Bruno", email="cemb@exemplo.com", senha_hash="x")
+        ])
+        db.session.commit()
+
+    assert paginas(client, admin_token, q="ÁL") == [["Álvaro"]]
+    assert paginas(client, admin_token, q="100%") == [["100% Bruno"]]
+    assert paginas(client, admin_token, q="_n", field="email") == [[]]
+
+
+def test_parametros_invalidos(client, admin_token):
+    for query in ({"cursor": "nao-e-cursor"}, {"limit": "0"}, {"limit": "abc"}, {"q": "a", "field": "senha"}):
+        assert client.get("/admin/users", query_string=query, headers=auth(admin_token)).status_code == 400
+
+
+def test_cursor_com_tipo_errado(client, admin_token):
+    for query in (
+        {"cursor": encode_cursor(["abc"])},
+        {"cursor": encode_cursor([True])},
+        {"cursor": encode_cursor([1, 2]), "q": "ana"},
+        {"cursor": encode_cursor(["ana", "1"]), "q": "ana"}
+    ):
+        assert client.get("/admin/users", query_string=query, headers=auth(admin_token)).status_code == 400
+
+
+def plano(stmt):
+    sql = stmt.compile(db.engine, compile_kwargs={"literal_binds": True})
+    return " ".join(str(row[-1]) for row in db.session.execute(text(f"EXPLAIN QUERY PLAN {sql}")))
+
+
+def test_paginas_usam_indice_sem_ordenar(app, admin_token):
+    with app.app_context():
+        _, cursor = list_users(limit=1, q="ana")
+        por_nome = plano(page_statement(q="ana", cursor=cursor))
+        por_id = plano(page_statement(cursor=encode_cursor([3])))
+
+    assert "ix_users_nome_lower_id" in por_nome
+    assert "INTEGER PRIMARY KEY" in por_id
+    assert "TEMP B-TREE" not in por_nome + por_id
@@ -0,0 +1,105 @@
+import asyncio
+
+import httpx
+import pytest
+
+from auth.google_async import GoogleASGIApp, async_google_client
+
+
+@pytest.fixture
+def asgi(app):
+    asgi_app = GoogleASGIApp(app, threads=4)
+    yield asgi_app
+    asgi_app.executor.shutdown()
+
+
+def run(asgi_app, scenario):
+    """Executa o cenário com um cliente HTTP apontando para o app ASGI"""
+    async def main():
+        transport = httpx.ASGITransport(app=asgi_app, client=("127.0.0.1", 5000))
+        try:
+            async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as client:
+                return await scenario(client)
+        finally:
+            await async_google_client.aclose()
+
+    return asyncio.run(main())
+
+
+def test_google_login_async_igual_ao_wsgi(client, asgi, fake_google):
+    async def scenario(http):
+        tokens = [fake_google.make_id_token(f"user{i}@gmail.com", name=f"User {i}") for i in range(10)]
+        return await asyncio.gather(*(http.post("/google-login", json={"token": t}) for t in tokens))
+
+    responses = run(asgi, scenario)
+
+    assert [r.status_code for r in responses] == [200] * 10
+    assert all(r.json()["is_new_user"] for r in responses)
+    # Requisições simultâneas dividem uma busca de certificados
+    assert fake_google.certs_requests == 1
+
+    token = fake_google.make_id_token("user0@gmail.com", name="User 0")
+    wsgi_response = client.post("/google-login", json={"token": token})
+    assert wsgi_response.get_json()["usuario"] == responses[0].json()["usuario"]
+
+
+def test_google_login_async_token_invalido(asgi, fake_google):
+    async def scenario(http):
+        token = fake_google.make_id_token("maria@gmail.com", aud="outro-cliente")
+        return await http.post("/google-login", json={"token": token})
+
+    response = run(asgi, scenario)
+
+    assert response.status_code == 401
+    assert response.json() == {"success": False, "error": "Token do Google inválido"}
+
+
+def test_callback_async(asgi, fake_google):
+    fake_google.codes["codigo-valido"] = {"email": "joao@gmail.com", "name": "João"}
+
+    async def scenario(http):
+        return (
+            await http.get("/auth/google/callback?code=codigo-valido"),
+            await http.get("/auth/google/callback?code=invalido")
+        )
+
+    valido, invalido = run(asgi, scenario)
+
+    assert valido.status_code == 302
+    assert "/dashboard#token=" in valido.headers["location"]
+    assert "new_user=true" in valido.headers["location"]
+    assert invalido.status_code == 400
+    assert "invalid_grant" in invalido.json()["error"]
+    assert fake_google.token_requests == 2
+
+
+def test_demais_rotas_passam_pelo_flask(asgi):
+    async def scenario(http):
+        return await http.post("/cadastrar", json={
+            "nome": "Teste", "email": "teste@teste.com", "senha": "Teste123", "confirmar_senha": "Teste123"
+        })
+
+    response = run(asgi, scenario)
+
+    assert response.status_code == 201
+    assert response.json()["success"] is True
+
+
+def test_lifespan_inicia_e_encerra_o_worker(app):
+    eventos = []
+    asgi_app = GoogleASGIApp(
+        app, threads=1, startup=lambda a: eventos.append(("startup", a)), shutdown=lambda a: eventos.append(("shutdown", a))
+    )
+    mensagens = iter([{"type": "lifespan.startup"}, {"type": "lifespan.shutdown"}])
+    enviadas = []
+
+    async def receive():
+        return next(mensagens)
+
+    async def send(message):
+        enviadas.append(message["type"])
+
+    asyncio.run(asgi_app({"type": "lifespan"}, receive, send))
+
+    assert eventos == [("startup", app), ("shutdown", app)]
+    assert enviadas == ["lifespan.startup.complete", "lifespan.shutdown.complete"]
@@ -0,0 +1,61 @@
+import hashlib
+
+import pytest
+
+from auth.breached import BreachedPasswords, build_breached_file, breached_passwords
+
+VAZADAS = ["123456", "password", "Teste123", "senha@2024"]
+
+
+def dump(senhas, count=10):
+    linhas = [f"{hashlib.sha1(s.encode()).hexdigest().upper()}:{count}\n".encode() for s in senhas]
+    return list(reversed(linhas))  # fora de ordem, como o dump ordenado por ocorrências
+
+
+@pytest.mark.parametrize("width", [20, 8])
+def test_busca_no_arquivo_gerado(tmp_path, width):
+    path = tmp_path / "vazadas.bin"
+    linhas = dump(VAZADAS) + dump(VAZADAS[:1]) + [b"lixo\n", b"\n"]
+
+    # chunk_size pequeno: exercita a ordenação em blocos e a intercalação
+    assert build_breached_file(linhas, str(path), width=width, chunk_size=2) == len(VAZADAS)
+
+    checker = BreachedPasswords()
+    checker.load(str(path))
+    assert checker.count == len(VAZADAS)
+    assert all(senha in checker for senha in VAZADAS)
+    assert "uma senha bem diferente" not in checker
+    assert path.stat().st_size == 8 + width * len(VAZADAS)
+
+
+def test_contagem_minima(tmp_path):
+    path = tmp_path / "vazadas.bin"
+    build_breached_file(dump(["rara"], count=1) + dump(["comum"], count=50), str(path), min_count=10)
+
+    checker = BreachedPasswords()
+    checker.load(str(path))
+    assert "comum" in checker and "rara" not in checker
+
+
+def test_arquivo_invalido(tmp_path):
+    path = tmp_path / "vazadas.bin"
+    path.write_bytes(b"nao e o formato")
+
+    with pytest.raises(ValueError):
+        BreachedPasswords().load(str(path))
+
+
+def test_cadastro_e_recuperacao_recusam_senha_vazada(client, tmp_path, monkeypatch):
+    path = tmp_path / "vazadas.bin"
+    build_breached_file(dump(["Teste123"]), str(path))
+    monkeypatch.setattr(breached_passwords, "_table", None)
+    breached_passwords.load(str(path))
+
+    cadastro = {"nome": "Teste", "email": "teste@teste.com", "senha": "Teste123", "confirmar_senha": "Teste123"}
+    recuperacao = {"token": "qualquer", "nova_senha": "Teste123", "confirmar_senha": "Teste123"}
+
+    for rota, corpo in (("/cadastrar", cadastro), ("/recuperarSenha", recuperacao)):
+        response = client.post(rota, json=corpo)
+        assert response.status_code == 400
+        assert "vazamentos" in response.get_json()["error"]
+    assert client.post("/cadastrar", json=dict(cadastro, senha="Outra123", confirmar_senha="Outra123")).status_code == 201
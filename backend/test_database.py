@@ -0,0 +1,62 @@
+from sqlalchemy import create_engine, inspect, text
+
+import database
+from config import engine_options
+from database import DB_POOL_CHECKED_OUT, DB_POOL_WAIT, TimedQueuePool, db, warm_pool
+
+
+def test_opcoes_do_engine_vem_do_ambiente(monkeypatch):
+    monkeypatch.setenv("DB_POOL_SIZE", "20")
+    monkeypatch.setenv("DB_MAX_OVERFLOW", "0")
+    monkeypatch.setenv("DB_STATEMENT_TIMEOUT_MS", "3000")
+
+    options = engine_options("postgresql://user:senha@db/auth")
+
+    assert options["pool_size"] == 20
+    assert options["max_overflow"] == 0
+    assert options["pool_pre_ping"] is True
+    assert options["connect_args"] == {"options": "-c statement_timeout=3000"}
+    # SQLite não aceita as opções de pool
+    assert engine_options("sqlite:///auth.db") == {"pool_pre_ping": True}
+
+
+def test_pool_instrumentado_e_aquecido(app):
+    with app.app_context():
+        engine = db.engine
+    assert isinstance(engine.pool, TimedQueuePool)
+
+    waits = DB_POOL_WAIT.snapshot().get((), {"count": 0})["count"]
+    assert warm_pool(app, connections=2) == 2
+    assert engine.pool.checkedin() >= 2
+    assert DB_POOL_WAIT.snapshot()[()]["count"] == waits + 2
+
+    with engine.connect():
+        assert DB_POOL_CHECKED_OUT.function()[("default",)] == 1
+    assert DB_POOL_CHECKED_OUT.function()[("default",)] == 0
+
+
+def test_init_db_em_banco_novo_e_em_banco_existente(app, tmp_path):
+    from app import create_app
+
+    url = f"sqlite:///{tmp_path / 'novo.db'}"
+    engines = dict(database._engines)
+    try:
+        runner = create_app({"TESTING": True, "SQLALCHEMY_DATABASE_URI": url}).test_cli_runner()
+        assert runner.invoke(args=["init-db"]).exit_code == 0
+
+        # Banco de uma versão anterior: tabela existente, sem o índice novo
+        engine = create_engine(url)
+        with engine.begin() as conn:
+            conn.execute(text("DROP INDEX ix_users_nome_lower_id"))
+        for _ in range(2):
+            result = runner.invoke(args=["init-db"])
+            assert result.exit_code == 0, result.output
+        with engine.connect() as conn:
+            indexes = conn.execute(text("SELECT name FROM sqlite_master WHERE type = 'index'")).scalars().all()
+        tables = inspect(engine).get_table_names()
+        engine.dispose()
+        assert "ix_users_nome_lower_id" in indexes
+        assert "admins" in tables
+    finally:
+        database._engines.clear()
+        database._engines.update(engines)
@@ -0,0 +1,131 @@
+from auth.email_filter import BloomFilter, normalize_email, request_rebuild
+from database import db
+from models import User
+
+
+def test_bloom_sem_falso_negativo_e_taxa_proxima_do_alvo():
+    bloom = BloomFilter(10_000, 0.01)
+    for i in range(10_000):
+        bloom.add(f"usuario{i}@teste.com")
+
+    assert all(f"usuario{i}@teste.com" in bloom for i in range(10_000))
+    falsos = sum(f"outro{i}@teste.com" in bloom for i in range(10_000))
+    assert falsos / 10_000 < 0.02
+
+
+def test_email_normalizado():
+    assert normalize_email("  Maria@Gmail.COM ") == "maria@gmail.com"
+
+
+def test_login_de_email_inexistente_nao_consulta_o_banco(app, client, filtro, sql):
+    with app.app_context():
+        filtro.build()
+    sql.clear()
+
+    response = client.post("/login", json={"email": "ninguem@teste.com", "senha": "x"})
+
+    assert response.status_code == 401
+    assert sql.statements(table="users") == []
+    assert filtro.stats()["definite_misses"] == 1
+
+
+def test_cadastro_atualiza_o_filtro(app, client, filtro):
+    with app.app_context():
+        filtro.build()
+
+    client.post("/cadastrar", json={
+        "nome": "Teste",
+        "email": "Teste@Teste.com",
+        "senha": "Teste123",
+        "confirmar_senha": "Teste123"
+    })
+
+    assert filtro.might_exist("teste@teste.com")
+    response = client.post("/login", json={"email": "Teste@Teste.com", "senha": "Teste123"})
+    assert response.status_code == 200
+
+
+def test_sync_enxerga_insercoes_de_outro_processo(app, filtro):
+    with app.app_context():
+        filtro.build()
+        # Simula outro worker: insere sem passar pelo ORM deste processo
+        db.session.execute(User.__table__.insert().values(
+            nome="Outro", email="outro@teste.com", is_google_user=False
+        ))
+        db.session.commit()
+        assert not filtro.might_exist("outro@teste.com")
+
+        filtro.sync()
+
+    assert filtro.might_exist("outro@teste.com")
+
+
+def inserir(user_id, email):
+    # Como outro worker: sem passar pelo ORM deste processo
+    db.session.execute(User.__table__.insert().values(
+        id=user_id, nome="Outro", email=email, is_google_user=False
+    ))
+    db.session.commit()
+
+
+def test_sync_enxerga_id_menor_confirmado_depois(app, client, filtro):
+    with app.app_context():
+        inserir(1, "a@teste.com")
+        filtro.build()
+        inserir(5, "e@teste.com")
+        filtro.sync()
+        # Id reservado antes do 5, confirmado só agora
+        inserir(4, "d@teste.com")
+        filtro.sync()
+
+    assert filtro.might_exist("d@teste.com")
+    assert client.post("/cadastrar", json={
+        "nome": "D", "email": "d@teste.com", "senha": "Teste123", "confirmar_senha": "Teste123"
+    }).status_code == 409
+
+
+def test_cadastro_duplicado_que_o_filtro_nao_viu_responde_409(app, client, filtro):
+    with app.app_context():
+        filtro.build()
+        inserir(1, "outro@teste.com")
+
+    response = client.post("/cadastrar", json={
+        "nome": "Outro", "email": "outro@teste.com", "senha": "Teste123", "confirmar_senha": "Teste123"
+    })
+
+    assert response.status_code == 409
+    assert response.get_json()["error"] == "Email já cadastrado"
+
+
+def test_comando_de_reconstrucao(app, filtro):
+    with app.app_context():
+        db.session.add(User(nome="Teste", email="teste@teste.com"))
+        db.session.commit()
+
+    result = app.test_cli_runner().invoke(args=["auth", "rebuild-email-filter"])
+
+    assert result.exit_code == 0
+    assert "Reconstrução 1 pedida" in result.output
+    assert "items: 1" in result.output
+    assert "estimated_fp_rate" in result.output
+
+
+def test_worker_reconstroi_quando_pedido(app, client, filtro):
+    with app.app_context():
+        db.session.add(User(nome="Teste", email="teste@teste.com"))
+        db.session.commit()
+        filtro.build()
+        # Some do filtro deste worker (ex.: lacuna que já expirou)
+        filtro._filter = BloomFilter(10, 0.01)
+        filtro.sync()
+        assert not filtro.might_exist("teste@teste.com")
+
+        request_rebuild()
+        filtro.sync()
+
+    assert filtro.might_exist("teste@teste.com")
+    client.post("/login", json={"email": "ninguem@teste.com", "senha": "x"})
+    metrics = client.get("/metrics").get_data(as_text=True)
+    assert "email_filter_items 1" in metrics
+    assert "email_filter_lookups 3" in metrics
+    assert "email_filter_definite_misses 2" in metrics
@@ -0,0 +1,51 @@
+
+def test_certificados_ficam_em_cache(client, fake_google):
+    for _ in range(3):
+        token = fake_google.make_id_token("maria@gmail.com", name="Maria")
+        response = client.post("/google-login", json={"token": token})
+        assert response.status_code == 200
+
+    assert fake_google.certs_requests == 1
+
+
+def test_certificados_expirados_sao_buscados_de_novo(client, fake_google):
+    fake_google.max_age = 0
+    for _ in range(2):
+        token = fake_google.make_id_token("maria@gmail.com")
+        assert client.post("/google-login", json={"token": token}).status_code == 200
+
+    assert fake_google.certs_requests == 2
+
+
+def test_token_de_outro_cliente_e_rejeitado(client, fake_google):
+    token = fake_google.make_id_token("maria@gmail.com", aud="outro-cliente")
+    response = client.post("/google-login", json={"token": token})
+
+    assert response.status_code == 401
+
+
+def test_token_de_outro_emissor_e_rejeitado(client, fake_google):
+    token = fake_google.make_id_token("maria@gmail.com", iss="https://evil.example.com")
+    response = client.post("/google-login", json={"token": token})
+
+    assert response.status_code == 401
+
+
+def test_callback_troca_codigo_e_redireciona(client, fake_google):
+    fake_google.codes["codigo-valido"] = {"email": "joao@gmail.com", "name": "João"}
+
+    response = client.get("/auth/google/callback?code=codigo-valido")
+
+    assert response.status_code == 302
+    assert "/dashboard#token=" in response.headers["Location"]
+    assert "new_user=true" in response.headers["Location"]
+    # Nada de token na query string (logs de acesso, Referer)
+    assert "?" not in response.headers["Location"]
+    assert fake_google.token_requests == 1
+
+
+def test_callback_com_codigo_invalido(client, fake_google):
+    response = client.get("/auth/google/callback?code=invalido")
+
+    assert response.status_code == 400
+    assert "invalid_grant" in response.get_json()["error"]
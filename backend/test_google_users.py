@@ -0,0 +1,138 @@
+import pytest
+
+import auth.google_users as google_users
+from auth.google_users import PasswordAccountExistsError, upsert_google_user
+from database import db
+from models import User
+
+
+def perfil(**kwargs):
+    id_info = {"sub": "google-1", "email": "maria@gmail.com", "name": "Maria", "picture": "p.png"}
+    id_info.update(kwargs)
+    return id_info
+
+
+def escritas(sql):
+    return len(sql.statements("INSERT", "UPDATE", table="users"))
+
+
+def test_cria_e_nao_escreve_quando_perfil_igual(app, sql):
+    with app.app_context():
+        user, is_new = upsert_google_user(perfil())
+        db.session.commit()
+        assert is_new and user.id
+        assert escritas(sql) == 1
+
+        user, is_new = upsert_google_user(perfil())
+        db.session.commit()
+        assert not is_new
+        assert escritas(sql) == 1
+
+
+def test_atualiza_perfil_alterado_com_uma_escrita(app, sql):
+    with app.app_context():
+        upsert_google_user(perfil())
+        db.session.commit()
+
+        user, is_new = upsert_google_user(perfil(name="Maria Silva", picture="nova.png"))
+        db.session.commit()
+
+        assert not is_new
+        assert (user.nome, user.picture) == ("Maria Silva", "nova.png")
+        assert escritas(sql) == 2
+        assert db.session.get(User, user.id).nome == "Maria Silva"
+
+
+def test_conta_com_senha_nao_e_alterada(app):
+    with app.app_context():
+        db.session.add(User(nome="Maria", email="maria@gmail.com", senha_hash="x"))
+        db.session.commit()
+
+        with pytest.raises(PasswordAccountExistsError):
+            upsert_google_user(perfil())
+
+
+def test_corrida_com_outra_requisicao_nao_quebra_unique(app, monkeypatch):
+    with app.app_context():
+        upsert_google_user(perfil())
+        db.session.commit()
+        db.session.expunge_all()
+
+        # Simula a leitura feita antes de outra requisição inserir o usuário
+        monkeypatch.setattr(google_users, "find_user_by_email", lambda email: None)
+        user, is_new = upsert_google_user(perfil())
+        db.session.commit()
+
+        assert not is_new
+        assert User.query.count() == 1
+
+
+def test_leitura_atrasada_com_perfil_alterado_nao_e_usuario_novo(app, client, monkeypatch):
+    with app.app_context():
+        upsert_google_user(perfil())
+        db.session.commit()
+    # A réplica (ou uma requisição concorrente) ainda não tinha o usuário
+    monkeypatch.setattr(google_users, "find_user_by_email", lambda email: None)
+    monkeypatch.setattr("auth.routes.google_client.verify_id_token", lambda token: perfil(name="Maria Silva"))
+
+    data = client.post("/google-login", json={"token": "qualquer"}).get_json()
+
+    assert data["is_new_user"] is False
+    assert data["message"] == "Login com Google realizado com sucesso"
+    assert data["usuario"]["nome"] == "Maria Silva"
+    with app.app_context():
+        assert User.query.count() == 1
+
+
+@pytest.mark.parametrize("on_conflict", [True, False])
+def test_mesmo_google_id_com_email_novo_atualiza_a_conta(app, monkeypatch, on_conflict):
+    if not on_conflict:
+        monkeypatch.setattr(google_users, "_upsert_statement", lambda: None)
+    with app.app_context():
+        criado, _ = upsert_google_user(perfil())
+        db.session.commit()
+
+        user, is_new = upsert_google_user(perfil(email="maria.silva@gmail.com"))
+        db.session.commit()
+
+        assert not is_new
+        assert (user.id, user.email) == (criado.id, "maria.silva@gmail.com")
+        assert User.query.count() == 1
+
+
+def test_google_id_de_outra_conta_retorna_409(app, client, monkeypatch):
+    with app.app_context():
+        upsert_google_user(perfil())
+        upsert_google_user(perfil(sub="google-2", email="outra@gmail.com"))
+        db.session.commit()
+    monkeypatch.setattr("auth.routes.google_client.verify_id_token", lambda token: perfil(sub="google-2"))
+
+    response = client.post("/google-login", json={"token": "qualquer"})
+
+    assert response.status_code == 409
+    with app.app_context():
+        assert [u.google_id for u in User.query.order_by(User.id)] == ["google-1", "google-2"]
+
+
+def test_caminho_generico_sem_on_conflict(app, monkeypatch):
+    monkeypatch.setattr(google_users, "_upsert_statement", lambda: None)
+    with app.app_context():
+        user, is_new = upsert_google_user(perfil())
+        db.session.commit()
+        assert is_new
+
+        user, is_new = upsert_google_user(perfil(name="Outra"))
+        db.session.commit()
+        assert not is_new and user.nome == "Outra"
+        assert User.query.count() == 1
+
+
+def test_endpoint_retorna_409_para_conta_com_senha(app, client, monkeypatch):
+    with app.app_context():
+        db.session.add(User(nome="Maria", email="maria@gmail.com", senha_hash="x"))
+        db.session.commit()
+    monkeypatch.setattr("auth.routes.google_client.verify_id_token", lambda token: perfil())
+
+    response = client.post("/google-login", json={"token": "qualquer"})
+
+    assert response.status_code == 409
@@ -0,0 +1,125 @@
+import os
+import signal
+
+import pytest
+from flask import Flask
+
+from werkzeug.security import generate_password_hash
+
+from auth.hashing import PasswordHasher, HashingBusyError, HASH_DURATION, HASH_POOL_RESTARTS, PASSWORD_REHASHED
+from auth.hashing import calibrate, normalize_method, password_hasher
+from database import db
+from models import User
+
+
+def test_hash_e_verificacao_no_pool_de_processos():
+    app = Flask(__name__)
+    app.config.update(HASH_POOL_SIZE=1, HASH_QUEUE_DEPTH=0)
+    hasher = PasswordHasher(app)
+    try:
+        senha_hash = hasher.hash("Teste123")
+        assert hasher.verify(senha_hash, "Teste123")
+        assert not hasher.verify(senha_hash, "errada")
+    finally:
+        hasher.shutdown()
+
+    series = HASH_DURATION.snapshot()
+    assert series[("hash",)]["count"] >= 1
+    assert series[("verify",)]["count"] >= 2
+
+
+def test_pool_recriado_quando_um_processo_morre():
+    app = Flask(__name__)
+    app.config.update(HASH_POOL_SIZE=1, HASH_QUEUE_DEPTH=0)
+    hasher = PasswordHasher(app)
+    restarts = HASH_POOL_RESTARTS.value()
+    try:
+        senha_hash = hasher.hash("Teste123")
+        for pid in list(hasher._executor._processes):
+            os.kill(pid, signal.SIGKILL)
+
+        assert hasher.verify(senha_hash, "Teste123")
+        assert hasher.verify(senha_hash, "Teste123")
+    finally:
+        hasher.shutdown()
+
+    assert HASH_POOL_RESTARTS.value() == restarts + 1
+
+
+def test_pool_usa_spawn_sem_forkserver(monkeypatch):
+    # Windows: só spawn
+    monkeypatch.setattr("multiprocessing.get_all_start_methods", lambda: ["spawn"])
+    app = Flask(__name__)
+    app.config.update(HASH_POOL_SIZE=1, HASH_QUEUE_DEPTH=0)
+    hasher = PasswordHasher(app)
+    try:
+        assert hasher.verify(hasher.hash("Teste123"), "Teste123")
+        assert hasher._executor._mp_context.get_start_method() == "spawn"
+    finally:
+        hasher.shutdown()
+
+
+def test_fila_cheia_rejeita_imediatamente():
+    app = Flask(__name__)
+    app.config.update(HASH_POOL_SIZE=1, HASH_QUEUE_DEPTH=0)
+    hasher = PasswordHasher(app)
+    hasher._slots.acquire()
+    try:
+        with pytest.raises(HashingBusyError):
+            hasher.hash("Teste123")
+    finally:
+        hasher._slots.release()
+        hasher.shutdown()
+
+
+def test_login_retorna_503_quando_fila_cheia(client, monkeypatch):
+    client.post("/cadastrar", json={
+        "nome": "Teste",
+        "email": "teste@teste.com",
+        "senha": "Teste123",
+        "confirmar_senha": "Teste123"
+    })
+
+    def ocupado(*args):
+        raise HashingBusyError()
+
+    monkeypatch.setattr(password_hasher, "verify", ocupado)
+    response = client.post("/login", json={"email": "teste@teste.com", "senha": "Teste123"})
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+    assert response.get_json()["success"] is False
+
+
+def test_metodo_normalizado_igual_ao_prefixo_do_hash():
+    assert normalize_method("scrypt") == "scrypt:32768:8:1"
+    assert normalize_method("pbkdf2") == "pbkdf2:sha256:1000000"
+    assert normalize_method("pbkdf2:sha256:600000") == "pbkdf2:sha256:600000"
+    senha_hash = generate_password_hash("x", method="scrypt:16384:8:1")
+    assert senha_hash.startswith(normalize_method("scrypt:16384:8:1") + "$")
+
+
+def test_login_refaz_hash_com_parametros_antigos(app, client):
+    with app.app_context():
+        user = User(nome="Antigo", email="antigo@teste.com")
+        user.senha_hash = generate_password_hash("Teste123", method="pbkdf2:sha256:10000")
+        db.session.add(user)
+        db.session.commit()
+
+    rehashed = PASSWORD_REHASHED.value()
+    for _ in range(2):
+        response = client.post("/login", json={"email": "antigo@teste.com", "senha": "Teste123"})
+        assert response.status_code == 200
+
+    assert PASSWORD_REHASHED.value() == rehashed + 1
+    with app.app_context():
+        senha_hash = User.query.filter_by(email="antigo@teste.com").one().senha_hash
+    assert senha_hash.startswith(password_hasher.method + "$")
+
+
+def test_calibracao_pbkdf2_respeita_o_alvo():
+    method, elapsed = calibrate("pbkdf2", target=0.02)
+
+    assert method.startswith("pbkdf2:sha256:")
+    assert int(method.rsplit(":", 1)[1]) % 10_000 == 0
+    assert elapsed < 0.1
@@ -0,0 +1,107 @@
+import threading
+import time
+
+from flask import jsonify
+
+from auth.hashing import password_hasher
+from auth.idempotency import MemoryStorage, idempotency
+from models import EmailOutbox, ResetToken, User
+
+CADASTRO = {"nome": "Teste", "email": "teste@teste.com", "senha": "Teste123", "confirmar_senha": "Teste123"}
+
+
+def chave(valor="chave-0001"):
+    return {"Idempotency-Key": valor}
+
+
+def test_cadastro_repetido_devolve_a_mesma_resposta_sem_novo_hash(app, client, monkeypatch):
+    hashes = []
+    original = password_hasher.hash
+    monkeypatch.setattr(password_hasher, "hash", lambda senha: hashes.append(senha) or original(senha))
+
+    primeira = client.post("/cadastrar", json=CADASTRO, headers=chave())
+    segunda = client.post("/cadastrar", json=CADASTRO, headers=chave())
+
+    assert primeira.status_code == segunda.status_code == 201
+    assert segunda.get_json() == primeira.get_json()
+    assert segunda.headers["Idempotent-Replayed"] == "true"
+    assert len(hashes) == 1
+    # Sem a chave, a repetição é um cadastro novo (e falha)
+    assert client.post("/cadastrar", json=CADASTRO).status_code == 409
+    with app.app_context():
+        assert User.query.count() == 1
+
+
+def test_esqueceu_senha_repetido_nao_gera_outro_token_nem_email(app, client):
+    client.post("/cadastrar", json=CADASTRO)
+
+    for _ in range(3):
+        response = client.post("/esqueceuSenha", json={"email": CADASTRO["email"]}, headers=chave())
+        assert response.status_code == 200
+
+    with app.app_context():
+        assert ResetToken.query.count() == 1
+        assert EmailOutbox.query.count() == 1
+
+
+def test_mesma_chave_com_outro_corpo_e_recusada(client):
+    client.post("/esqueceuSenha", json={"email": "a@teste.com"}, headers=chave())
+
+    response = client.post("/esqueceuSenha", json={"email": "b@teste.com"}, headers=chave())
+
+    assert response.status_code == 422
+
+
+def test_chave_invalida(client):
+    response = client.post("/cadastrar", json=CADASTRO, headers=chave("curta"))
+    assert response.status_code == 400
+
+
+def test_duplicatas_simultaneas_esperam_a_primeira(app):
+    execucoes = []
+    liberar = threading.Event()
+    respostas = []
+
+    def view():
+        execucoes.append(1)
+        liberar.wait(5)
+        return jsonify({"success": True, "n": len(execucoes)}), 201
+
+    def requisicao():
+        with app.test_request_context("/cadastrar", method="POST", json={"x": 1}):
+            respostas.append(app.make_response(idempotency.handle("chave-0001", view)))
+
+    threads = [threading.Thread(target=requisicao) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    while not execucoes:
+        time.sleep(0.01)
+    liberar.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert len(execucoes) == 1
+    assert [r.status_code for r in respostas] == [201] * 4
+    assert {r.get_json()["n"] for r in respostas} == {1}
+
+
+def test_erro_do_servidor_nao_fica_guardado(app):
+    status = iter([500, 200])
+
+    def view():
+        return jsonify({"success": True}), next(status)
+
+    with app.test_request_context("/cadastrar", method="POST", json={}):
+        assert app.make_response(idempotency.handle("chave-0001", view)).status_code == 500
+        assert app.make_response(idempotency.handle("chave-0001", view)).status_code == 200
+
+
+def test_memoria_limitada():
+    storage = MemoryStorage(maxsize=2)
+    for i in range(5):
+        storage.begin(f"k{i}", lock_ttl=30)
+        storage.complete(f"k{i}", b"x", ttl=60)
+
+    assert len(storage) == 2
+    assert storage.begin("k4", lock_ttl=30) == ("done", b"x")
+    assert storage.begin("k0", lock_ttl=30) == ("owner", None)
@@ -0,0 +1,97 @@
+import threading
+
+import jwt
+import pytest
+from werkzeug.serving import make_server
+
+from auth.keys import generate_key, load_signing_keys
+from auth.verifier import TokenVerifier
+from test_tokens import auth
+
+
+@pytest.fixture
+def chaves(app, tmp_path, monkeypatch):
+    """App assinando com RS256; volta ao HS256 do conftest no fim"""
+    monkeypatch.setitem(app.config, "JWT_KEYS_DIR", str(tmp_path))
+    antiga = generate_key(tmp_path, "RS256")
+    load_signing_keys(app)
+    yield tmp_path, antiga
+    monkeypatch.undo()
+    load_signing_keys(app)
+
+
+@pytest.fixture
+def servidor(app):
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+
+
+def test_token_rs256_com_kid_e_jwks_com_cache(client, chaves, login):
+    _, kid = chaves
+    token = login(client)["access_token"]
+
+    header = jwt.get_unverified_header(token)
+    assert (header["alg"], header["kid"]) == ("RS256", kid)
+    assert client.get("/me", headers=auth(token)).status_code == 200
+
+    response = client.get("/.well-known/jwks.json")
+    assert response.headers["Cache-Control"] == "public, max-age=300"
+    [jwk] = response.get_json()["keys"]
+    assert (jwk["kid"], jwk["alg"], jwk["use"]) == (kid, "RS256", "sig")
+    assert "d" not in jwk
+
+    cached = client.get("/.well-known/jwks.json", headers={"If-None-Match": response.headers["ETag"]})
+    assert cached.status_code == 304
+
+
+def test_rotacao_mantem_tokens_da_chave_antiga(app, client, chaves, login):
+    keys_dir, antiga = chaves
+    token_antigo = login(client)["access_token"]
+
+    nova = generate_key(keys_dir, "EdDSA")
+    load_signing_keys(app)
+    token_novo = client.post("/login", json={"email": "teste@teste.com", "senha": "Teste123"}).get_json()["access_token"]
+
+    assert jwt.get_unverified_header(token_novo) == {"alg": "EdDSA", "kid": nova, "typ": "JWT"}
+    assert client.get("/me", headers=auth(token_antigo)).status_code == 200
+    assert client.get("/me", headers=auth(token_novo)).status_code == 200
+    kids = [jwk["kid"] for jwk in client.get("/.well-known/jwks.json").get_json()["keys"]]
+    assert kids == [antiga, nova]
+
+
+def test_hs256_antigo_aceito_so_durante_migracao(app, client, tmp_path, monkeypatch, login):
+    token = login(client)["access_token"]
+    assert "kid" not in jwt.get_unverified_header(token)
+
+    generate_key(tmp_path, "EdDSA")
+    monkeypatch.setitem(app.config, "JWT_KEYS_DIR", str(tmp_path))
+    try:
+        load_signing_keys(app)
+        assert client.get("/me", headers=auth(token)).status_code == 200
+
+        monkeypatch.setitem(app.config, "JWT_ACCEPT_HS256", False)
+        load_signing_keys(app)
+        assert client.get("/me", headers=auth(token)).status_code == 422
+    finally:
+        monkeypatch.undo()
+        load_signing_keys(app)
+
+
+def test_verifier_valida_offline_com_jwks_em_cache(client, chaves, servidor, login):
+    data = login(client)
+    verifier = TokenVerifier(f"{servidor}/.well-known/jwks.json")
+
+    payload = verifier.verify(data["access_token"])
+    assert payload["sub"] and payload["type"] == "access"
+
+    # Chaves em memória: continua validando sem o servidor
+    verifier._client.uri = "http://127.0.0.1:9/indisponivel"
+    assert verifier.verify(data["access_token"])["sub"] == payload["sub"]
+
+    with pytest.raises(jwt.InvalidTokenError):
+        verifier.verify(data["refresh_token"])
+    with pytest.raises(jwt.InvalidTokenError):
+        verifier.verify(data["access_token"][:-4] + "AAAA")
@@ -0,0 +1,70 @@
+import json
+import logging
+import queue
+
+from flask import g
+
+from logs import LOGS_DROPPED, ContextFilter, JsonFormatter, NonBlockingQueueHandler, parse_sample_rates
+
+
+def handler_de_teste(maxsize=100, **kwargs):
+    handler = NonBlockingQueueHandler(queue.Queue(maxsize=maxsize))
+    handler.addFilter(ContextFilter(**kwargs))
+    logger = logging.getLogger("teste.logs")
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    logger.handlers = [handler]
+    return logger, handler.queue
+
+
+def test_request_id_gerado_ou_repassado(client):
+    gerado = client.get("/.well-known/jwks.json").headers["X-Request-ID"]
+    assert len(gerado) == 32
+
+    repassado = client.get("/.well-known/jwks.json", headers={"X-Request-ID": "lb-123.abc"})
+    assert repassado.headers["X-Request-ID"] == "lb-123.abc"
+
+    invalido = client.get("/.well-known/jwks.json", headers={"X-Request-ID": "x" * 200})
+    assert invalido.headers["X-Request-ID"] != "x" * 200
+
+
+def test_registro_json_com_request_id_rota_e_extra(app):
+    logger, fila = handler_de_teste()
+
+    with app.test_request_context("/me"):
+        app.preprocess_request()
+        request_id = g.request_id
+        try:
+            raise ValueError("falhou")
+        except ValueError:
+            logger.exception("Erro em %s", "teste", extra={"event": "erro", "user_id": 7})
+
+    entry = json.loads(JsonFormatter().format(fila.get_nowait()))
+    assert entry["msg"] == "Erro em teste"
+    assert entry["level"] == "ERROR"
+    assert (entry["event"], entry["user_id"]) == ("erro", 7)
+    assert (entry["request_id"], entry["route"]) == (request_id, "/me")
+    assert "ValueError: falhou" in entry["exc"]
+
+
+def test_amostragem_so_para_sucessos_marcados(app):
+    logger, fila = handler_de_teste(sample_rate=1.0, sample_rates=parse_sample_rates("/me=0"))
+
+    with app.test_request_context("/me"):
+        app.preprocess_request()
+        logger.info("sucesso", extra={"sample": True})
+        logger.info("evento importante")
+        logger.warning("aviso", extra={"sample": True})
+
+    assert [fila.get_nowait().msg for _ in range(fila.qsize())] == ["evento importante", "aviso"]
+
+
+def test_fila_cheia_descarta_sem_bloquear():
+    logger, fila = handler_de_teste(maxsize=1)
+    antes = LOGS_DROPPED.value()
+
+    logger.info("primeiro")
+    logger.info("segundo")
+
+    assert fila.qsize() == 1
+    assert LOGS_DROPPED.value() == antes + 1
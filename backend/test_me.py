@@ -0,0 +1,46 @@
+from test_tokens import auth
+
+
+def test_me_exige_token(client):
+    assert client.get("/me").status_code == 401
+
+
+def test_me_retorna_usuario_com_etag(client, login):
+    headers = auth(login(client)["access_token"])
+
+    response = client.get("/me", headers=headers)
+
+    assert response.status_code == 200
+    assert response.get_json()["usuario"]["email"] == "teste@teste.com"
+    assert response.headers["ETag"]
+    assert response.headers["Cache-Control"] == "private, no-cache"
+
+
+def test_if_none_match_responde_304_sem_consultar_o_banco(client, sql, login):
+    headers = auth(login(client)["access_token"])
+    etag = client.get("/me", headers=headers).headers["ETag"]
+    sql.clear()
+
+    response = client.get("/me", headers={**headers, "If-None-Match": etag})
+
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+    assert response.data == b""
+    assert sql.statements() == []
+
+
+def test_login_google_com_perfil_alterado_invalida_o_cache(client, monkeypatch):
+    perfil = {"sub": "google-1", "email": "maria@gmail.com", "name": "Maria", "picture": ""}
+    monkeypatch.setattr("auth.routes.google_client.verify_id_token", lambda token: dict(perfil))
+
+    data = client.post("/google-login", json={"token": "t"}).get_json()
+    headers = {"Authorization": f"Bearer {data['access_token']}"}
+    etag = client.get("/me", headers=headers).headers["ETag"]
+
+    perfil["name"] = "Maria Silva"
+    client.post("/google-login", json={"token": "t"})
+    response = client.get("/me", headers={**headers, "If-None-Match": etag})
+
+    assert response.status_code == 200
+    assert response.get_json()["usuario"]["nome"] == "Maria Silva"
+    assert response.headers["ETag"] != etag
@@ -0,0 +1,49 @@
+from metrics import AUTH_REQUESTS, Counter, Histogram, REGISTRY
+
+
+def test_formato_texto_do_prometheus():
+    counter = Counter("teste_eventos_total", "Eventos de teste", labelnames=("tipo",))
+    histogram = Histogram("teste_duracao_seconds", "Duração de teste", buckets=(0.1, 1.0))
+    try:
+        counter.inc(tipo='a"b')
+        histogram.observe(0.05)
+        histogram.observe(0.5)
+
+        assert counter.render().splitlines() == [
+            "# HELP teste_eventos_total Eventos de teste",
+            "# TYPE teste_eventos_total counter",
+            'teste_eventos_total{tipo="a\\"b"} 1'
+        ]
+        assert histogram.render().splitlines()[2:] == [
+            'teste_duracao_seconds_bucket{le="0.1"} 1',
+            'teste_duracao_seconds_bucket{le="1.0"} 2',
+            'teste_duracao_seconds_bucket{le="+Inf"} 2',
+            "teste_duracao_seconds_sum 0.55",
+            "teste_duracao_seconds_count 2"
+        ]
+    finally:
+        REGISTRY.remove(counter)
+        REGISTRY.remove(histogram)
+
+
+def test_login_registra_contador_latencia_e_fases(client):
+    client.post("/cadastrar", json={
+        "nome": "Teste",
+        "email": "teste@teste.com",
+        "senha": "Teste123",
+        "confirmar_senha": "Teste123"
+    })
+    antes = AUTH_REQUESTS.value(route="/login", method="POST", status="200")
+
+    client.post("/login", json={"email": "teste@teste.com", "senha": "Teste123"})
+
+    assert AUTH_REQUESTS.value(route="/login", method="POST", status="200") == antes + 1
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.mimetype == "text/plain"
+    body = response.get_data(as_text=True)
+    assert 'auth_request_duration_seconds_count{route="/login",method="POST",status="200"}' in body
+    for phase in ("db", "hash", "json"):
+        assert f'auth_request_phase_seconds_count{{route="/login",phase="{phase}"}}' in body
+    assert "password_hash_duration_seconds_bucket" in body
@@ -0,0 +1,107 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from auth.outbox import outbox_sender
+from database import db
+from fakes import FakeSMTP
+from auth.utils import purge_finished_emails
+from models import EmailOutbox
+
+
+@pytest.fixture
+def fake_smtp(app):
+    pytest.importorskip("aiosmtpd")
+    smtp = FakeSMTP().start()
+    app.config["MAIL_PORT"] = smtp.port
+    outbox_sender.init_app(app)
+    yield smtp
+    outbox_sender.shutdown()
+    smtp.stop()
+
+
+def cadastrar(client, email="teste@teste.com"):
+    client.post("/cadastrar", json={
+        "nome": "Teste",
+        "email": email,
+        "senha": "Teste123",
+        "confirmar_senha": "Teste123"
+    })
+
+
+def test_esqueceu_senha_grava_email_na_outbox(app, client):
+    cadastrar(client)
+
+    response = client.post("/esqueceuSenha", json={"email": "teste@teste.com"})
+
+    assert response.status_code == 200
+    with app.app_context():
+        message = EmailOutbox.query.one()
+        assert message.recipient == "teste@teste.com"
+        assert message.status == "pending"
+        assert "recuperar?token=" in message.html_body
+
+
+def test_lote_enviado_em_uma_conexao(app, client, fake_smtp):
+    for i in range(3):
+        cadastrar(client, f"teste{i}@teste.com")
+        client.post("/esqueceuSenha", json={"email": f"teste{i}@teste.com"})
+
+    with app.app_context():
+        assert outbox_sender.drain() == 3
+        assert EmailOutbox.query.filter_by(status="sent").count() == 3
+        # O link com o token só existe no email entregue
+        assert {m.html_body for m in EmailOutbox.query} == {""}
+
+    assert len(fake_smtp.messages) == 3
+    assert b"recuperar?token=" in fake_smtp.messages[0].content
+    assert fake_smtp.sessions == 1
+    assert fake_smtp.messages[0].rcpt_tos == ["teste0@teste.com"]
+
+
+def test_falha_de_smtp_reagenda_com_backoff(app, client, fake_smtp):
+    cadastrar(client)
+    client.post("/esqueceuSenha", json={"email": "teste@teste.com"})
+    fake_smtp.stop()
+
+    with app.app_context():
+        outbox_sender.drain()
+        message = EmailOutbox.query.one()
+        assert message.status == "pending"
+        assert message.attempts == 1
+        assert message.next_attempt_at > datetime.utcnow()
+        assert message.claim_token is None
+
+        # Ainda não chegou a hora da próxima tentativa
+        assert outbox_sender.send_pending() == 0
+
+
+def test_desiste_apos_maximo_de_tentativas(app, client, fake_smtp):
+    cadastrar(client)
+    client.post("/esqueceuSenha", json={"email": "teste@teste.com"})
+    fake_smtp.stop()
+    outbox_sender.max_attempts = 1
+
+    with app.app_context():
+        outbox_sender.drain()
+        message = EmailOutbox.query.one()
+        assert message.status == "failed"
+        assert message.html_body == ""
+
+
+def test_limpeza_de_emails_finalizados(app):
+    antigo = datetime.utcnow() - timedelta(days=8)
+    with app.app_context():
+        for i, status in enumerate(["sent"] * 5 + ["failed", "pending"]):
+            db.session.add(EmailOutbox(
+                recipient=f"t{i}@teste.com", subject="s", html_body="", status=status, next_attempt_at=antigo
+            ))
+        db.session.add(EmailOutbox(recipient="novo@teste.com", subject="s", html_body="", status="sent"))
+        db.session.commit()
+
+        assert purge_finished_emails(retention_days=7, batch_size=2) == 6
+        assert sorted(m.status for m in EmailOutbox.query.all()) == ["pending", "sent"]
+
+    result = app.test_cli_runner().invoke(args=["auth", "purge-outbox", "--days", "0"])
+    assert result.exit_code == 0
+    assert "1 emails removidos" in result.output
@@ -0,0 +1,81 @@
+import pstats
+import threading
+import time
+
+import pytest
+
+import database
+from profiling import PROFILE_ID_HEADER, StackSampler, _start_profile
+
+JWKS = "/.well-known/jwks.json"
+
+
+@pytest.fixture
+def profiling_app(tmp_path):
+    """App com profiling ligado, gravando em tmp_path"""
+    from app import create_app
+
+    engines = dict(database._engines)
+
+    def factory(**config):
+        return create_app({
+            "TESTING": True,
+            "PROFILING_ENABLED": True,
+            "PROFILING_DIR": str(tmp_path),
+            "PROFILING_TOKEN": "segredo-de-teste",
+            **config
+        })
+
+    yield factory
+    database._engines.clear()
+    database._engines.update(engines)
+
+
+def test_desligado_nao_instala_hooks(app):
+    assert "profiler" not in app.extensions
+    assert _start_profile not in app.before_request_funcs.get(None, [])
+
+
+def test_header_autorizado_grava_pstats(profiling_app, tmp_path):
+    client = profiling_app(PROFILING_MODE="cprofile").test_client()
+
+    assert PROFILE_ID_HEADER not in client.get(JWKS, headers={"X-Profile": "errado"}).headers
+    assert list(tmp_path.iterdir()) == []
+
+    name = client.get(JWKS, headers={"X-Profile": "segredo-de-teste"}).headers[PROFILE_ID_HEADER]
+    assert name.endswith(".pstats")
+    funcoes = {func for _, _, func in pstats.Stats(str(tmp_path / name)).stats}
+    assert "jwks" in funcoes
+
+
+def test_amostra_das_rotas_em_anel_limitado(profiling_app, tmp_path):
+    client = profiling_app(
+        PROFILING_SAMPLE_RATE=1.0, PROFILING_ROUTES=[JWKS], PROFILING_MAX_FILES=2
+    ).test_client()
+
+    for _ in range(4):
+        # Amostra não expõe o arquivo para quem fez a requisição
+        assert PROFILE_ID_HEADER not in client.get(JWKS).headers
+    client.post("/refresh")  # fora de PROFILING_ROUTES: não entra na amostra
+
+    arquivos = sorted(path.name for path in tmp_path.iterdir())
+    assert len(arquivos) == 2
+    assert all("well-known_jwks_json" in nome and nome.endswith(".folded") for nome in arquivos)
+
+
+def test_stack_sampler_em_formato_collapsed(tmp_path):
+    def ocupado():
+        fim = time.perf_counter() + 0.1
+        while time.perf_counter() < fim:
+            pass
+
+    sampler = StackSampler(threading.get_ident(), 0.001)
+    sampler.start()
+    ocupado()
+    sampler.stop()
+    sampler.dump(tmp_path / "perfil.folded")
+
+    linhas = (tmp_path / "perfil.folded").read_text().splitlines()
+    assert linhas
+    stack, count = linhas[0].rsplit(" ", 1)
+    assert "ocupado (test_profiling.py:" in stack.split(";")[-1] and int(count) > 0
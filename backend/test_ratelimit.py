@@ -0,0 +1,86 @@
+import pytest
+
+import database
+from auth.ratelimit import MemoryStorage, RedisStorage, rate_limiter
+
+
+def test_janela_deslizante_pondera_a_janela_anterior():
+    storage = MemoryStorage()
+    for _ in range(4):
+        storage.hit("k", 60, now=119.0)
+
+    # Na metade da janela seguinte, as 4 anteriores ainda pesam 2
+    assert storage.hit("k", 60, now=150.0) == pytest.approx(3.0)
+    # Duas janelas depois, o histórico some
+    assert storage.hit("k", 60, now=300.0) == 1
+
+
+def test_eviccao_remove_chaves_antigas():
+    storage = MemoryStorage(eviction_interval=0)
+    storage.hit("antiga", 60, now=0.0)
+    storage.hit("nova", 60, now=600.0)
+
+    assert len(storage) == 1
+
+
+def test_login_bloqueado_por_email_antes_do_banco(app, client, sql):
+    app.config["RATELIMIT_LOGIN_EMAIL"] = "2/60"
+    rate_limiter.init_app(app)
+
+    for _ in range(2):
+        client.post("/login", json={"email": "alvo@teste.com", "senha": "x"})
+    sql.clear()
+
+    response = client.post("/login", json={"email": " ALVO@teste.com", "senha": "x"})
+
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+    assert sql.statements() == []
+    assert client.post("/login", json={"email": "outro@teste.com", "senha": "x"}).status_code == 401
+
+
+def test_esqueceu_senha_limitado_por_ip(app, client):
+    app.config["RATELIMIT_RESET_IP"] = "2/3600"
+    rate_limiter.init_app(app)
+
+    for i in range(2):
+        assert client.post("/esqueceuSenha", json={"email": f"u{i}@teste.com"}).status_code == 200
+
+    assert client.post("/esqueceuSenha", json={"email": "u9@teste.com"}).status_code == 429
+
+
+def test_storage_redis_compartilhado_entre_instancias():
+    fakeredis = pytest.importorskip("fakeredis")
+    server = fakeredis.FakeServer()
+    worker_a = RedisStorage(fakeredis.FakeRedis(server=server))
+    worker_b = RedisStorage(fakeredis.FakeRedis(server=server))
+
+    worker_a.hit("login:ip:1.2.3.4:60", 60, now=10.0)
+    worker_a.hit("login:ip:1.2.3.4:60", 60, now=11.0)
+
+    assert worker_b.hit("login:ip:1.2.3.4:60", 60, now=12.0) == 3
+    assert worker_b.hit("login:ip:1.2.3.4:60", 60, now=90.0) == pytest.approx(1 + 3 * 30 / 60)
+
+
+def test_ip_do_cliente_atras_de_proxy_confiavel(app):
+    from app import create_app
+
+    engines = dict(database._engines)
+    try:
+        client = create_app({
+            "TESTING": True, "PROXY_FIX_X_FOR": 1, "RATELIMIT_LOGIN_IP": "2/60", "RATELIMIT_LOGIN_EMAIL": None
+        }).test_client()
+
+        def login(ip):
+            return client.post("/login", json={"email": "alvo@teste.com", "senha": "x"}, headers={
+                "X-Forwarded-For": ip
+            }).status_code
+
+        assert [login("203.0.113.1") for _ in range(3)] == [401, 401, 429]
+        # Mesmo proxy (remote_addr), outro cliente: contagem própria
+        assert login("203.0.113.2") == 401
+        # Só o último salto é confiável: o valor forjado pelo cliente é ignorado
+        assert login("198.51.100.9, 203.0.113.1") == 429
+    finally:
+        database._engines.clear()
+        database._engines.update(engines)
@@ -0,0 +1,109 @@
+import pytest
+from sqlalchemy import insert, select
+
+import database
+from database import DB_ROUTED_READS, db, recent_writes
+from models import User
+
+
+@pytest.fixture
+def replica_app(tmp_path):
+    """App com primário e réplica em dois arquivos SQLite; a "replicação" é manual"""
+    from app import create_app
+
+    engines = dict(database._engines)
+    app = create_app({
+        "TESTING": True,
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'primario.db'}",
+        "SQLALCHEMY_BINDS": {"replica": f"sqlite:///{tmp_path / 'replica.db'}"}
+    })
+    with app.app_context():
+        db.create_all()
+        db.metadata.create_all(db.engines["replica"])
+    yield app
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose()
+    # Métricas do pool voltam para o app dos outros testes
+    database._engines.clear()
+    database._engines.update(engines)
+
+
+def replicar(app):
+    """Copia os usuários do primário para a réplica"""
+    with app.app_context():
+        rows = [dict(row._mapping) for row in db.session.execute(select(User.__table__))]
+        with db.engines["replica"].begin() as conn:
+            conn.execute(User.__table__.delete())
+            if rows:
+                conn.execute(insert(User.__table__), rows)
+
+
+@pytest.fixture
+def sql_replica(replica_app, sql_recorder):
+    """SQL executado no primário e na réplica"""
+    with replica_app.app_context():
+        sql_recorder.watch(db.engines[None], "primario")
+        sql_recorder.watch(db.engines["replica"], "replica")
+    return sql_recorder
+
+
+def selects(sql):
+    """Engine ("primario"/"replica") de cada SELECT em users"""
+    return sql.engines("SELECT", table="users")
+
+
+def test_busca_por_email_vai_para_a_replica(replica_app, sql_replica, login):
+    client = replica_app.test_client()
+    login(client)  # cadastro grava no primário
+    replicar(replica_app)
+    recent_writes.clear()
+    sql_replica.clear()
+
+    response = client.post("/login", json={"email": "teste@teste.com", "senha": "Teste123"})
+
+    assert response.status_code == 200
+    assert selects(sql_replica) == ["replica"]
+
+
+def test_cadastro_recente_le_do_primario(replica_app, sql_replica, login):
+    client = replica_app.test_client()
+    # Réplica atrasada: ainda com a senha antiga
+    login(client)
+    replicar(replica_app)
+    with replica_app.app_context():
+        user = User.query.filter_by(email="teste@teste.com").one()
+        user.set_senha("NovaSenha123")
+        db.session.commit()
+    sql_replica.clear()
+
+    response = client.post("/login", json={"email": "teste@teste.com", "senha": "NovaSenha123"})
+
+    assert response.status_code == 200
+    assert selects(sql_replica) == ["primario"]
+
+    # Passada a janela, a réplica volta a ser usada (e ainda está atrasada)
+    recent_writes.clear()
+    response = client.post("/login", json={"email": "teste@teste.com", "senha": "NovaSenha123"})
+    assert response.status_code == 401
+
+
+def test_email_ausente_na_replica_confirma_no_primario(replica_app, sql_replica, login):
+    client = replica_app.test_client()
+    login(client)
+    # Cadastro feito por outro worker e ainda não replicado
+    recent_writes.clear()
+    sql_replica.clear()
+    fallback = DB_ROUTED_READS.value(target="fallback")
+
+    response = client.post("/login", json={"email": "teste@teste.com", "senha": "Teste123"})
+
+    assert response.status_code == 200
+    assert selects(sql_replica) == ["replica", "primario"]
+    assert DB_ROUTED_READS.value(target="fallback") == fallback + 1
+
+
+def test_sem_replica_tudo_no_primario(app, client, login):
+    replica = DB_ROUTED_READS.value(target="replica")
+    login(client)
+    assert DB_ROUTED_READS.value(target="replica") == replica
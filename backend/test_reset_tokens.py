@@ -0,0 +1,92 @@
+import re
+from datetime import datetime, timedelta
+
+from auth.utils import hash_reset_token, purge_expired_reset_tokens
+from database import db
+from models import EmailOutbox, ResetToken, User
+
+
+def solicitar_token(app, client, email="teste@teste.com"):
+    client.post("/cadastrar", json={
+        "nome": "Teste",
+        "email": email,
+        "senha": "Teste123",
+        "confirmar_senha": "Teste123"
+    })
+    client.post("/esqueceuSenha", json={"email": email})
+    with app.app_context():
+        html = EmailOutbox.query.order_by(EmailOutbox.id.desc()).first().html_body
+    return re.search(r"token=([0-9a-f]+)", html).group(1)
+
+
+def recuperar(client, token, senha="Nova1234"):
+    return client.post("/recuperarSenha", json={
+        "token": token,
+        "nova_senha": senha,
+        "confirmar_senha": senha
+    })
+
+
+def test_token_guardado_apenas_como_hash(app, client):
+    token = solicitar_token(app, client)
+
+    with app.app_context():
+        reset = ResetToken.query.one()
+        assert reset.token_hash == hash_reset_token(token)
+        assert reset.token_hash != token
+
+
+def test_recuperar_senha_e_token_de_uso_unico(app, client):
+    token = solicitar_token(app, client)
+
+    assert recuperar(client, token).status_code == 200
+    assert recuperar(client, token).status_code == 400
+
+    response = client.post("/login", json={"email": "teste@teste.com", "senha": "Nova1234"})
+    assert response.status_code == 200
+
+
+def test_novo_pedido_gera_nova_linha_e_uso_invalida_todas(app, client):
+    primeiro = solicitar_token(app, client)
+    segundo = solicitar_token(app, client)
+
+    with app.app_context():
+        assert ResetToken.query.count() == 2
+
+    assert recuperar(client, segundo).status_code == 200
+    assert recuperar(client, primeiro).get_json()["error"] == "Token inválido"
+
+
+def test_token_expirado(app, client):
+    token = solicitar_token(app, client)
+    with app.app_context():
+        ResetToken.query.update({"expires_at": datetime.utcnow() - timedelta(minutes=1)})
+        db.session.commit()
+
+    response = recuperar(client, token)
+
+    assert response.status_code == 400
+    assert "expirado" in response.get_json()["error"]
+
+
+def test_limpeza_em_lotes(app):
+    with app.app_context():
+        user = User(nome="Teste", email="teste@teste.com")
+        db.session.add(user)
+        db.session.flush()
+        passado = datetime.utcnow() - timedelta(hours=1)
+        futuro = datetime.utcnow() + timedelta(hours=1)
+        for i in range(7):
+            db.session.add(ResetToken(user_id=user.id, token_hash=f"expirado{i}", expires_at=passado))
+        db.session.add(ResetToken(user_id=user.id, token_hash="valido", expires_at=futuro))
+        db.session.commit()
+
+        assert purge_expired_reset_tokens(batch_size=3) == 7
+        assert [t.token_hash for t in ResetToken.query.all()] == ["valido"]
+
+
+def test_comando_de_limpeza(app):
+    result = app.test_cli_runner().invoke(args=["auth", "purge-reset-tokens", "--batch-size", "10"])
+
+    assert result.exit_code == 0
+    assert "0 tokens expirados removidos" in result.output
@@ -0,0 +1,60 @@
+import datetime
+
+import pytest
+
+from auth.schemas import Erro, Usuario
+
+ROTAS = {
+    "/cadastrar": "Nome, email e senha são obrigatórios",
+    "/login": "Email e senha são obrigatórios",
+    "/google-login": "Token do Google é obrigatório",
+    "/esqueceuSenha": "Email é obrigatório",
+    "/recuperarSenha": "Token e senhas são obrigatórios"
+}
+
+
+@pytest.mark.parametrize("rota", ROTAS)
+@pytest.mark.parametrize("corpo", ["[]", '"texto"', "null", "{", "", '{"email": 123, "senha": ["x"]}'])
+def test_corpo_invalido_responde_400_antes_da_view(client, rota, corpo):
+    response = client.post(rota, data=corpo, content_type="application/json")
+
+    assert response.status_code == 400
+    assert response.get_json() == {"success": False, "error": ROTAS[rota]}
+
+
+def test_campos_vazios_ou_sem_json(client):
+    vazio = client.post("/login", json={"email": "", "senha": "x"})
+    formulario = client.post("/login", data={"email": "a@teste.com", "senha": "x"})
+
+    assert vazio.status_code == formulario.status_code == 400
+
+
+def test_campos_extras_sao_ignorados(client):
+    response = client.post("/cadastrar", json={
+        "nome": "Teste", "email": "teste@teste.com", "senha": "Teste123",
+        "confirmar_senha": "Teste123", "aceite": True
+    })
+
+    assert response.status_code == 201
+    assert list(response.get_json()) == ["success", "message", "usuario"]
+    assert set(response.get_json()["usuario"]) == {"id", "nome", "email", "is_google_user", "picture"}
+
+
+def test_provider_serializa_structs_e_tipos_do_flask(app):
+    with app.app_context():
+        assert app.json.dumps(Erro(error="x")) == '{"success":false,"error":"x"}'
+        assert app.json.dumps({"usuario": Usuario(1, "A", "a@b.c", False)}) == (
+            '{"usuario":{"id":1,"nome":"A","email":"a@b.c","is_google_user":false,"picture":null}}'
+        )
+        assert app.json.dumps({"b": 1, "a": 2}, sort_keys=True) == '{"a": 2, "b": 1}'
+        assert app.json.dumps({"erro": Erro(error="x")}, sort_keys=True) == '{"erro": {"error": "x", "success": false}}'
+        assert app.json.loads(b'{"a": [1]}') == {"a": [1]}
+        assert app.json.dumps(datetime.datetime(2024, 1, 2, 3, 4, 5)) == '"2024-01-02T03:04:05"'
+
+
+def test_modo_debug_indenta_structs(app, monkeypatch):
+    monkeypatch.setattr(app.json, "compact", False)
+    with app.test_request_context():
+        response = app.json.response(Erro(error="x"))
+
+    assert response.get_data(as_text=True) == '{\n  "success": false,\n  "error": "x"\n}'
@@ -0,0 +1,82 @@
+from flask_jwt_extended import decode_token
+from sqlalchemy import event
+
+from auth.tokens import is_token_revoked, revocation_cache
+from database import db
+from models import RefreshToken
+
+
+def auth(token):
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_login_emite_access_curto_e_refresh(app, client, login):
+    data = login(client)
+
+    with app.app_context():
+        access = decode_token(data["access_token"])
+        refresh = decode_token(data["refresh_token"])
+        assert access["exp"] - access["iat"] == 15 * 60
+        assert refresh["type"] == "refresh"
+        assert RefreshToken.query.filter_by(jti=refresh["jti"]).one().revoked_at is None
+
+
+def test_refresh_rotaciona_o_token(client, login):
+    data = login(client)
+
+    response = client.post("/refresh", headers=auth(data["refresh_token"]))
+
+    assert response.status_code == 200
+    novo = response.get_json()
+    assert novo["refresh_token"] != data["refresh_token"]
+    assert client.post("/refresh", headers=auth(novo["refresh_token"])).status_code == 200
+
+
+def test_reuso_de_refresh_revoga_a_familia(app, client, login):
+    data = login(client)
+    novo = client.post("/refresh", headers=auth(data["refresh_token"])).get_json()
+
+    # O token antigo foi reutilizado (vazou): a sessão inteira cai
+    assert client.post("/refresh", headers=auth(data["refresh_token"])).status_code == 401
+    assert client.post("/refresh", headers=auth(novo["refresh_token"])).status_code == 401
+
+    with app.app_context():
+        assert RefreshToken.query.filter_by(revoked_at=None).count() == 0
+
+
+def test_access_token_nao_serve_para_refresh(client, login):
+    data = login(client)
+
+    assert client.post("/refresh", headers=auth(data["access_token"])).status_code == 422
+
+
+def test_logout_revoga_access_e_refresh(client, login):
+    data = login(client)
+
+    assert client.post("/logout", headers=auth(data["access_token"])).status_code == 200
+
+    response = client.post("/logout", headers=auth(data["access_token"]))
+    assert response.status_code == 401
+    assert "revogado" in response.get_json()["error"]
+    assert client.post("/refresh", headers=auth(data["refresh_token"])).status_code == 401
+
+
+def test_checagem_de_revogacao_usa_o_cache(app, client, login):
+    data = login(client)
+    revocation_cache.clear()
+    consultas = []
+
+    def registrar(conn, cursor, statement, *args):
+        if "revoked_tokens" in statement:
+            consultas.append(statement)
+
+    with app.app_context():
+        payload = decode_token(data["access_token"])
+        event.listen(db.engine, "before_cursor_execute", registrar)
+        try:
+            for _ in range(5):
+                assert is_token_revoked({}, payload) is False
+        finally:
+            event.remove(db.engine, "before_cursor_execute", registrar)
+
+    assert len(consultas) == 1
@@ -0,0 +1,60 @@
+import os
+
+import database
+from app import create_app, start_worker, stop_background
+from auth.email_filter import email_filter
+from auth.outbox import outbox_sender
+from database import db
+from logs import log_queue
+from test_tokens import auth
+
+
+def test_encerramento_e_worker_novo(app, client, login):
+    token = login(client)["access_token"]
+
+    stop_background(app)
+    assert log_queue._listener is None
+    with app.app_context():
+        assert all(engine.pool.checkedout() == 0 for engine in db.engines.values())
+
+    start_worker(app)
+    assert log_queue._listener is not None
+    assert client.get("/me", headers=auth(token)).status_code == 200
+
+
+def test_worker_criado_por_fork(app, client, login):
+    token = login(client)["access_token"]
+
+    pid = os.fork()
+    if pid == 0:
+        # Filho: o que o post_fork do gunicorn faz antes de atender
+        status = 1
+        try:
+            start_worker(app)
+            ok = app.test_client().get("/me", headers=auth(token)).status_code == 200
+            stop_background(app)
+            status = 0 if ok else 1
+        finally:
+            os._exit(status)
+
+    _, status = os.waitpid(pid, 0)
+    assert os.waitstatus_to_exitcode(status) == 0
+    # O pai continua com as próprias conexões
+    assert client.get("/me", headers=auth(token)).status_code == 200
+
+
+def test_create_app_nao_inicia_trabalho_de_fundo(app):
+    # Comandos `flask` também criam o app: nada de threads ou conexões
+    engines = dict(database._engines)
+    try:
+        novo = create_app({"TESTING": True, "OUTBOX_SENDER_ENABLED": True, "EMAIL_FILTER_ENABLED": True})
+        assert outbox_sender._thread is None
+        assert email_filter._thread is None
+        assert log_queue._listener is None
+        with novo.app_context():
+            assert all(engine.pool.checkedin() == 0 for engine in db.engines.values())
+    finally:
+        outbox_sender.init_app(app)
+        email_filter.init_app(app)
+        database._engines.clear()
+        database._engines.update(engines)
@@ -0,0 +1,9 @@
+"""Entrada WSGI de produção.
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+Workers, threads, preload e encerramento estão em gunicorn.conf.py.
+"""
+from app import create_app
+
+app = create_app()
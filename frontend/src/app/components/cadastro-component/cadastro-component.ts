@@ -111,6 +111,9 @@ export class CadastroComponent implements OnInit, OnDestroy {
         
           if (resposta.access_token) {
             localStorage.setItem('access_token', resposta.access_token);
+            if (resposta.refresh_token) {
+              localStorage.setItem('refresh_token', resposta.refresh_token);
+            }
             
             if (resposta.usuario) {
               localStorage.setItem('user', JSON.stringify(resposta.usuario));
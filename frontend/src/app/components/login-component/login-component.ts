@@ -49,11 +49,18 @@ export class LoginComponent implements OnInit, OnDestroy {
   }
 
   checkOAuthCallback(): void {
-    this.route.queryParams.subscribe(params => {
-      if (params['token'] && params['user']) {
-        localStorage.setItem('access_token', params['token']);
+    // Tokens do callback Google chegam no fragmento (#), fora da query string
+    this.route.fragment.subscribe(fragment => {
+      const params = new URLSearchParams(fragment ?? '');
+      if (params.get('token') && params.get('user')) {
+        localStorage.setItem('access_token', params.get('token')!);
+        if (params.get('refresh_token')) {
+          localStorage.setItem('refresh_token', params.get('refresh_token')!);
+        }
+        // Tira os tokens da URL (histórico do navegador)
+        history.replaceState(history.state, '', location.pathname + location.search);
         
-        if (params['new_user'] === 'true') {
+        if (params.get('new_user') === 'true') {
           this.successMessage = 'Conta criada com sucesso! Bem-vindo ao sistema';
         } else {
           this.successMessage = 'Login com Google realizado com sucesso!';
@@ -63,10 +70,14 @@ export class LoginComponent implements OnInit, OnDestroy {
           this.router.navigate(['/dashboard']);
         }, 1500);
       }
+    });
 
+    this.route.queryParams.subscribe(params => {
       if (params['error']) {
         if (params['error'] === 'email_cadastrado_normal') {
           this.errorMessage = 'Este email já possui cadastro normal. Use login tradicional';
+        } else if (params['error'] === 'conta_google_em_conflito') {
+          this.errorMessage = 'Esta conta Google já está vinculada a outro usuário';
         } else if (params['error'] === 'google_auth_failed') {
           this.errorMessage = 'Erro ao autenticar com Google. Tente novamente';
         }
@@ -126,6 +137,9 @@ export class LoginComponent implements OnInit, OnDestroy {
 
           if (resposta.access_token) {
             localStorage.setItem('access_token', resposta.access_token);
+            if (resposta.refresh_token) {
+              localStorage.setItem('refresh_token', resposta.refresh_token);
+            }
             
             if (resposta.usuario) {
               localStorage.setItem('user', JSON.stringify(resposta.usuario));
@@ -203,6 +217,9 @@ export class LoginComponent implements OnInit, OnDestroy {
 
           if (resposta.access_token) {
             localStorage.setItem('access_token', resposta.access_token);
+            if (resposta.refresh_token) {
+              localStorage.setItem('refresh_token', resposta.refresh_token);
+            }
             
             if (resposta.usuario) {
               localStorage.setItem('user', JSON.stringify(resposta.usuario));
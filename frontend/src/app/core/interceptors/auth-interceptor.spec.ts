@@ -0,0 +1,56 @@
+import { TestBed } from '@angular/core/testing';
+import { HttpClient, provideHttpClient, withInterceptors } from '@angular/common/http';
+import { HttpTestingController, provideHttpClientTesting } from '@angular/common/http/testing';
+import { provideRouter } from '@angular/router';
+
+import { authInterceptor } from './auth-interceptor';
+
+describe('authInterceptor', () => {
+  let http: HttpClient;
+  let httpTesting: HttpTestingController;
+
+  beforeEach(() => {
+    TestBed.configureTestingModule({
+      providers: [
+        provideHttpClient(withInterceptors([authInterceptor])),
+        provideHttpClientTesting(),
+        provideRouter([])
+      ]
+    });
+    http = TestBed.inject(HttpClient);
+    httpTesting = TestBed.inject(HttpTestingController);
+    localStorage.setItem('refresh_token', 'refresh-antigo');
+  });
+
+  afterEach(() => {
+    httpTesting.verify();
+    localStorage.clear();
+  });
+
+  it('renova o access token no 401 e repete a requisição', () => {
+    let resposta: unknown;
+    http.get('/me', { headers: { Authorization: 'Bearer expirado' } }).subscribe(r => (resposta = r));
+
+    httpTesting.expectOne('/me').flush({ success: false }, { status: 401, statusText: 'Unauthorized' });
+    const refresh = httpTesting.expectOne(req => req.url.endsWith('/refresh'));
+    expect(refresh.request.headers.get('Authorization')).toBe('Bearer refresh-antigo');
+    refresh.flush({ success: true, access_token: 'novo', refresh_token: 'refresh-novo' });
+
+    const repetida = httpTesting.expectOne('/me');
+    expect(repetida.request.headers.get('Authorization')).toBe('Bearer novo');
+    repetida.flush({ success: true });
+
+    expect(resposta).toEqual({ success: true });
+    expect(localStorage.getItem('refresh_token')).toBe('refresh-novo');
+  });
+
+  it('encerra a sessão quando o refresh falha', () => {
+    http.get('/me', { headers: { Authorization: 'Bearer expirado' } }).subscribe({ error: () => {} });
+
+    httpTesting.expectOne('/me').flush({ success: false }, { status: 401, statusText: 'Unauthorized' });
+    httpTesting.expectOne(req => req.url.endsWith('/refresh'))
+      .flush({ success: false }, { status: 401, statusText: 'Unauthorized' });
+
+    expect(localStorage.getItem('refresh_token')).toBeNull();
+  });
+});
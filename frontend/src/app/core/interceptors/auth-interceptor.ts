@@ -0,0 +1,60 @@
+import { HttpErrorResponse, HttpInterceptorFn, HttpRequest } from '@angular/common/http';
+import { inject } from '@angular/core';
+import { Router } from '@angular/router';
+import { Observable, catchError, finalize, map, shareReplay, switchMap, throwError } from 'rxjs';
+import { ApiService } from '../services/api-service';
+
+// Renovação em andamento: várias requisições com 401 esperam a mesma chamada a /refresh
+// (o refresh token é rotacionado, um segundo uso derrubaria a sessão)
+let refreshing: Observable<string> | null = null;
+
+function withToken(req: HttpRequest<unknown>, accessToken: string): HttpRequest<unknown> {
+  return req.clone({ setHeaders: { Authorization: `Bearer ${accessToken}` } });
+}
+
+function refreshAccessToken(apiService: ApiService, refreshToken: string): Observable<string> {
+  if (!refreshing) {
+    refreshing = apiService.Refresh(refreshToken).pipe(
+      map(resposta => {
+        if (!resposta.success || !resposta.access_token || !resposta.refresh_token) {
+          throw new Error('Refresh token inválido');
+        }
+        localStorage.setItem('access_token', resposta.access_token);
+        localStorage.setItem('refresh_token', resposta.refresh_token);
+        return resposta.access_token;
+      }),
+      finalize(() => (refreshing = null)),
+      shareReplay(1)
+    );
+  }
+  return refreshing;
+}
+
+// Access token expirado (401): renova com o refresh token e repete a requisição uma vez
+export const authInterceptor: HttpInterceptorFn = (req, next) => {
+  const apiService = inject(ApiService);
+  const router = inject(Router);
+
+  return next(req).pipe(
+    catchError((error: unknown) => {
+      const refreshToken = localStorage.getItem('refresh_token');
+      const expirou = error instanceof HttpErrorResponse && error.status === 401
+        && req.headers.has('Authorization') && !req.url.endsWith('/refresh');
+      if (!expirou || !refreshToken) {
+        return throwError(() => error);
+      }
+
+      return refreshAccessToken(apiService, refreshToken).pipe(
+        catchError(refreshError => {
+          // Sessão encerrada (token expirado, revogado ou reutilizado): novo login
+          localStorage.removeItem('access_token');
+          localStorage.removeItem('refresh_token');
+          localStorage.removeItem('user');
+          router.navigate(['/login']);
+          return throwError(() => refreshError);
+        }),
+        switchMap(accessToken => next(withToken(req, accessToken)))
+      );
+    })
+  );
+};
@@ -41,6 +41,7 @@ export interface ApiResponseSuccess {
   success: true;
   message: string;
   access_token?: string;
+  refresh_token?: string;
   usuario?: User;
   is_new_user?: boolean;
 }
@@ -32,6 +32,19 @@ export class ApiService {
     return this.http.post<ApiResponse>(`${this.apiUrl}/google-login`, googleToken);
   }
 
+  Refresh(refreshToken: string): Observable<ApiResponse> {
+    return this.http.post<ApiResponse>(`${this.apiUrl}/refresh`, {}, {
+      headers: { Authorization: `Bearer ${refreshToken}` }
+    });
+  }
+
+  // Usuário logado; o navegador reaproveita a resposta via ETag (304)
+  Me(accessToken: string): Observable<ApiResponse> {
+    return this.http.get<ApiResponse>(`${this.apiUrl}/me`, {
+      headers: { Authorization: `Bearer ${accessToken}` }
+    });
+  }
+
   GoogleOAuthRedirect(): void {
     window.location.href = `${this.apiUrl}/auth/google`;
   }